@@ -0,0 +1,6 @@
+# bench/__init__.py
+#
+# Greitaveikos matavimai: sintetinės duomenų bazės generatorius (generate.py),
+# Streamlit pakaitalas be naršyklės (stub.py) ir modulių show() matavimas su JSON ataskaita (run.py).
+#
+#   python -m bench.run --trucks 500 --cargo 20000 --output bench/report.json
@@ -0,0 +1,221 @@
+# bench/generate.py
+
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+
+import db
+
+# Numatytasis mastelis – maždaug vidutinio dydžio įmonė
+MASTELIS = {
+    "trucks": 200,
+    "trailers": 220,
+    "drivers": 380,
+    "clients": 300,
+    "cargo": 8000,
+    "updates": 12000,
+}
+
+VARDAI = ["Jonas", "Petras", "Tomas", "Mantas", "Darius", "Andrius", "Rokas", "Lukas", "Paulius", "Marius",
+          "Oleg", "Ivan", "Andrii", "Rustam", "Piotr", "Aziz"]
+PAVARDES = ["Kazlauskas", "Petrauskas", "Jankauskas", "Stankevičius", "Vasiliauskas", "Žukauskas",
+            "Butkus", "Paulauskas", "Urbonas", "Kavaliauskas", "Kowalski", "Shevchenko", "Karimov"]
+SALYS = ["LT", "LV", "EE", "PL", "DE", "NL", "BE", "FR", "IT", "ES", "CZ", "AT"]
+MIESTAI = ["Vilnius", "Kaunas", "Klaipėda", "Riga", "Warszawa", "Berlin", "Hamburg", "Rotterdam",
+           "Antwerpen", "Lyon", "Milano", "Madrid", "Praha", "Wien"]
+MARKES = ["Volvo", "Scania", "DAF", "MAN", "Mercedes-Benz", "Renault", "Iveco"]
+PRIEKABU_TIPAI = ["Curtain", "Box trailer", "Reefer", "Cistern"]
+TAUTYBES = ["LT", "BY", "UA", "UZ", "IN", "NG", "PL"]
+
+def _data(d):
+    return d.isoformat() if d else ""
+
+def generate(path, trucks=MASTELIS["trucks"], trailers=MASTELIS["trailers"], drivers=MASTELIS["drivers"],
+             clients=MASTELIS["clients"], cargo=MASTELIS["cargo"], updates=MASTELIS["updates"], seed=1):
+    """
+    Sukuria naują duomenų bazę 'path' su sintetiniais, bet realistiškais duomenimis:
+    grupės ir darbuotojai, vilkikai su priekabomis ir vairuotojais, klientai, kroviniai
+    (pakrovimai nuo -60 iki +30 dienų nuo šiandien) ir 'vilkiku_darbo_laikai' atnaujinimai
+    (keli išsaugojimai tai pačiai vilkiko ir datos porai, kaip būna realiai: lentelėje lieka
+    paskutinis, visi – žurnale 'vilkiku_darbo_laiku_istorija').
+    Tas pats seed duoda tuos pačius duomenis (išskyrus datas, kurios skaičiuojamos nuo šiandien).
+    Schema kuriama per db.connect(), todėl užpildomi ir seni create_tables NOT NULL stulpeliai
+    (vilkikai.modelis/valstybinis_nr, priekabos.tipas, klientai.vardas/pavarde, kroviniai.aprasymas).
+    Grąžina sukurtų įrašų skaičius pagal lentelę.
+    """
+    # Rašoma į laikiną failą, kad nutrūkus generavimui neliktų pusiau užpildytos bazės
+    tmp = path + ".tmp"
+    for f in (path, tmp):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(f + suffix):
+                os.remove(f + suffix)
+
+    r = random.Random(seed)
+    today = date.today()
+    conn, c = db.connect(tmp)
+
+    def vardas_pavarde():
+        return r.choice(VARDAI), r.choice(PAVARDES)
+
+    # 1) Grupės ir darbuotojai (transporto ir ekspedicijos vadybininkai)
+    grupes_n = max(trucks // 40, 1)
+    c.executemany(
+        "INSERT INTO grupes (numeris, pavadinimas, aprasymas) VALUES (?, ?, '')",
+        [(f"{p}{i}", f"{p}{i}") for p in ("TR", "EKSP") for i in range(1, grupes_n + 1)]
+    )
+    transporto, ekspedicijos = [], []
+    for i in range(grupes_n * 4):
+        vardas, pavarde = vardas_pavarde()
+        pavarde = f"{pavarde}{i}"
+        if i % 2 == 0:
+            transporto.append(f"{vardas} {pavarde}")
+            pareigybe, grupe = "Transporto vadybininkas", f"TR{i // 4 + 1}"
+        else:
+            ekspedicijos.append(f"{vardas} {pavarde}")
+            pareigybe, grupe = "Ekspedicijos vadybininkas", f"EKSP{i // 4 + 1}"
+        c.execute(
+            """INSERT INTO darbuotojai (vardas, pavarde, pareigybe, el_pastas, telefonas, grupe, aktyvus)
+               VALUES (?, ?, ?, ?, ?, ?, 1)""",
+            (vardas, pavarde, pareigybe, f"{vardas.lower()}.{i}@example.com", f"+370600{i:05d}", grupe)
+        )
+    c.executemany(
+        "INSERT INTO lookup (kategorija, reiksme) VALUES ('Markė', ?)", [(m,) for m in MARKES]
+    )
+
+    # 2) Priekabos, vairuotojai ir vilkikai (vilkikui – priekaba ir 1–2 vairuotojai, kol jų užtenka)
+    priekabu_nr = [f"P{i:04d}" for i in range(trailers)]
+    c.executemany(
+        """INSERT INTO priekabos (numeris, tipas, priekabu_tipas, marke, pagaminimo_metai, tech_apziura, draudimas)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        [(nr, tipas, tipas, "Schmitz", _data(today - timedelta(days=r.randint(300, 4000))),
+          _data(today + timedelta(days=r.randint(-30, 365))), _data(today + timedelta(days=r.randint(-30, 365))))
+         for nr in priekabu_nr for tipas in [r.choice(PRIEKABU_TIPAI)]]
+    )
+    vairuotoju_vardai = []
+    for i in range(drivers):
+        vardas, pavarde = vardas_pavarde()
+        vairuotoju_vardai.append(f"{vardas} {pavarde}{i}")
+        c.execute(
+            """INSERT INTO vairuotojai (vardas, pavarde, gimimo_metai, tautybe, kadencijos_pabaiga, atostogu_pabaiga)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (vardas, f"{pavarde}{i}", _data(date(1960, 1, 1) + timedelta(days=r.randint(0, 15000))),
+             r.choice(TAUTYBES), _data(today + timedelta(days=r.randint(0, 60))), "")
+        )
+    vilkiku_nr = [f"TRK{i:04d}" for i in range(trucks)]
+    laisvi_vairuotojai = iter(vairuotoju_vardai)
+    for i, nr in enumerate(vilkiku_nr):
+        marke = r.choice(MARKES)
+        c.execute(
+            """INSERT INTO vilkikai (numeris, valstybinis_nr, draudimas, pagaminimo_metai, marke, modelis,
+                                     tech_apziura, vadybininkas, vairuotojai, priekaba)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, '', ?)""",
+            (nr, nr, _data(today + timedelta(days=r.randint(-10, 365))),
+             _data(today - timedelta(days=r.randint(100, 3000))), marke, marke,
+             _data(today + timedelta(days=r.randint(-10, 365))), r.choice(transporto),
+             priekabu_nr[i] if i < trailers else "")
+        )
+        vilkiko_vairuotojai = [v for v in (next(laisvi_vairuotojai, None) for _ in range(r.choice((1, 2)))) if v]
+        c.executemany(
+            "INSERT INTO vilkiku_vairuotojai (vilkiko_numeris, vairuotojas, eile) VALUES (?, ?, ?)",
+            [(nr, v, eile) for eile, v in enumerate(vilkiko_vairuotojai, start=1)]
+        )
+
+    # 3) Klientai (keli klientai gali turėti tą patį VAT – kaip filialai)
+    klientu_pav = [f"UAB Klientas {i}" for i in range(clients)]
+    c.executemany(
+        """INSERT INTO klientai (pavadinimas, vardas, pavarde, vat_numeris, kontaktinis_asmuo,
+                                 salis, regionas, miestas, adresas, coface_limitas, musu_limitas, likes_limitas)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(pav, *asmuo, f"LT{100000 + r.randrange(max(clients * 9 // 10, 1))}", " ".join(asmuo),
+          r.choice(SALYS), str(r.randint(10, 99)), r.choice(MIESTAI), f"Gatvė {i}",
+          lim, lim / 3, lim / 3)
+         for i, pav in enumerate(klientu_pav)
+         for asmuo, lim in [(vardas_pavarde(), float(r.choice((30000, 60000, 150000, 300000))))]]
+    )
+
+    # 4) Kroviniai: ~90 % priskirti vilkikams, pakrovimas – iškrovimas per 0–4 dienas
+    krovinio_poros = []
+    eilutes = []
+    for i in range(cargo):
+        pk = today + timedelta(days=r.randint(-60, 30))
+        ik = pk + timedelta(days=r.randint(0, 4))
+        vilkikas = r.choice(vilkiku_nr) if vilkiku_nr and r.random() < 0.9 else ""
+        if vilkikas:
+            krovinio_poros.append((vilkikas, pk, ik))
+        eilutes.append((
+            r.choice(klientu_pav) if klientu_pav else "", f"U{i:06d}",
+            r.choice(SALYS), str(r.randint(10, 99)), r.choice(MIESTAI), f"Adresas {i}", _data(pk),
+            f"{r.randint(6, 12):02d}:00:00", f"{r.randint(13, 18):02d}:00:00",
+            r.choice(SALYS), str(r.randint(10, 99)), r.choice(MIESTAI), f"Adresas {i}b", _data(ik),
+            f"{r.randint(6, 12):02d}:00:00", f"{r.randint(13, 18):02d}:00:00",
+            vilkikas, "", r.choice(ekspedicijos), r.choice(ekspedicijos), r.choice(transporto),
+            r.randint(50, 2500), round(r.uniform(300, 4000), 2), r.randint(1000, 24000), r.randint(1, 33),
+            r.choice(("Neapmokėta", "Neapmokėta", "Apmokėta")), "", "",
+        ))
+    c.executemany(
+        """INSERT INTO kroviniai (
+               klientas, uzsakymo_numeris,
+               pakrovimo_salis, pakrovimo_regionas, pakrovimo_miestas, pakrovimo_adresas, pakrovimo_data,
+               pakrovimo_laikas_nuo, pakrovimo_laikas_iki,
+               iskrovimo_salis, iskrovimo_regionas, iskrovimo_miestas, iskrovimo_adresas, iskrovimo_data,
+               iskrovimo_laikas_nuo, iskrovimo_laikas_iki,
+               vilkikas, priekaba, atsakingas_vadybininkas, ekspedicijos_vadybininkas, transporto_vadybininkas,
+               kilometrai, frachtas, svoris, paleciu_skaicius, saskaitos_busena, busena, aprasymas
+           ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        eilutes
+    )
+
+    # 5) Darbo laikų atnaujinimai krovinių (vilkikas, pakrovimo data) poroms
+    atnaujinimai = []
+    for i in range(updates if krovinio_poros else 0):
+        vilkikas, pk, ik = r.choice(krovinio_poros)
+        sukurta = datetime.combine(pk, datetime.min.time()) - timedelta(hours=r.randint(0, 48))
+        atnaujinimai.append((
+            vilkikas, _data(pk), r.choice((9, 10, None)), r.choice((2, 4, 6, None)),
+            r.choice(("", "Atvyko", "Pakrauta", "Kita")), f"{r.randint(6, 12):02d}:00", _data(pk),
+            r.choice(("", "Atvyko", "Iškrauta", "Kita")), f"{r.randint(12, 18):02d}:00", _data(ik),
+            "", r.choice(("24", "45", "")), sukurta.isoformat(),
+        ))
+    c.executemany(
+        """INSERT INTO vilkiku_darbo_laikai (
+               vilkiko_numeris, data, darbo_laikas, likes_laikas,
+               pakrovimo_statusas, pakrovimo_laikas, pakrovimo_data,
+               iskrovimo_statusas, iskrovimo_laikas, iskrovimo_data,
+               komentaras, sa, created_at
+           ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT (vilkiko_numeris, data) DO UPDATE SET
+               darbo_laikas = excluded.darbo_laikas, likes_laikas = excluded.likes_laikas,
+               pakrovimo_statusas = excluded.pakrovimo_statusas, pakrovimo_laikas = excluded.pakrovimo_laikas,
+               pakrovimo_data = excluded.pakrovimo_data,
+               iskrovimo_statusas = excluded.iskrovimo_statusas, iskrovimo_laikas = excluded.iskrovimo_laikas,
+               iskrovimo_data = excluded.iskrovimo_data,
+               komentaras = excluded.komentaras, sa = excluded.sa, created_at = excluded.created_at""",
+        atnaujinimai
+    )
+    conn.commit()
+
+    kiekiai = {
+        t: c.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+        for t in ("vilkikai", "priekabos", "vairuotojai", "klientai", "kroviniai", "vilkiku_darbo_laikai")
+    }
+    c.execute("ANALYZE")
+    c.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.close(conn, c)
+    os.replace(tmp, path)
+    return kiekiai
+
+def add_scale_arguments(parser):
+    for name, default in MASTELIS.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument("--seed", type=int, default=1)
+
+if __name__ == "__main__":
+    # python -m bench.generate bench_data/main.db --trucks 500 --cargo 20000
+    parser = argparse.ArgumentParser(description="Sintetinės DISPO duomenų bazės generatorius")
+    parser.add_argument("path", nargs="?", default=os.path.join("bench_data", db.DB_FILE))
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    os.makedirs(os.path.dirname(os.path.abspath(args.path)), exist_ok=True)
+    kiekiai = generate(args.path, **{k: getattr(args, k) for k in MASTELIS}, seed=args.seed)
+    print(", ".join(f"{t}: {n}" for t, n in kiekiai.items()))
@@ -0,0 +1,126 @@
+# bench/run.py
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+import traceback
+from datetime import datetime
+
+from bench import stub
+from bench.generate import MASTELIS, add_scale_arguments, generate
+
+# Moduliai importuoja "streamlit as st" – jų vietoje naudojamas pakaitalas be serverio
+st = sys.modules["streamlit"] = stub.StreamlitStub()
+
+# Matuojami moduliai (modules/<vardas>.py, kiekvienas turi show(conn, c))
+MODULIAI = ["kroviniai", "update", "planavimas", "dispo", "vilkikai", "priekabos", "vairuotojai"]
+
+def measure(name, conn, c, repeat):
+    """
+    Išmatuoja modulio show() trukmę su Streamlit pakaitalu.
+    uncached – repeat paleidimų, prieš kiekvieną išvalius podėlius (cache.clear(), lru_cache): tai duomenų
+    paruošimo trukmė, lyginama tarp versijų; cold_ms – pirmasis iš jų (dar ir nauja sesijos būsena).
+    warm – repeat paleidimų be valymo, kaip kartojant puslapį (duomenys iš podėlio).
+    """
+    import cache
+
+    module = importlib.import_module(f"modules.{name}")
+    st.session_state = stub.SessionState()
+
+    def once():
+        start = time.perf_counter()
+        module.show(conn, c)
+        return (time.perf_counter() - start) * 1000
+
+    # Modulių vidiniai podėliai (functools.lru_cache, pvz. dispo.render_truck) valomi kartu su bendru
+    vidiniai = [f for f in vars(module).values() if callable(getattr(f, "cache_clear", None))]
+
+    def uncached():
+        cache.clear()
+        for f in vidiniai:
+            f.cache_clear()
+        return once()
+
+    samples = {"uncached": [uncached() for _ in range(max(repeat, 1))]}
+    samples["warm"] = [once() for _ in range(repeat)]
+    result = {"cold_ms": round(samples["uncached"][0], 2)}
+    for name, values in samples.items():
+        if values:
+            result.update({
+                f"{name}_ms_median": round(statistics.median(values), 2),
+                f"{name}_ms_min": round(min(values), 2),
+                f"{name}_ms_max": round(max(values), 2),
+            })
+    return result
+
+def run(data_dir, repeat=5, modules=MODULIAI):
+    """
+    Paleidžia matavimus duomenų bazei data_dir/main.db ir grąžina ataskaitos žodyną.
+    """
+    import db
+
+    conn, c = db.connect(os.path.join(data_dir, db.DB_FILE))
+    kiekiai = {
+        t: c.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+        for t in ("vilkikai", "priekabos", "vairuotojai", "klientai", "kroviniai", "vilkiku_darbo_laikai")
+    }
+    rezultatai = {}
+    for name in modules:
+        try:
+            rezultatai[name] = measure(name, conn, c, repeat)
+        except Exception as e:
+            conn.rollback()
+            rezultatai[name] = {"error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+    db.close(conn, c)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeat": repeat,
+        "rows": kiekiai,
+        "modules": rezultatai,
+    }
+
+if __name__ == "__main__":
+    # python -m bench.run [--trucks N ...] [--repeat 5] [--output report.json]
+    # Duomenų bazė generuojama į --dir (jei jos nėra arba nurodytas --regenerate).
+    parser = argparse.ArgumentParser(description="DISPO modulių show() greitaveikos matavimas")
+    parser.add_argument("--dir", default="bench_data")
+    parser.add_argument("--regenerate", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=MODULIAI, choices=MODULIAI)
+    parser.add_argument("--output", default="bench_output.json")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.getcwd())
+    output = os.path.abspath(args.output)
+    data_dir = os.path.abspath(args.dir)
+    os.makedirs(data_dir, exist_ok=True)
+
+    scale = {k: getattr(args, k) for k in MASTELIS}
+    db_path = os.path.join(data_dir, "main.db")
+    if args.regenerate or not os.path.exists(db_path):
+        generate(db_path, **scale, seed=args.seed)
+
+    report = run(data_dir, args.repeat, args.modules)
+    report.update({"scale": scale, "seed": args.seed})
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for name, r in report["modules"].items():
+        if "error" in r:
+            print(f"{name:12} KLAIDA {r['error']}")
+        else:
+            print(f"{name:12} be podėlio (mediana) {r['uncached_ms_median']:9.1f} ms   "
+                  f"su podėliu (mediana) {r.get('warm_ms_median', 0):9.1f} ms")
+    print(f"Ataskaita: {output}")
+    # Nepavykęs modulis – nepavykęs matavimas (pvz. CI palyginimui)
+    if any("error" in r for r in report["modules"].values()):
+        sys.exit(1)
@@ -0,0 +1,99 @@
+# bench/stub.py
+
+from datetime import date
+from types import SimpleNamespace
+
+class SessionState(dict):
+    """st.session_state pakaitalas: žodynas, pasiekiamas ir per atributus."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        del self[name]
+
+class StreamlitStub:
+    """
+    Streamlit pakaitalas be naršyklės ir serverio: valdikliai grąžina numatytąsias reikšmes
+    (kaip pirmo atvaizdavimo metu), mygtukai – False, o išvedimas (title, markdown, dataframe...)
+    nieko nedaro. Taip matuojamas tik modulio show() duomenų paruošimas.
+    Nežinomi st.* kvietimai taip pat nieko nedaro.
+    """
+
+    def __init__(self, session_state=None):
+        self.session_state = SessionState(session_state or {})
+
+    # 1) Valdikliai: reikšmė įrašoma į session_state pagal key, kaip tikrame Streamlit
+    def _widget(self, key, value):
+        if key is None:
+            return value
+        return self.session_state.setdefault(key, value)
+
+    def text_input(self, label="", value="", *args, key=None, **kwargs):
+        return self._widget(key, value or "")
+
+    text_area = text_input
+
+    def number_input(self, label="", *args, value=0, key=None, **kwargs):
+        return self._widget(key, value)
+
+    def selectbox(self, label="", options=(), index=0, *args, key=None, **kwargs):
+        options = list(options)
+        return self._widget(key, options[index] if options and index is not None else None)
+
+    radio = selectbox
+
+    def multiselect(self, label="", options=(), default=None, *args, key=None, **kwargs):
+        return self._widget(key, list(default or []))
+
+    def date_input(self, label="", value="today", *args, key=None, **kwargs):
+        return self._widget(key, date.today() if value == "today" else value)
+
+    def checkbox(self, label="", value=False, *args, key=None, **kwargs):
+        return self._widget(key, value)
+
+    def button(self, *args, **kwargs):
+        return False
+
+    form_submit_button = download_button = button
+
+    def dataframe(self, *args, **kwargs):
+        return SimpleNamespace(selection=SimpleNamespace(rows=[], columns=[]))
+
+    # 2) Išdėstymas: stulpeliai ir konteineriai grąžina tą patį pakaitalą
+    def columns(self, spec, *args, **kwargs):
+        return [self] * (spec if isinstance(spec, int) else len(spec))
+
+    def tabs(self, labels, *args, **kwargs):
+        return [self] * len(labels)
+
+    def form(self, *args, **kwargs):
+        return self
+
+    container = expander = empty = form
+
+    @property
+    def sidebar(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    # 3) Podėlio dekoratoriai – be podėlio
+    def cache_resource(self, func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    cache_data = cache_resource
+
+    # 4) Visa kita (title, markdown, write, info, rerun...) – nieko nedaro
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
@@ -0,0 +1,147 @@
+import threading
+from collections import OrderedDict
+
+# Bendras (vieną procese) žinyninių lentelių (vilkikai, priekabos, vairuotojai, darbuotojai,
+# grupes, lookup, klientai) užklausų rezultatų podėlis.
+# Kiekviena lentelė turi kartos skaitiklį: išsaugojus pakeitimus lentelėje kviečiama bump(lentele),
+# todėl visi tos lentelės įrašai podėlyje tampa pasenę ir kitą kartą perskaitomi iš DB.
+#
+# Kartos didinamos ir pagal DB versijas: sync(db.get_versions(conn)), kviečiamas kiekvieno atvaizdavimo
+# pradžioje (main.py), pasenina lenteles, kurios pasikeitė nuo paskutinio karto – ir kai rašė kitas procesas.
+#
+# view() – to paties podėlio brangiems išvestiniams rodiniams (planavimo lentelė, DISPO lentelė,
+# krovinių sąrašo puslapis): visos sesijos dalijasi vienu rezultatu, o vienu metu tą patį rodinį
+# skaičiuoja tik viena gija (kitos laukia jos rezultato).
+
+VIEW_MAX = 64    # kiek išvestinių rodinių laikoma (seniausiai naudoti išmetami)
+
+_lock = threading.Lock()
+_kartos = {}     # lentelė → kartos numeris
+_irasai = {}     # (lentelės, užklausa, parametrai) → (kartos, rezultatas)
+_statistika = {} # lentelė → {"hits": n, "misses": n}
+_rodiniai = OrderedDict()  # (vardas, lentelės, raktas) → (kartos, rezultatas), LRU tvarka
+_skaiciuojami = {}         # (vardas, lentelės, raktas, kartos) → threading.Event
+_db_versijos = {}          # lentelė → paskutinė matyta DB versija (žr. sync)
+
+def _tables(tables):
+    return (tables,) if isinstance(tables, str) else tuple(tables)
+
+def _generation(tables):
+    return tuple(_kartos.get(t, 0) for t in tables)
+
+def rows(conn, tables, query, params=()):
+    """
+    Grąžina užklausos eilučių sąrašą iš podėlio arba, jei jo nėra / jis pasenęs, iš DB.
+    tables – lentelė (arba lentelių sąrašas), iš kurios skaitoma; pagal ją tikrinamos kartos.
+    Grąžinamas naujas sąrašas, todėl jį galima keisti nepažeidžiant podėlio.
+    """
+    tables = _tables(tables)
+    key = (tables, query, tuple(params))
+    with _lock:
+        gen = _generation(tables)
+        hit = _irasai.get(key)
+        stat = _statistika.setdefault("+".join(tables), {"hits": 0, "misses": 0})
+        if hit is not None and hit[0] == gen:
+            stat["hits"] += 1
+            return list(hit[1])
+        stat["misses"] += 1
+    result = conn.execute(query, params).fetchall()
+    with _lock:
+        # Jei skaitymo metu lentelė buvo pakeista, pasenusio rezultato neišsaugome
+        if _generation(tables) == gen:
+            _irasai[key] = (gen, tuple(result))
+    return list(result)
+
+def column(conn, tables, query, params=()):
+    """
+    Kaip rows(), bet grąžina tik pirmojo stulpelio reikšmes (dropdown'ų sąrašams).
+    """
+    return [r[0] for r in rows(conn, tables, query, params)]
+
+def view(name, tables, key, compute):
+    """
+    Išvestinio rodinio rezultatas iš podėlio arba, jei jo nėra / jis pasenęs, compute() rezultatas.
+    tables – lentelės, iš kurių rodinys skaičiuojamas (jų kartos – duomenų versija rakte);
+    key – rodinio parametrai (pvz. datų intervalas), turi būti hash'uojami.
+    Jei tą patį rodinį tuo metu jau skaičiuoja kita gija, laukiama jos rezultato.
+    Grąžinamas bendras (visų sesijų) objektas – jo keisti negalima.
+    """
+    tables = _tables(tables)
+    rkey = (name, tables, key)
+    while True:
+        with _lock:
+            gen = _generation(tables)
+            stat = _statistika.setdefault(f"view:{name}", {"hits": 0, "misses": 0})
+            hit = _rodiniai.get(rkey)
+            if hit is not None and hit[0] == gen:
+                _rodiniai.move_to_end(rkey)
+                stat["hits"] += 1
+                return hit[1]
+            vykdomas = _skaiciuojami.get(rkey + (gen,))
+            if vykdomas is None:
+                vykdomas = _skaiciuojami[rkey + (gen,)] = threading.Event()
+                stat["misses"] += 1
+                break
+        # Skaičiuoja kita gija: palaukus rezultatas imamas iš podėlio
+        # (jei jos skaičiavimas nepavyko ar duomenys pasikeitė – skaičiuojama iš naujo)
+        vykdomas.wait()
+
+    try:
+        result = compute()
+        with _lock:
+            if _generation(tables) == gen:
+                _rodiniai[rkey] = (gen, result)
+                _rodiniai.move_to_end(rkey)
+                while len(_rodiniai) > VIEW_MAX:
+                    _rodiniai.popitem(last=False)
+        return result
+    finally:
+        with _lock:
+            del _skaiciuojami[rkey + (gen,)]
+        vykdomas.set()
+
+def bump(*tables):
+    """
+    Padidina lentelių kartos skaitiklius – kviečiama po kiekvieno įrašymo į šias lenteles.
+    Pasenę įrašai iš podėlio išmetami.
+    """
+    with _lock:
+        for t in tables:
+            _kartos[t] = _kartos.get(t, 0) + 1
+        for key in [k for k in _irasai if set(k[0]) & set(tables)]:
+            del _irasai[key]
+        for key in [k for k in _rodiniai if set(k[1]) & set(tables)]:
+            del _rodiniai[key]
+
+def sync(versions):
+    """
+    Palygina DB versijas (db.get_versions) su paskutinį kartą matytomis; pasikeitusių lentelių
+    įrašai podėlyje pasensta kaip po bump(). Grąžina pasikeitusių lentelių sąrašą.
+    """
+    with _lock:
+        changed = [t for t, v in versions.items() if _db_versijos.get(t) != v]
+        _db_versijos.update(versions)
+    if changed:
+        bump(*changed)
+    return changed
+
+def stats():
+    """
+    Grąžina podėlio statistiką stebėjimui: {lentelė(-ės): {"hits", "misses", "kartos"}}.
+    """
+    with _lock:
+        return {
+            t: {**s, "kartos": _generation(t.split("+"))}
+            for t, s in _statistika.items()
+        }
+
+def clear():
+    """
+    Išvalo visą podėlį ir statistiką (pvz., po duomenų importo ne per programą).
+    """
+    with _lock:
+        _irasai.clear()
+        _rodiniai.clear()
+        _statistika.clear()
+        for t in _kartos:
+            _kartos[t] += 1
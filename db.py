@@ -1,21 +1,124 @@
 import sqlite3
 import os
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time
 
-def connect():
+import sqlstats
+
+DB_FILE = "main.db"
+
+# Prisijungimo nustatymai, taikomi kiekvienam atidarytam prisijungimui.
+# WAL leidžia skaitytojams dirbti, kol kažkas rašo; synchronous=NORMAL WAL režime yra saugus
+# ir nebelaukia fsync kiekvieno commit metu. cache_size < 0 nurodomas KiB (čia ~64 MB),
+# mmap_size – baitais (256 MB). busy_timeout – kiek ms laukti užrakinto failo prieš klaidą.
+PRAGMOS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+]
+
+def _unicode_lower(tekstas):
+    """SQL funkcija unicode_lower(): SQLite lower() ir LIKE mažina tik ASCII raides (ne „Ž“, „Ė“)."""
+    return tekstas.lower() if isinstance(tekstas, str) else tekstas
+
+def _open(db_file=DB_FILE):
+    """
+    Atidaro naują SQLite prisijungimą, pritaiko PRAGMOS nustatymus ir užregistruoja
+    SQL funkciją unicode_lower() (sąrašų filtrams, žr. modules/grid.py).
+    Derinimo režimu (sqlstats.enabled()) prisijungimas registruoja užklausų skaičių ir trukmę.
+    """
+    factory = sqlstats.StatsConnection if sqlstats.enabled() else sqlite3.Connection
+    conn = sqlite3.connect(db_file, check_same_thread=False, factory=factory)
+    for pragma in PRAGMOS:
+        conn.execute(pragma)
+    conn.create_function("unicode_lower", 1, _unicode_lower, deterministic=True)
+    return conn
+
+def connect(db_file=DB_FILE):
     """
     Prisijungia prie SQLite duomenų bazės.
     Jeigu duomenų bazės failas neegzistuoja, sukuria jį ir visas reikiamas lenteles.
     Grąžina atidarytą prisijungimą ir kursorių.
+    Kiekviena Streamlit sesija turi savo prisijungimą (WAL režimu), todėl sesijos gali skaityti,
+    kol kita sesija įrašinėja.
     """
-    db_file = "main.db"
     db_exists = os.path.exists(db_file)
-    conn = sqlite3.connect(db_file, check_same_thread=False)
+    conn = _open(db_file)
     c = conn.cursor()
     if not db_exists:
         create_tables(c)
         conn.commit()
+    migrate(conn, c)
     return conn, c
 
+class ConnectionPool:
+    """
+    Skaitymo prisijungimų telkinys: reader() išduoda laisvą skaitymo prisijungimą
+    (arba atidaro naują, jei visi užimti). Įrašoma per sesijos prisijungimą (connect());
+    WAL režimu skaitytojai rašančiojo neblokuoja, o rašantieji vienas kito laukia busy_timeout.
+    """
+
+    def __init__(self, db_file=DB_FILE, size=4):
+        self.db_file = db_file
+        self._readers = queue.LifoQueue(maxsize=size)
+        # Schema sukuriama/migruojama per connect(), kol dar neatidarytas nė vienas skaitytojas
+        conn, c = connect(db_file)
+        c.close()
+        conn.close()
+
+    @contextmanager
+    def reader(self):
+        """
+        Skaitymo prisijungimas; baigus grąžinamas į telkinį.
+        """
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = _open(self.db_file)
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        """
+        Uždaro visus telkinio prisijungimus.
+        """
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+_pools = {}    # absoliutus DB failo kelias → ConnectionPool
+_pool_lock = threading.Lock()
+
+def get_pool(db_file=DB_FILE):
+    """
+    Grąžina bendrą (vieną procese) DB failo db_file prisijungimų telkinį; sukuria jį pirmo kvietimo metu.
+    Sesijos prisijungimo failas – database_file(conn).
+    """
+    kelias = os.path.abspath(db_file)
+    with _pool_lock:
+        if kelias not in _pools:
+            _pools[kelias] = ConnectionPool(kelias)
+        return _pools[kelias]
+
+def database_file(conn):
+    """
+    Prisijungimo pagrindinės duomenų bazės failo kelias (iš PRAGMA database_list).
+    """
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
 def create_tables(c):
     """
     Sukuria pagrindines lenteles duomenų bazėje, jeigu jų nėra.
@@ -100,6 +203,779 @@ def create_tables(c):
         )
     """)
 
+def _add_columns(c, table, columns):
+    """
+    Prideda lentelei trūkstamus stulpelius.
+    Naudojama tik migracijose, todėl PRAGMA table_info vykdomas vieną kartą, o ne kiekvieno atvaizdavimo metu.
+    """
+    existing = {r[1] for r in c.execute(f"PRAGMA table_info({table})").fetchall()}
+    for col, typ in columns.items():
+        if col not in existing:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {col} {typ}")
+
+def _migracija_1(c):
+    """
+    Stulpeliai ir lentelės, kuriuos anksčiau kiekvienas modulis tikrindavo savo show() pradžioje.
+    """
+    _add_columns(c, "kroviniai", {
+        'klientas': 'TEXT',
+        'uzsakymo_numeris': 'TEXT',
+        'pakrovimo_salis': 'TEXT',
+        'pakrovimo_regionas': 'TEXT',
+        'pakrovimo_miestas': 'TEXT',
+        'pakrovimo_adresas': 'TEXT',
+        'pakrovimo_data': 'TEXT',
+        'pakrovimo_laikas_nuo': 'TEXT',
+        'pakrovimo_laikas_iki': 'TEXT',
+        'iskrovimo_salis': 'TEXT',
+        'iskrovimo_regionas': 'TEXT',
+        'iskrovimo_miestas': 'TEXT',
+        'iskrovimo_adresas': 'TEXT',
+        'iskrovimo_data': 'TEXT',
+        'iskrovimo_laikas_nuo': 'TEXT',
+        'iskrovimo_laikas_iki': 'TEXT',
+        'vilkikas': 'TEXT',
+        'priekaba': 'TEXT',
+        'atsakingas_vadybininkas': 'TEXT',
+        'ekspedicijos_vadybininkas': 'TEXT',
+        'transporto_vadybininkas': 'TEXT',
+        'kilometrai': 'INTEGER',
+        'frachtas': 'REAL',
+        'svoris': 'INTEGER',
+        'paleciu_skaicius': 'INTEGER',
+        'saskaitos_busena': 'TEXT',
+        'busena': 'TEXT'
+    })
+    _add_columns(c, "vilkikai", {
+        "draudimas": "TEXT",
+        "pagaminimo_metai": "INTEGER",
+        "marke": "TEXT",
+        "tech_apziura": "TEXT",
+        "vadybininkas": "TEXT",
+        "vairuotojai": "TEXT",
+        "priekaba": "TEXT"
+    })
+    _add_columns(c, "klientai", {
+        'vat_numeris':          'TEXT',
+        'kontaktinis_asmuo':    'TEXT',
+        'kontaktinis_el_pastas':'TEXT',
+        'kontaktinis_tel':      'TEXT',
+        'salis':                'TEXT',
+        'regionas':             'TEXT',
+        'miestas':              'TEXT',
+        'adresas':              'TEXT',
+        'saskaitos_asmuo':      'TEXT',
+        'saskaitos_el_pastas':  'TEXT',
+        'saskaitos_tel':        'TEXT',
+        'coface_limitas':       'REAL',
+        'musu_limitas':         'REAL',
+        'likes_limitas':        'REAL',
+    })
+    _add_columns(c, "vilkiku_darbo_laikai", {
+        "pakrovimo_statusas":     "TEXT",
+        "pakrovimo_laikas":       "TEXT",
+        "pakrovimo_data":         "TEXT",
+        "iskrovimo_statusas":     "TEXT",
+        "iskrovimo_laikas":       "TEXT",
+        "iskrovimo_data":         "TEXT",
+        "komentaras":             "TEXT",
+        "sa":                     "TEXT",
+        "created_at":             "TEXT",
+        "ats_transporto_vadybininkas": "TEXT",
+        "ats_ekspedicijos_vadybininkas": "TEXT",
+        "trans_grupe":            "TEXT",
+        "eksp_grupe":             "TEXT",
+    })
+    _add_columns(c, "vairuotojai", {
+        "vardas": "TEXT",
+        "pavarde": "TEXT",
+        "gimimo_metai": "TEXT",
+        "tautybe": "TEXT",
+        "kadencijos_pabaiga": "TEXT",
+        "atostogu_pabaiga": "TEXT",
+    })
+    _add_columns(c, "priekabos", {
+        'priekabu_tipas': 'TEXT',
+        'numeris': 'TEXT',
+        'marke': 'TEXT',
+        'pagaminimo_metai': 'TEXT',
+        'tech_apziura': 'TEXT',
+        'draudimas': 'TEXT'
+    })
+    _add_columns(c, "darbuotojai", {"aktyvus": "INTEGER DEFAULT 1"})
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS grupes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numeris TEXT UNIQUE,
+            pavadinimas TEXT,
+            aprasymas TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS grupiu_regionai (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            grupe_id INTEGER NOT NULL,
+            regiono_kodas TEXT NOT NULL,
+            FOREIGN KEY (grupe_id) REFERENCES grupes(id)
+        )
+    """)
+
+def _migracija_2(c):
+    """
+    Stulpeliai, kuriuos moduliai naudoja, bet niekas anksčiau nepridėdavo
+    (naujai sukurtoje duomenų bazėje jų trūko).
+    """
+    _add_columns(c, "vilkiku_darbo_laikai", {"likes_laikas": "INTEGER"})
+    _add_columns(c, "klientai", {"pavadinimas": "TEXT"})
+    _add_columns(c, "vilkikai", {"numeris": "TEXT"})
+    _add_columns(c, "darbuotojai", {
+        "pareigybe": "TEXT",
+        "el_pastas": "TEXT",
+        "telefonas": "TEXT",
+        "grupe": "TEXT",
+    })
+    _add_columns(c, "grupes", {"numeris": "TEXT", "aprasymas": "TEXT"})
+    _add_columns(c, "lookup", {"kategorija": "TEXT", "reiksme": "TEXT"})
+    _add_columns(c, "vairuotojai", {"priskirtas_vilkikas": "TEXT"})
+
+# Antriniai indeksai dažniausiai naudojamoms užklausoms: pavadinimas → lentelė(stulpeliai).
+# Papildomi stulpeliai indekso gale leidžia užklausoms apsieiti be lentelės skaitymo (covering index).
+INDEKSAI = {
+    # nuo 9 migracijos – UNIQUE (vilkiko_numeris, data), žr. _migracija_9
+    "idx_vdl_vilkikas_data":        "vilkiku_darbo_laikai(vilkiko_numeris, data, id)",
+    "idx_kroviniai_vilkikas_pakr":  "kroviniai(vilkikas, pakrovimo_data)",
+    "idx_kroviniai_vilkikas_iskr":  "kroviniai(vilkikas, iskrovimo_data)",
+    "idx_kroviniai_iskr_data":      "kroviniai(iskrovimo_data)",
+    "idx_kroviniai_iskr_diena":     "kroviniai(date(iskrovimo_data))",
+    "idx_kroviniai_klientas_sask":  "kroviniai(klientas, saskaitos_busena, frachtas)",
+    "idx_klientai_vat":             "klientai(vat_numeris, pavadinimas)",
+    "idx_klientai_pavadinimas":     "klientai(pavadinimas, vat_numeris)",
+    "idx_vilkikai_priekaba":        "vilkikai(priekaba, numeris)",
+    "idx_vilkikai_numeris":         "vilkikai(numeris)",
+}
+
+def create_indexes(c):
+    """
+    Sukuria visus INDEKSAI žodyne aprašytus indeksus, kurių dar nėra.
+    """
+    for name, target in INDEKSAI.items():
+        c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+def _migracija_3(c):
+    """
+    Antriniai indeksai karštoms užklausoms (žr. INDEKSAI).
+    """
+    create_indexes(c)
+
+# Neapmokėtų krovinių suma pagal kliento VAT numerį (visiškas perskaičiavimas).
+# Ta pati taisyklė kaip anksčiau moduliuose: kroviniai jungiami su klientais pagal pavadinimą,
+# įskaitomi tik tie, kurių sąskaitos būsena ne 'Apmokėta'.
+NEAPMOKETA_PAGAL_VAT = """
+    SELECT cl.vat_numeris, COALESCE(SUM(k.frachtas), 0)
+    FROM kroviniai AS k
+    JOIN klientai AS cl ON k.klientas = cl.pavadinimas
+    WHERE cl.vat_numeris IS NOT NULL
+      AND k.saskaitos_busena != 'Apmokėta'
+    GROUP BY cl.vat_numeris
+"""
+
+# Krovinio įtaka žurnalui: jo frachtas pridedamas (arba atimamas) kiekvienam VAT,
+# kurio klientas turi tokį pavadinimą. {r} – NEW arba OLD, {zenklas} – "" arba "-".
+_SKOLOS_DELTA = """
+    INSERT INTO klientu_skolos (vat_numeris, neapmoketa)
+    SELECT vat_numeris, {zenklas}{r}.frachtas
+    FROM klientai
+    WHERE pavadinimas = {r}.klientas
+      AND vat_numeris IS NOT NULL
+      AND {r}.saskaitos_busena != 'Apmokėta'
+      AND {r}.frachtas IS NOT NULL
+    ON CONFLICT(vat_numeris) DO UPDATE SET neapmoketa = neapmoketa + excluded.neapmoketa;
+"""
+
+# Pasikeitus klientui (pavadinimas / VAT), jo VAT suma perskaičiuojama iš naujo.
+_SKOLOS_PERSKAICIUOTI = """
+    INSERT OR REPLACE INTO klientu_skolos (vat_numeris, neapmoketa)
+    SELECT {r}.vat_numeris, COALESCE((
+        SELECT SUM(k.frachtas)
+        FROM kroviniai AS k
+        JOIN klientai AS cl ON k.klientas = cl.pavadinimas
+        WHERE cl.vat_numeris = {r}.vat_numeris
+          AND k.saskaitos_busena != 'Apmokėta'
+    ), 0)
+    WHERE {r}.vat_numeris IS NOT NULL;
+"""
+
+def _migracija_4(c):
+    """
+    Kliento kredito limito žurnalas: lentelė 'klientu_skolos' (neapmokėta suma pagal VAT),
+    ją palaikantys trigeriai ir rodinys 'klientu_limitai' su mūsų limitu ir limito likučiu.
+    """
+    create_indexes(c)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS klientu_skolos (
+            vat_numeris TEXT PRIMARY KEY,
+            neapmoketa REAL NOT NULL DEFAULT 0
+        )
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_kroviniai_skolos_ins AFTER INSERT ON kroviniai
+        BEGIN {_SKOLOS_DELTA.format(r="NEW", zenklas="")} END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_kroviniai_skolos_del AFTER DELETE ON kroviniai
+        BEGIN {_SKOLOS_DELTA.format(r="OLD", zenklas="-")} END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_kroviniai_skolos_upd
+        AFTER UPDATE OF klientas, frachtas, saskaitos_busena ON kroviniai
+        BEGIN
+            {_SKOLOS_DELTA.format(r="OLD", zenklas="-")}
+            {_SKOLOS_DELTA.format(r="NEW", zenklas="")}
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_klientai_skolos_ins AFTER INSERT ON klientai
+        BEGIN {_SKOLOS_PERSKAICIUOTI.format(r="NEW")} END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_klientai_skolos_del AFTER DELETE ON klientai
+        BEGIN {_SKOLOS_PERSKAICIUOTI.format(r="OLD")} END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_klientai_skolos_upd
+        AFTER UPDATE OF pavadinimas, vat_numeris ON klientai
+        BEGIN
+            {_SKOLOS_PERSKAICIUOTI.format(r="OLD")}
+            {_SKOLOS_PERSKAICIUOTI.format(r="NEW")}
+        END
+    """)
+    c.execute("""
+        CREATE VIEW IF NOT EXISTS klientu_limitai AS
+        SELECT cl.id, cl.pavadinimas, cl.vat_numeris,
+               cl.coface_limitas / 3.0 AS musu_limitas,
+               MAX(cl.coface_limitas / 3.0 - COALESCE(s.neapmoketa, 0), 0) AS likes_limitas
+        FROM klientai AS cl
+        LEFT JOIN klientu_skolos AS s ON s.vat_numeris = cl.vat_numeris
+    """)
+    c.execute("DELETE FROM klientu_skolos")
+    c.execute(f"INSERT INTO klientu_skolos (vat_numeris, neapmoketa) {NEAPMOKETA_PAGAL_VAT}")
+
+# FTS5 paieškos (šešėlinės) lentelės sąrašų filtrams: pavadinimas → (lentelė, indeksuojami stulpeliai).
+# Naudojamas trigram tokenizatorius, todėl MATCH su fraze randa bet kokį ≥3 simbolių poeilutį.
+FTS_LENTELES = {
+    "kroviniai_fts": ("kroviniai", ["klientas", "uzsakymo_numeris", "vilkikas", "priekaba", "ekspedicijos_vadybininkas"]),
+    "klientai_fts":  ("klientai", ["pavadinimas", "vat_numeris", "salis", "regionas", "miestas"]),
+    "vilkikai_fts":  ("vilkikai", ["numeris", "marke", "vadybininkas", "vairuotojai", "priekaba"]),
+}
+
+def fts_available(c):
+    """
+    Patikrina, ar SQLite sukompiliuotas su FTS5 ir trigram tokenizatoriumi (SQLite ≥ 3.34).
+    """
+    try:
+        c.execute("CREATE VIRTUAL TABLE temp._fts_patikra USING fts5(x, tokenize='trigram')")
+        c.execute("DROP TABLE temp._fts_patikra")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def create_fts(c):
+    """
+    Sukuria FTS_LENTELES šešėlines lenteles (external content – tekstas nesaugomas antrą kartą),
+    jas sinchronizuojančius trigerius ir užpildo indeksą iš esamų duomenų.
+    """
+    for fts, (table, cols) in FTS_LENTELES.items():
+        col_list = ", ".join(cols)
+        new_vals = ", ".join(f"new.{col}" for col in cols)
+        old_vals = ", ".join(f"old.{col}" for col in cols)
+        c.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+            USING fts5({col_list}, content='{table}', content_rowid='id', tokenize='trigram')
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_ins AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals});
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_del AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals});
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_upd AFTER UPDATE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals});
+                INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals});
+            END
+        """)
+        c.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+def _migracija_5(c):
+    """
+    FTS5 paieškos lentelės krovinių, klientų ir vilkikų sąrašų filtrams.
+    Jei SQLite be FTS5, migracija nieko nedaro – filtrai veikia per LIKE.
+    """
+    if fts_available(c):
+        create_fts(c)
+
+def _migracija_6(c):
+    """
+    Indeksas DISPO lentelės iškrovimų paieškai pagal vilkiką ir iškrovimo datą.
+    """
+    create_indexes(c)
+
+# DISPO antraštės eilutės vilkikams, kurių numeriai grąžinami {vilkikai} subužklausos.
+# Jungimai tokie patys kaip anksčiau dispo.show; id stulpeliai saugomi tik eilutėms rikiuoti ta pačia tvarka.
+_SUVESTINE_SELECT = """
+    SELECT
+        v.id, t.id, tg.id, e.id, eg.id,
+        tg.numeris,
+        eg.numeris,
+        v.numeris,
+        e.vardas || ' ' || e.pavarde,
+        t.vardas || ' ' || t.pavarde,
+        v.priekaba,
+        {vair_sk}
+    FROM vilkikai v
+    LEFT JOIN darbuotojai t ON v.vadybininkas = t.vardas
+    LEFT JOIN grupes tg ON t.grupe = tg.pavadinimas
+    LEFT JOIN darbuotojai e ON v.vairuotojai LIKE '%' || e.vardas || '%'
+    LEFT JOIN grupes eg ON e.grupe = eg.pavadinimas
+"""
+
+# Vilkiko vairuotojų skaičius. Migracija 7 skaičiavo pagal 'vairuotojai.priskirtas_vilkikas',
+# kurio niekas nepildo; nuo migracijos 12 skaičiuojama pagal priskyrimus 'vilkiku_vairuotojai'.
+_VAIR_SK_7 = "(SELECT COUNT(*) FROM vairuotojai WHERE priskirtas_vilkikas = v.numeris)"
+_VAIR_SK = "(SELECT COUNT(*) FROM vilkiku_vairuotojai WHERE vilkiko_numeris = v.numeris)"
+
+_SUVESTINE_STULPELIAI = """
+    vilkiko_id, vadybininko_id, trans_grupes_id, ekspeditoriaus_id, eksp_grupes_id,
+    trans_grupe, eksp_grupe, numeris, ekspeditorius, vadybininkas, priekaba, vair_sk
+"""
+
+def _suvestine_atnaujinti(vilkikai, vair_sk):
+    """
+    Trigerio sakiniai, perskaičiuojantys 'vilkiku_suvestine' eilutes nurodytiems vilkikams.
+    """
+    return f"""
+        DELETE FROM vilkiku_suvestine WHERE numeris IN ({vilkikai});
+        INSERT INTO vilkiku_suvestine ({_SUVESTINE_STULPELIAI})
+        {_SUVESTINE_SELECT.format(vair_sk=vair_sk)} WHERE v.numeris IN ({vilkikai});
+    """
+
+def _suvestine_trigeriai(c, saltiniai, vair_sk):
+    """
+    'vilkiku_suvestine' trigeriai: saltiniai – lentelė → paveiktų vilkikų subužklausa ({r} – NEW arba OLD).
+    Po trigerių sukūrimo lentelė užpildoma iš naujo.
+    """
+    for table, vilkikai in saltiniai.items():
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_suvestine_ins AFTER INSERT ON {table}
+            BEGIN {_suvestine_atnaujinti(vilkikai.format(r="NEW"), vair_sk)} END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_suvestine_del AFTER DELETE ON {table}
+            BEGIN {_suvestine_atnaujinti(vilkikai.format(r="OLD"), vair_sk)} END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_suvestine_upd AFTER UPDATE ON {table}
+            BEGIN
+                {_suvestine_atnaujinti(vilkikai.format(r="OLD"), vair_sk)}
+                {_suvestine_atnaujinti(vilkikai.format(r="NEW"), vair_sk)}
+            END
+        """)
+
+    c.execute("DELETE FROM vilkiku_suvestine")
+    c.execute(f"INSERT INTO vilkiku_suvestine ({_SUVESTINE_STULPELIAI}) {_SUVESTINE_SELECT.format(vair_sk=vair_sk)}")
+
+# Vilkikai, kurių antraštę paveikia darbuotojas {r} (NEW/OLD) – kaip vadybininkas arba ekspeditorius
+_SUVESTINE_DARBUOTOJO_VILKIKAI = """
+    SELECT numeris FROM vilkikai
+    WHERE vadybininkas = {r}.vardas OR vairuotojai LIKE '%' || {r}.vardas || '%'
+"""
+
+# Vilkikai, kurių antraštę paveikia grupė {r} (per jos darbuotojus)
+_SUVESTINE_GRUPES_VILKIKAI = """
+    SELECT v.numeris FROM vilkikai v
+    JOIN darbuotojai d ON v.vadybininkas = d.vardas OR v.vairuotojai LIKE '%' || d.vardas || '%'
+    WHERE d.grupe = {r}.pavadinimas
+"""
+
+def _migracija_7(c):
+    """
+    Iš anksto apskaičiuota DISPO antraštės lentelė 'vilkiku_suvestine' (grupės, ekspeditorius,
+    vadybininkas, vairuotojų skaičius) ir ją palaikantys trigeriai ant vilkikai, darbuotojai,
+    grupes ir vairuotojai. Perskaičiuojamos tik paveiktų vilkikų eilutės.
+    """
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS vilkiku_suvestine (
+            vilkiko_id INTEGER,
+            vadybininko_id INTEGER,
+            trans_grupes_id INTEGER,
+            ekspeditoriaus_id INTEGER,
+            eksp_grupes_id INTEGER,
+            trans_grupe TEXT,
+            eksp_grupe TEXT,
+            numeris TEXT,
+            ekspeditorius TEXT,
+            vadybininkas TEXT,
+            priekaba TEXT,
+            vair_sk INTEGER
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_suvestine_numeris ON vilkiku_suvestine(numeris)")
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_suvestine_tvarka ON vilkiku_suvestine(
+            vilkiko_id, vadybininko_id, trans_grupes_id, ekspeditoriaus_id, eksp_grupes_id
+        )
+    """)
+
+    # Lentelė → paveiktų vilkikų subužklausa ({r} – NEW arba OLD)
+    _suvestine_trigeriai(c, {
+        "vilkikai":    "SELECT {r}.numeris",
+        "vairuotojai": "SELECT {r}.priskirtas_vilkikas",
+        "darbuotojai": _SUVESTINE_DARBUOTOJO_VILKIKAI,
+        "grupes":      _SUVESTINE_GRUPES_VILKIKAI,
+    }, _VAIR_SK_7)
+
+# Vilkiko vairuotojų tekstas "Vardas Pavardė, Vardas Pavardė" iš 'vilkiku_vairuotojai' (eilės tvarka)
+_VAIRUOTOJU_TEKSTAS = """
+    (SELECT COALESCE(group_concat(vairuotojas, ', '), '') FROM (
+        SELECT vairuotojas FROM vilkiku_vairuotojai WHERE vilkiko_numeris = {numeris} ORDER BY eile
+    ))
+"""
+
+def _atmesti_priskyrimai_lentele(c):
+    """
+    'vilkiku_vairuotojai_atmesti' – perkeliant priskyrimus (migracija 8) atmesti (vilkikas, vairuotojas)
+    įrašai: vairuotojas buvo įrašytas keliems vilkikams ir paliktas tik vilkikui priskirta_vilkikui.
+    """
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS vilkiku_vairuotojai_atmesti (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vilkiko_numeris TEXT,
+            vairuotojas TEXT,
+            priskirta_vilkikui TEXT,
+            atmesta TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+
+def _migracija_8(c):
+    """
+    Vilkikų ir vairuotojų priskyrimai perkeliami iš teksto 'vilkikai.vairuotojai' į lentelę
+    'vilkiku_vairuotojai': vairuotojas gali būti priskirtas tik vienam vilkikui, vilkiko
+    vietos (eile = 1, 2) – unikalios. Abu UNIQUE indeksai yra ir paieškos indeksai
+    („ar vairuotojas priskirtas“, „vilkiko X vairuotojai“).
+    'vilkikai.vairuotojai' lieka kaip rodymo kopija (sąrašai, FTS, DISPO suvestinė),
+    kurią iš lentelės atnaujina trigeriai.
+    """
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS vilkiku_vairuotojai (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vilkiko_numeris TEXT NOT NULL,
+            vairuotojas TEXT NOT NULL UNIQUE,
+            eile INTEGER NOT NULL,
+            UNIQUE (vilkiko_numeris, eile)
+        )
+    """)
+
+    _atmesti_priskyrimai_lentele(c)
+
+    # 1) Duomenų perkėlimas. Jei tas pats vairuotojas įrašytas keliems vilkikams,
+    #    lieka vėliausias (didžiausias id) – taip jį rodė ir vairuotojų sąrašas. Kitų vilkikų
+    #    vairuotojų eilės perskaičiuojamos be tarpų, o atmesti priskyrimai įrašomi į
+    #    'vilkiku_vairuotojai_atmesti' (rodo python db.py check).
+    sarasai = {}      # vilkikas → {vairuotojas: None} (įrašymo tvarka)
+    savininkas = {}   # vairuotojas → vėliausias vilkikas
+    for numeris, tekstas in c.execute(
+        "SELECT numeris, vairuotojai FROM vilkikai WHERE COALESCE(vairuotojai, '') != '' ORDER BY id"
+    ).fetchall():
+        for vardas in (v.strip() for v in tekstas.split(",")):
+            if vardas:
+                sarasai.setdefault(numeris, {})[vardas] = None
+                savininkas[vardas] = numeris
+    for numeris, vardai in sarasai.items():
+        palikti = [v for v in vardai if savininkas[v] == numeris]
+        c.executemany(
+            "INSERT INTO vilkiku_vairuotojai (vilkiko_numeris, vairuotojas, eile) VALUES (?, ?, ?)",
+            [(numeris, vardas, eile) for eile, vardas in enumerate(palikti, start=1)]
+        )
+        c.executemany(
+            "INSERT INTO vilkiku_vairuotojai_atmesti (vilkiko_numeris, vairuotojas, priskirta_vilkikui) "
+            "VALUES (?, ?, ?)",
+            [(numeris, vardas, savininkas[vardas]) for vardas in vardai if savininkas[vardas] != numeris]
+        )
+
+    # 2) Trigeriai: pasikeitus priskyrimams perrašomas vilkiko tekstas; ištrynus vilkiką – jo priskyrimai
+    for veiksmas, eilutes in (("INSERT", ["NEW"]), ("DELETE", ["OLD"]), ("UPDATE", ["OLD", "NEW"])):
+        atnaujinimai = "".join(
+            f"UPDATE vilkikai SET vairuotojai = {_VAIRUOTOJU_TEKSTAS.format(numeris=f'{r}.vilkiko_numeris')} "
+            f"WHERE numeris = {r}.vilkiko_numeris;"
+            for r in eilutes
+        )
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_vilkiku_vairuotojai_{veiksmas[:3].lower()}
+            AFTER {veiksmas} ON vilkiku_vairuotojai
+            BEGIN {atnaujinimai} END
+        """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_vilkikai_vairuotojai_del AFTER DELETE ON vilkikai
+        WHEN NOT EXISTS (SELECT 1 FROM vilkikai WHERE numeris = OLD.numeris)
+        BEGIN
+            DELETE FROM vilkiku_vairuotojai WHERE vilkiko_numeris = OLD.numeris;
+        END
+    """)
+
+    # 3) Tekstas suvienodinamas su lentele (pašalinti pasikartojimai, tarpai)
+    tekstas = _VAIRUOTOJU_TEKSTAS.format(numeris="vilkikai.numeris")
+    c.execute(f"UPDATE vilkikai SET vairuotojai = {tekstas} WHERE COALESCE(vairuotojai, '') != {tekstas}")
+
+def _migracija_9(c):
+    """
+    'vilkiku_darbo_laikai' – vienas įrašas kiekvienai (vilkikas, data) porai: UNIQUE indeksas
+    (vilkiko_numeris, data), įrašoma per INSERT ... ON CONFLICT DO UPDATE, skaitoma be MAX(id).
+    Pasikartojantys įrašai sutraukiami iki vėliausio (didžiausias id – jį rodė ir skaitytojai),
+    senesnės versijos perkeliamos į tik papildomą lentelę 'vilkiku_darbo_laiku_istorija'.
+    Toliau trigeriai į ją įrašo kiekvieno atnaujinto ar ištrinto įrašo ankstesnę versiją.
+    """
+    stulpeliai = [
+        (r[1], r[2]) for r in c.execute("PRAGMA table_info(vilkiku_darbo_laikai)").fetchall() if r[1] != "id"
+    ]
+    vardai = ", ".join(v for v, _ in stulpeliai)
+    c.execute(f"""
+        CREATE TABLE IF NOT EXISTS vilkiku_darbo_laiku_istorija (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            darbo_laiko_id INTEGER,
+            {", ".join(f"{v} {t}" for v, t in stulpeliai)},
+            pakeista TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_vdl_istorija_vilkikas_data
+        ON vilkiku_darbo_laiku_istorija(vilkiko_numeris, data, id)
+    """)
+    for veiksmas in ("UPDATE", "DELETE"):
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_vilkiku_darbo_laiku_istorija_{veiksmas[:3].lower()}
+            BEFORE {veiksmas} ON vilkiku_darbo_laiku_istorija
+            BEGIN SELECT RAISE(ABORT, 'vilkiku_darbo_laiku_istorija: įrašai nekeičiami'); END
+        """)
+
+    # 1) Senesnės tos pačios (vilkikas, data) poros versijos → istorija; lentelėje lieka vėliausia
+    vyresnis = """
+        id < (SELECT MAX(id) FROM vilkiku_darbo_laikai AS n
+              WHERE n.vilkiko_numeris = vilkiku_darbo_laikai.vilkiko_numeris
+                AND n.data = vilkiku_darbo_laikai.data)
+    """
+    c.execute(f"""
+        INSERT INTO vilkiku_darbo_laiku_istorija (darbo_laiko_id, {vardai})
+        SELECT id, {vardai} FROM vilkiku_darbo_laikai WHERE {vyresnis} ORDER BY id
+    """)
+    c.execute(f"DELETE FROM vilkiku_darbo_laikai WHERE {vyresnis}")
+
+    # 2) Unikalus raktas (tas pats indekso vardas; rowid indekse yra ir be id stulpelio)
+    c.execute("DROP INDEX IF EXISTS idx_vdl_vilkikas_data")
+    c.execute("CREATE UNIQUE INDEX idx_vdl_vilkikas_data ON vilkiku_darbo_laikai(vilkiko_numeris, data)")
+
+    # 3) Trigeriai: atnaujinto / ištrinto įrašo ankstesnė versija → istorija
+    senos = ", ".join(f"OLD.{v}" for v, _ in stulpeliai)
+    for veiksmas in ("UPDATE", "DELETE"):
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_vilkiku_darbo_laikai_istorija_{veiksmas[:3].lower()}
+            AFTER {veiksmas} ON vilkiku_darbo_laikai
+            BEGIN
+                INSERT INTO vilkiku_darbo_laiku_istorija (darbo_laiko_id, {vardai})
+                VALUES (OLD.id, {senos});
+            END
+        """)
+
+# Migracijos 10 įvykio laikas žurnale: įrašo created_at, o jei jo nėra – dabar. Jau esamoms versijoms
+# tai geriausias žinomas laikas; naujiems įvykiams nuo migracijos 13 – išsaugojimo momentas (_DABAR).
+# datetime() suvienodina „YYYY-MM-DDTHH:MM:SS.ffffff“ ir „YYYY-MM-DD HH:MM:SS“ formatus palyginimui.
+_IVYKIO_LAIKAS = "COALESCE(datetime({r}.created_at), datetime('now', 'localtime'))"
+
+# Dabartinis laikas su milisekundėmis: to paties vilkiko įvykiai tos pačios sekundės ribose išlieka tvarkingi
+_DABAR = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+
+def _zurnalo_trigeriai(c, stulpeliai, laikas):
+    """
+    'vilkiku_darbo_laikai' trigeriai, registruojantys žurnale naują versiją (INSERT, UPDATE) su įvykio
+    laiku 'laikas' (SQL išraiška) arba ištrynimą (istrinta = 1, dabartiniu laiku).
+    """
+    vardai = ", ".join(stulpeliai)
+    for veiksmas, r, ivykio_laikas, istrinta in (
+        ("INSERT", "NEW", laikas, 0),
+        ("UPDATE", "NEW", laikas, 0),
+        ("DELETE", "OLD", _DABAR, 1),
+    ):
+        reiksmes = ", ".join(f"{r}.{v}" for v in stulpeliai)
+        c.execute(f"DROP TRIGGER IF EXISTS trg_vilkiku_darbo_laikai_istorija_{veiksmas[:3].lower()}")
+        c.execute(f"""
+            CREATE TRIGGER trg_vilkiku_darbo_laikai_istorija_{veiksmas[:3].lower()}
+            AFTER {veiksmas} ON vilkiku_darbo_laikai
+            BEGIN
+                INSERT INTO vilkiku_darbo_laiku_istorija (darbo_laiko_id, {vardai}, laikas, istrinta)
+                VALUES ({r}.id, {reiksmes}, {ivykio_laikas}, {istrinta});
+            END
+        """)
+
+def _migracija_10(c):
+    """
+    'vilkiku_darbo_laiku_istorija' tampa įvykių žurnalu: kiekviena išsaugota versija (ne tik pakeistoji)
+    įrašoma su įvykio laiku 'laikas', ištrynimas – su istrinta = 1. 'vilkiku_darbo_laikai' lieka
+    dabartinė būsena (vienas įrašas porai), o praeities būsenos ir pakeitimai skaitomi tik iš žurnalo
+    (truck_state_as_of, changes_between), todėl karštasis kelias nelėtėja.
+    """
+    _add_columns(c, "vilkiku_darbo_laiku_istorija", {
+        "laikas": "TEXT",
+        "istrinta": "INTEGER NOT NULL DEFAULT 0",
+    })
+    stulpeliai = [
+        r[1] for r in c.execute("PRAGMA table_info(vilkiku_darbo_laikai)").fetchall() if r[1] != "id"
+    ]
+    vardai = ", ".join(stulpeliai)
+
+    # 1) Jau esamos (ankstesnės) versijos: įvykio laikas – jų created_at, jei jo nėra – perkėlimo laikas.
+    #    Žurnalas tik papildomas, todėl draudžiantis trigeris šiam atnaujinimui laikinai išjungiamas.
+    c.execute("DROP TRIGGER IF EXISTS trg_vilkiku_darbo_laiku_istorija_upd")
+    c.execute("UPDATE vilkiku_darbo_laiku_istorija SET laikas = COALESCE(datetime(created_at), pakeista)")
+    c.execute("""
+        CREATE TRIGGER trg_vilkiku_darbo_laiku_istorija_upd
+        BEFORE UPDATE ON vilkiku_darbo_laiku_istorija
+        BEGIN SELECT RAISE(ABORT, 'vilkiku_darbo_laiku_istorija: įrašai nekeičiami'); END
+    """)
+
+    # 2) Dabartinės versijos – į žurnalą, kad jame būtų visos versijos
+    c.execute(f"""
+        INSERT INTO vilkiku_darbo_laiku_istorija (darbo_laiko_id, {vardai}, laikas)
+        SELECT id, {vardai}, {_IVYKIO_LAIKAS.format(r="vilkiku_darbo_laikai")}
+        FROM vilkiku_darbo_laikai ORDER BY id
+    """)
+
+    # 3) Trigeriai: žurnale registruojama nauja versija (INSERT, UPDATE) arba ištrynimas
+    _zurnalo_trigeriai(c, stulpeliai, _IVYKIO_LAIKAS.format(r="NEW"))
+
+    # 4) Indeksai užklausoms „vilkiko būsena laiko momentu“ ir „pakeitimai intervale“
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_vdl_istorija_vilkikas_laikas
+        ON vilkiku_darbo_laiku_istorija(vilkiko_numeris, laikas)
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_vdl_istorija_laikas ON vilkiku_darbo_laiku_istorija(laikas)")
+
+# Lentelės, kurių pakeitimus skaičiuoja 'duomenu_versijos' (žr. get_versions)
+VERSIJUOJAMOS_LENTELES = [
+    "kroviniai", "vilkikai", "priekabos", "vairuotojai", "klientai", "darbuotojai",
+    "grupes", "lookup", "vilkiku_darbo_laikai", "klientu_skolos",
+]
+
+def _migracija_11(c):
+    """
+    Duomenų versijos: lentelė 'duomenu_versijos' (lentelė → versija) ir trigeriai, kurie po kiekvieno
+    INSERT/UPDATE/DELETE padidina lentelės versiją. Versijos keičiasi ir po kitų procesų įrašymų,
+    todėl podėliai (cache.sync) pagal jas nustato, ar duomenys pasikeitė.
+    """
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS duomenu_versijos (
+            lentele TEXT PRIMARY KEY,
+            versija INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    for table in VERSIJUOJAMOS_LENTELES:
+        c.execute("INSERT OR IGNORE INTO duomenu_versijos (lentele) VALUES (?)", (table,))
+        for veiksmas in ("INSERT", "UPDATE", "DELETE"):
+            c.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_versija_{veiksmas[:3].lower()}
+                AFTER {veiksmas} ON {table}
+                BEGIN
+                    UPDATE duomenu_versijos SET versija = versija + 1 WHERE lentele = '{table}';
+                END
+            """)
+
+def _migracija_12(c):
+    """
+    DISPO suvestinės vairuotojų skaičius skaičiuojamas pagal 'vilkiku_vairuotojai' (migracija 8),
+    o ne pagal niekur nepildomą 'vairuotojai.priskirtas_vilkikas'. Trigeriai ant 'vairuotojai'
+    pakeičiami trigeriais ant 'vilkiku_vairuotojai'; kitų lentelių trigeriai sukuriami iš naujo
+    su nauju skaičiavimu, suvestinė perskaičiuojama.
+    """
+    for table in ("vilkikai", "vairuotojai", "darbuotojai", "grupes"):
+        for veiksmas in ("ins", "del", "upd"):
+            c.execute(f"DROP TRIGGER IF EXISTS trg_{table}_suvestine_{veiksmas}")
+    _suvestine_trigeriai(c, {
+        "vilkikai":            "SELECT {r}.numeris",
+        "vilkiku_vairuotojai": "SELECT {r}.vilkiko_numeris",
+        "darbuotojai":         _SUVESTINE_DARBUOTOJO_VILKIKAI,
+        "grupes":              _SUVESTINE_GRUPES_VILKIKAI,
+    }, _VAIR_SK)
+
+def _migracija_13(c):
+    """
+    Darbo laikų žurnalo įvykio laikas – išsaugojimo momentas (su milisekundėmis), o ne įrašo created_at:
+    created_at lieka pirmojo įrašymo laiku, todėl vėlesni atnaujinimai žurnale atsidurdavo praeityje.
+    created_at toliau saugomas kaip atskiras stulpelis.
+    """
+    stulpeliai = [
+        r[1] for r in c.execute("PRAGMA table_info(vilkiku_darbo_laikai)").fetchall() if r[1] != "id"
+    ]
+    _zurnalo_trigeriai(c, stulpeliai, _DABAR)
+
+def _migracija_14(c):
+    """
+    Ankstesnė migracijos 8 versija, radusi tą patį vairuotoją keliuose vilkikuose, ankstesniame
+    vilkike palikdavo tarpą eilėse (pvz., tik eile = 2 be eile = 1). Eilės perskaičiuojamos be
+    tarpų; atmestų priskyrimų lentelė sukuriama (anksčiau atmesti įrašai neišsaugoti).
+    """
+    _atmesti_priskyrimai_lentele(c)
+    for (numeris,) in c.execute("""
+        SELECT vilkiko_numeris FROM vilkiku_vairuotojai
+        GROUP BY vilkiko_numeris HAVING MAX(eile) != COUNT(*)
+    """).fetchall():
+        ids = [r[0] for r in c.execute(
+            "SELECT id FROM vilkiku_vairuotojai WHERE vilkiko_numeris = ? ORDER BY eile", (numeris,)
+        ).fetchall()]
+        # Pirma neigiamos eilės, kad perskaičiuojant nepažeistų UNIQUE (vilkiko_numeris, eile)
+        c.executemany("UPDATE vilkiku_vairuotojai SET eile = -eile WHERE id = ?", [(i,) for i in ids])
+        c.executemany(
+            "UPDATE vilkiku_vairuotojai SET eile = ? WHERE id = ?",
+            [(eile, i) for eile, i in enumerate(ids, start=1)]
+        )
+
+# Migracijų sąrašas: i-toji migracija perkelia schemą iš versijos i-1 į i.
+# Naujas migracijas pridėti tik sąrašo gale – jau pritaikytos nebekeičiamos.
+MIGRACIJOS = [
+    _migracija_1,
+    _migracija_2,
+    _migracija_3,
+    _migracija_4,
+    _migracija_5,
+    _migracija_6,
+    _migracija_7,
+    _migracija_8,
+    _migracija_9,
+    _migracija_10,
+    _migracija_11,
+    _migracija_12,
+    _migracija_13,
+    _migracija_14,
+]
+
+def migrate(conn, c):
+    """
+    Atnaujina duomenų bazės schemą iki naujausios versijos.
+    Dabartinė versija saugoma PRAGMA user_version; vykdomos tik dar nepritaikytos migracijos,
+    kiekviena savo transakcijoje kartu su naujos versijos įrašu.
+    """
+    version = c.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRACIJOS[version:], start=version + 1):
+        try:
+            c.execute("BEGIN")
+            migration(c)
+            c.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
 def close(conn, c):
     """
     Uždaro duomenų bazės kursorių ir prisijungimą.
@@ -147,3 +1023,203 @@ def fetch_one(conn, c, query: str, params=()):
     """
     c.execute(query, params)
     return c.fetchone()
+
+def get_versions(conn):
+    """
+    Visų versijuojamų lentelių (VERSIJUOJAMOS_LENTELES) versijos viena užklausa: {lentelė: versija}.
+    Versija didėja po kiekvieno lentelės eilutės pakeitimo (trigeriai), nesvarbu, kuris procesas rašė.
+    """
+    return dict(conn.execute("SELECT lentele, versija FROM duomenu_versijos").fetchall())
+
+def _laikas(t):
+    """
+    Laiko momentas žurnalo palyginimui → „YYYY-MM-DD HH:MM:SS.sss“ (kaip stulpelyje 'laikas').
+    t – datetime, date (dienos pradžia) arba ISO tekstas („2026-03-01T12:00“, „2026-03-01 12:00:00“, „2026-03-01“).
+    """
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t)
+    elif not isinstance(t, datetime):
+        t = datetime.combine(t, time())
+    return t.isoformat(sep=" ", timespec="milliseconds")
+
+def _dict_rows(c):
+    columns = [d[0] for d in c.description]
+    return [dict(zip(columns, row)) for row in c.fetchall()]
+
+# Žurnalo užklausos (jų planus tikrina ir check_query_plans, žr. KARSTOS_UZKLAUSOS)
+BUSENA_LAIKU_UZKLAUSA = """
+    SELECT * FROM (
+        SELECT h.*, ROW_NUMBER() OVER (PARTITION BY data ORDER BY laikas DESC, id DESC) AS nr
+        FROM vilkiku_darbo_laiku_istorija AS h
+        WHERE vilkiko_numeris = ? AND laikas <= ?
+    )
+    WHERE nr = 1 AND istrinta = 0
+    ORDER BY data
+"""
+PAKEITIMU_UZKLAUSA = "SELECT * FROM vilkiku_darbo_laiku_istorija WHERE laikas >= ? AND laikas < ?"
+
+def truck_state_as_of(conn, c, vilkikas, laikas):
+    """
+    Vilkiko darbo laikų būsena laiko momentu 'laikas' iš žurnalo 'vilkiku_darbo_laiku_istorija':
+    kiekvienai datai – paskutinė iki to momento išsaugota versija (ištrintos neįtraukiamos).
+    Grąžina žodynų sąrašą pagal datą.
+    """
+    c.execute(BUSENA_LAIKU_UZKLAUSA, (vilkikas, _laikas(laikas)))
+    rows = _dict_rows(c)
+    for row in rows:
+        del row["nr"]
+    return rows
+
+def changes_between(conn, c, nuo, iki, vilkikas=None):
+    """
+    Visi žurnalo įvykiai intervale [nuo, iki) (neprivaloma – tik vieno vilkiko), laiko tvarka.
+    Grąžina žodynų sąrašą; istrinta = 1 žymi ištrynimą.
+    """
+    query = PAKEITIMU_UZKLAUSA
+    params = [_laikas(nuo), _laikas(iki)]
+    if vilkikas is not None:
+        query += " AND vilkiko_numeris = ?"
+        params.append(vilkikas)
+    c.execute(query + " ORDER BY laikas, id", params)
+    return _dict_rows(c)
+
+# Dažniausiai vykdomos užklausos (su pavyzdiniais parametrais), kurios privalo naudoti indeksus
+KARSTOS_UZKLAUSOS = {
+    "darbo laikas (vilkikas, data)": (
+        """SELECT pakrovimo_statusas, iskrovimo_statusas FROM vilkiku_darbo_laikai
+           WHERE vilkiko_numeris = ? AND data = ?""",
+        ("", ""),
+    ),
+    "darbo laikai vilkikams intervale": (
+        """SELECT pakrovimo_statusas, iskrovimo_statusas FROM vilkiku_darbo_laikai
+           WHERE vilkiko_numeris IN (?, ?) AND data BETWEEN ? AND ?""",
+        ("", "", "", ""),
+    ),
+    "darbo laiko istorija (vilkikas, data)": (
+        """SELECT pakrovimo_statusas, iskrovimo_statusas FROM vilkiku_darbo_laiku_istorija
+           WHERE vilkiko_numeris = ? AND data = ? ORDER BY id""",
+        ("", ""),
+    ),
+    "vilkiko būsena laiko momentu": (BUSENA_LAIKU_UZKLAUSA, ("", "")),
+    "darbo laikų pakeitimai intervale": (PAKEITIMU_UZKLAUSA + " ORDER BY laikas, id", ("", "")),
+    "vilkikų kroviniai nuo datos": (
+        """SELECT id FROM kroviniai WHERE vilkikas IN (?, ?) AND pakrovimo_data >= ?
+           ORDER BY vilkikas, pakrovimo_data""",
+        ("", "", ""),
+    ),
+    "DISPO iškrovimai intervale": (
+        """SELECT id FROM kroviniai WHERE vilkikas IN (?, ?) AND iskrovimo_data >= ? AND iskrovimo_data < ?""",
+        ("", "", "", ""),
+    ),
+    "persidengiantys kroviniai": (
+        """SELECT COUNT(*) FROM kroviniai
+           WHERE vilkikas = ? AND id != ? AND (? < iskrovimo_data) AND (pakrovimo_data < ?)""",
+        ("", 0, "", ""),
+    ),
+    "planavimo iškrovimai": (
+        """SELECT vilkikas FROM kroviniai
+           WHERE date(iskrovimo_data) BETWEEN ? AND ? AND iskrovimo_data IS NOT NULL""",
+        ("", ""),
+    ),
+    "neapmokėta suma pagal VAT": (
+        """SELECT SUM(k.frachtas) FROM kroviniai AS k
+           JOIN klientai AS cl ON k.klientas = cl.pavadinimas
+           WHERE cl.vat_numeris = ? AND k.saskaitos_busena != 'Apmokėta'""",
+        ("",),
+    ),
+    "vilkikas pagal priekabą": (
+        "SELECT numeris FROM vilkikai WHERE priekaba = ?",
+        ("",),
+    ),
+    "ar vairuotojas priskirtas": (
+        "SELECT vilkiko_numeris FROM vilkiku_vairuotojai WHERE vairuotojas = ?",
+        ("",),
+    ),
+    "vilkiko vairuotojai": (
+        "SELECT vairuotojas FROM vilkiku_vairuotojai WHERE vilkiko_numeris = ? ORDER BY eile",
+        ("",),
+    ),
+    "vilkiko duomenys pagal numerį": (
+        "SELECT priekaba, vadybininkas FROM vilkikai WHERE numeris = ?",
+        ("",),
+    ),
+}
+
+def dropped_driver_assignments(conn, c):
+    """
+    Perkeliant priskyrimus (migracija 8) atmesti (vilkikas, vairuotojas, kuriam vilkikui paliktas) įrašai.
+    """
+    return c.execute("""
+        SELECT vilkiko_numeris, vairuotojas, priskirta_vilkikui
+        FROM vilkiku_vairuotojai_atmesti ORDER BY id
+    """).fetchall()
+
+def check_query_plans(conn, c):
+    """
+    Patikrina KARSTOS_UZKLAUSOS planus per EXPLAIN QUERY PLAN.
+    Jei bent vienos užklausos plane lentelė skaitoma ištisai (SCAN), iškeliama RuntimeError.
+    Subužklausų/CTE rezultatų skaitymas (SCAN (subquery-N)) klaida nelaikomas.
+    """
+    problems = []
+    for name, (query, params) in KARSTOS_UZKLAUSOS.items():
+        for row in c.execute("EXPLAIN QUERY PLAN " + query, params).fetchall():
+            detail = row[3]
+            if detail.startswith("SCAN") and not detail.startswith("SCAN (") and "CONSTANT ROW" not in detail:
+                problems.append(f"{name}: {detail}")
+    if problems:
+        raise RuntimeError("Užklausos be indekso:\n" + "\n".join(problems))
+
+def reconcile(conn, c, fix=False):
+    """
+    Palygina kliento skolų žurnalą 'klientu_skolos' su visišku perskaičiavimu (NEAPMOKETA_PAGAL_VAT).
+    Grąžina neatitikimų sąrašą [(vat_numeris, žurnale, perskaičiuota), ...].
+    Jei fix=True, žurnalas perrašomas perskaičiuotomis reikšmėmis.
+    """
+    zurnalas = dict(c.execute("SELECT vat_numeris, neapmoketa FROM klientu_skolos").fetchall())
+    tikra = dict(c.execute(NEAPMOKETA_PAGAL_VAT).fetchall())
+    neatitikimai = []
+    for vat in sorted(set(zurnalas) | set(tikra)):
+        z = zurnalas.get(vat, 0.0)
+        t = tikra.get(vat, 0.0)
+        # Slankiojo kablelio paklaidos po daugelio pridėjimų/atėmimų neatitikimu nelaikomos
+        if abs(z - t) > 0.005:
+            neatitikimai.append((vat, z, t))
+    if fix and neatitikimai:
+        c.executemany(
+            "INSERT OR REPLACE INTO klientu_skolos (vat_numeris, neapmoketa) VALUES (?, ?)",
+            [(vat, t) for vat, _, t in neatitikimai]
+        )
+        conn.commit()
+    return neatitikimai
+
+if __name__ == "__main__":
+    # python db.py check – patikrina, ar karštos užklausos naudoja indeksus, ir parodo atmestus vairuotojų priskyrimus
+    # python db.py reconcile [--fix] – patikrina (ir pataiso) klientų skolų žurnalą
+    # python db.py history VILKIKAS [LAIKAS] – vilkiko darbo laikų būsena laiko momentu (numatyta – dabar)
+    import sys
+    if sys.argv[1:] == ["check"]:
+        conn, c = connect()
+        check_query_plans(conn, c)
+        print("Visos karštos užklausos naudoja indeksus.")
+        for vilkikas, vairuotojas, kitas in dropped_driver_assignments(conn, c):
+            print(f"Perkeliant priskyrimus atmesta: {vilkikas} – {vairuotojas} (paliktas vilkikui {kitas})")
+        close(conn, c)
+    elif sys.argv[1:2] == ["reconcile"]:
+        conn, c = connect()
+        fix = "--fix" in sys.argv[2:]
+        neatitikimai = reconcile(conn, c, fix=fix)
+        for vat, z, t in neatitikimai:
+            print(f"{vat}: žurnale {z:.2f}, perskaičiuota {t:.2f}")
+        if not neatitikimai:
+            print("Klientų skolų žurnalas sutampa su perskaičiavimu.")
+        elif fix:
+            print(f"Pataisyta VAT numerių: {len(neatitikimai)}.")
+        close(conn, c)
+        sys.exit(1 if neatitikimai and not fix else 0)
+    elif sys.argv[1:2] == ["history"] and len(sys.argv) in (3, 4):
+        conn, c = connect()
+        laikas = sys.argv[3] if len(sys.argv) == 4 else datetime.now().replace(microsecond=0)
+        for row in truck_state_as_of(conn, c, sys.argv[2], laikas):
+            print(f"{row['data']}: {row['pakrovimo_statusas'] or '-'} / {row['iskrovimo_statusas'] or '-'} "
+                  f"(išsaugota {row['laikas']}) {row['komentaras'] or ''}")
+        close(conn, c)
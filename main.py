@@ -1,5 +1,12 @@
+import importlib
+
+import streamlit as st
+
 # 3) Initialise the DB – tables are created inside connect()
-from db import connect
+from db import connect, get_versions
+import cache
+import profiler
+import sqlstats
 
 # Maintain DB connection across Streamlit reruns
 if "db_conn" not in st.session_state or "db_cursor" not in st.session_state:
@@ -8,31 +15,31 @@ if "db_conn" not in st.session_state or "db_cursor" not in st.session_state:
 conn = st.session_state.db_conn
 c = st.session_state.db_cursor
 
-# 4) Import all modules (modular structure: all module files in one folder)
-from modules import (
-    kroviniai,
-    vilkikai,
-    priekabos,
-    grupes,
-    vairuotojai,
-    klientai,
-    darbuotojai,
-    planavimas,
-    update
-)
+# Shared caches (cache.py) drop results whose tables changed since the last rerun,
+# including writes from other sessions or processes (versions kept by db triggers)
+cache.sync(get_versions(conn))
+
+# 4) Module registry: menu title → module in the modules/ folder.
+#    A module is imported only when its tab is first selected; the loaded module is kept
+#    across reruns and sessions (main.py itself is re-executed on every rerun)
+MODULIAI = {
+    "Cargo": "kroviniai",
+    "Trucks": "vilkikai",
+    "Trailers": "priekabos",
+    "Groups": "grupes",
+    "Drivers": "vairuotojai",
+    "Clients": "klientai",
+    "Employees": "darbuotojai",
+    "Planning": "planavimas",
+    "Update": "update",
+}
+
+@st.cache_resource(show_spinner=False)
+def load_module(name):
+    return importlib.import_module(f"modules.{name}")
 
 # 5) Horizontal menu (module titles)
-modules_list = [
-    "Cargo",
-    "Trucks",
-    "Trailers",
-    "Groups",
-    "Drivers",
-    "Clients",
-    "Employees",
-    "Planning",
-    "Update"
-]
+modules_list = list(MODULIAI)
 
 if "selected_module" not in st.session_state:
     st.session_state.selected_module = modules_list[0]
@@ -44,3 +51,16 @@ selected = st.radio(
     key="selected_module",
     label_visibility="collapsed",
 )
+
+# 6) Load and show only the selected module (page styles first, if the module has them).
+#    With DISPO_SQL_STATS=1 the render's queries are counted and shown in the sidebar (see sqlstats.py),
+#    with DISPO_PROFILE=1 show() is profiled by phase (see profiler.py)
+module = load_module(MODULIAI[selected])
+if hasattr(module, "render_styles"):
+    module.render_styles()
+with profiler.profile(MODULIAI[selected]) as prof, sqlstats.render(MODULIAI[selected]) as sql_render:
+    module.show(conn, c)
+if sqlstats.enabled():
+    sqlstats.show_sidebar(sql_render)
+if prof is not None:
+    profiler.show_sidebar(prof)
@@ -1,6 +1,16 @@
 import streamlit as st
 import pandas as pd
 
+import cache
+from modules.grid import show_grid
+
+# Darbuotojų sąrašo užklausa (aktyvumas rodomas kaip „Taip“ / „Ne“)
+SARASO_UZKLAUSA = """
+    SELECT id, vardas, pavarde, pareigybe, el_pastas, telefonas, grupe,
+           CASE WHEN aktyvus = 1 THEN 'Taip' ELSE 'Ne' END AS aktyvus
+    FROM darbuotojai
+"""
+
 def show(conn, c):
     """
     Pagrindinė darbuotojų valdymo funkcija. Leidžia:
@@ -9,13 +19,6 @@ def show(conn, c):
     - Saugo visus pakeitimus į duomenų bazę.
     Viskas vyksta Streamlit aplikacijos lange.
     """
-    # Užtikrinti, kad egzistuotų stulpelis „aktyvus“ darbuotojų lentelėje
-    c.execute("PRAGMA table_info(darbuotojai)")
-    cols = {row[1] for row in c.fetchall()}
-    if 'aktyvus' not in cols:
-        c.execute("ALTER TABLE darbuotojai ADD COLUMN aktyvus INTEGER DEFAULT 1")
-        conn.commit()
-
     # Callback’ai būsenos valdymui
     def clear_selection():
         """Išvalo pasirinktą darbuotoją iš session_state."""
@@ -40,46 +43,16 @@ def show(conn, c):
 
     # 1. SĄRAŠO rodinys su filtravimu
     if st.session_state.selected_emp is None:
-        # Užklausiam visų darbuotojų su visais stulpeliais
-        df = pd.read_sql(
-            "SELECT id, vardas, pavarde, pareigybe, el_pastas, telefonas, grupe, aktyvus FROM darbuotojai",
-            conn
-        )
-
-        if df.empty:
+        if not c.execute("SELECT 1 FROM darbuotojai LIMIT 1").fetchone():
             st.info("ℹ️ Nėra darbuotojų.")
             return
 
-        # Paruošiame rodymui: None → ""
-        df = df.fillna('')
-
-        # 1.1) Filtravimo laukai su placeholder’iais
-        filter_cols = st.columns(len(df.columns) + 1)
-        for i, col in enumerate(df.columns):
-            filter_cols[i].text_input(label="", placeholder=col, key=f"f_emp_{col}")
-        filter_cols[-1].write("")
-
-        # 1.2) Taikome filtrus pagal vartotojo įvestį
-        df_filt = df.copy()
-        for col in df.columns:
-            val = st.session_state.get(f"f_emp_{col}", "")
-            if val:
-                df_filt = df_filt[df_filt[col].astype(str).str.contains(val, case=False, na=False)]
-
-        # 1.3) Atvaizduojame kiekvieną eilutę su redagavimo mygtuku
-        for _, row in df_filt.iterrows():
-            row_cols = st.columns(len(df_filt.columns) + 1)
-            for i, col in enumerate(df_filt.columns):
-                if col == "aktyvus":
-                    row_cols[i].write("Taip" if row[col] == 1 else "Ne")
-                else:
-                    row_cols[i].write(row[col])
-            row_cols[-1].button(
-                "✏️",
-                key=f"edit_emp_{row['id']}",
-                on_click=start_edit,
-                args=(row['id'],)
-            )
+        # 1.1) Filtravimo laukai su placeholder’iais ir lentelė su eilutės pasirinkimu redagavimui
+        #      (puslapiais, žr. modules/grid.py)
+        pasirinktas = show_grid(conn, "darbuotojai", SARASO_UZKLAUSA, filter_prefix="f_emp_")
+        if pasirinktas is not None:
+            start_edit(pasirinktas)
+            st.rerun()
         return
 
     # 2. DETALĖS / NAUJAS DARBUOTOJAS
@@ -102,8 +75,7 @@ def show(conn, c):
     pareigybes = ["Ekspedicijos vadybininkas", "Transporto vadybininkas"]
 
     # Iš DB gauname visų grupių sąrašą
-    all_grupes_df = pd.read_sql_query("SELECT numeris FROM grupes ORDER BY numeris", conn)
-    all_grupes = all_grupes_df["numeris"].tolist()
+    all_grupes = cache.column(conn, "grupes", "SELECT numeris FROM grupes ORDER BY numeris")
 
     # Padalijame grupes pagal prefiksus
     ekspedicijos_gr = [g for g in all_grupes if g.upper().startswith("EKSP")]
@@ -191,6 +163,7 @@ def show(conn, c):
                 tuple(vals)
             )
         conn.commit()
+        cache.bump("darbuotojai")
         st.success("✅ Duomenys įrašyti.")
         clear_selection()
 
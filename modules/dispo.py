@@ -2,8 +2,114 @@
 
 import streamlit as st
 from datetime import date, timedelta
-import random
-import hashlib
+from functools import lru_cache
+from html import escape
+
+import cache
+
+COMMON_HEADERS = [
+    "Transporto grupė", "Ekspedicijos grupės nr.",
+    "Vilkiko nr.", "Ekspeditorius",
+    "Trans. vadybininkas", "Priekabos nr.",
+    "Vair. sk.", "Savaitinė atstova", "Pastabos"
+]
+DAY_HEADERS = [
+    "B. d. laikas", "L. d. laikas", "Atvykimo laikas",
+    "Laikas nuo", "Laikas iki", "Vieta",
+    "Atsakingas", "Tušti km", "Krauti km",
+    "Kelių išlaidos", "Frachtas"
+]
+
+# Lentelės, iš kurių skaičiuojami dienų langeliai (bendro podėlio raktas, žr. cache.view)
+DISPO_LENTELES = ("kroviniai", "vilkiku_darbo_laikai")
+
+def _laikas(v):
+    """'08:00:00' → '08:00'; None → ''."""
+    return str(v)[:5] if v else ""
+
+def _vieta(salis, regionas, miestas):
+    return " ".join(x for x in (f"{salis or ''}{regionas or ''}", miestas or "") if x)
+
+def load_day_data(conn, trucks, start_date, end_date):
+    """
+    Viena užklausa paima visus matomų vilkikų krovinius, kurių pakrovimo arba iškrovimo data
+    patenka į intervalą, kartu su 'vilkiku_darbo_laikai' įrašu (vilkikas, pakrovimo data).
+    Grąžina žodyną {(vilkikas, 'YYYY-MM-DD'): (pakrovimai, iškrovimai)}, kur abu – langelių reikšmių
+    tuple'ų tuple'ai (po vieną kiekvienam kroviniui), kad langelis būtų randamas per O(1).
+    """
+    if not trucks:
+        return {}
+    placeholders = ", ".join("?" for _ in trucks)
+    nuo, iki = start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()
+    rows = conn.execute(f"""
+        WITH krov AS (
+            SELECT id FROM kroviniai
+            WHERE vilkikas IN ({placeholders}) AND pakrovimo_data >= ? AND pakrovimo_data < ?
+            UNION
+            SELECT id FROM kroviniai
+            WHERE vilkikas IN ({placeholders}) AND iskrovimo_data >= ? AND iskrovimo_data < ?
+        )
+        SELECT
+            k.vilkikas, date(k.pakrovimo_data), date(k.iskrovimo_data),
+            k.pakrovimo_laikas_nuo, k.pakrovimo_laikas_iki,
+            k.pakrovimo_salis, k.pakrovimo_regionas, k.pakrovimo_miestas,
+            k.iskrovimo_laikas_nuo, k.iskrovimo_laikas_iki,
+            k.iskrovimo_salis, k.iskrovimo_regionas, k.iskrovimo_miestas,
+            k.ekspedicijos_vadybininkas, k.kilometrai, k.frachtas,
+            d.darbo_laikas, d.likes_laikas, d.pakrovimo_laikas, d.iskrovimo_laikas
+        FROM krov
+        JOIN kroviniai AS k ON k.id = krov.id
+        LEFT JOIN vilkiku_darbo_laikai AS d
+          ON d.vilkiko_numeris = k.vilkikas AND d.data = k.pakrovimo_data
+        ORDER BY k.pakrovimo_data, k.id
+    """, list(trucks) + [nuo, iki] + list(trucks) + [nuo, iki]).fetchall()
+
+    pakrovimai, iskrovimai = {}, {}
+    for (truck, pk_data, ik_data, pk_nuo, pk_iki, pk_salis, pk_reg, pk_mie,
+         ik_nuo, ik_iki, ik_salis, ik_reg, ik_mie, eksped, km, fr, bdl, ldl, pk_atv, ik_atv) in rows:
+        # Pakrovimo eilutė: darbo laikas, atvykimas, pakrovimo langas ir vieta, km ir frachtas
+        pakrovimai.setdefault((truck, pk_data), []).append((
+            bdl, ldl, _laikas(pk_atv), _laikas(pk_nuo), _laikas(pk_iki),
+            _vieta(pk_salis, pk_reg, pk_mie), eksped, "", km, "", fr,
+        ))
+        # Iškrovimo eilutė: atvykimas, iškrovimo langas ir vieta
+        iskrovimai.setdefault((truck, ik_data), []).append((
+            "", "", _laikas(ik_atv), _laikas(ik_nuo), _laikas(ik_iki),
+            _vieta(ik_salis, ik_reg, ik_mie), eksped, "", "", "", "",
+        ))
+    return {
+        key: (tuple(pakrovimai.get(key, ())), tuple(iskrovimai.get(key, ())))
+        for key in pakrovimai.keys() | iskrovimai.keys()
+    }
+
+def _cells(krovinai):
+    """
+    Vienos dienos 11 langelių vienai eilutei. Keli tos dienos kroviniai rodomi tame pačiame langelyje per " / ".
+    """
+    if not krovinai:
+        return "<td></td>" * len(DAY_HEADERS)
+    return "".join(
+        "<td>" + " / ".join(escape(str(v)) for v in values if v not in (None, "")) + "</td>"
+        for values in zip(*krovinai)
+    )
+
+@lru_cache(maxsize=4096)
+def render_truck(row, start_date, num_days, day_data):
+    """
+    Vilkiko dviejų eilučių HTML be eilės numerio langelių: (pirmos eilutės tęsinys, antros eilutės tęsinys).
+    Pirmoje eilutėje – tos dienos pakrovimai, antroje – iškrovimai.
+    day_data – ((dienos indeksas, (pakrovimai, iškrovimai)), ...) tik dienoms su duomenimis.
+    Podėlio raktas – vilkiko eilutė, intervalas ir jo duomenys (jie ir yra duomenų versija),
+    todėl persipiešia tik tie vilkikai, kurių duomenys ar intervalas pasikeitė.
+    """
+    by_day = dict(day_data)
+    first = ['<td rowspan="2">', '</td><td rowspan="2">'.join(str(v) for v in row), "</td><td></td>"]
+    second = ["<td></td>" * len(COMMON_HEADERS)]
+    for i in range(num_days):
+        pakr, iskr = by_day.get(i, ((), ()))
+        first.append(_cells(pakr))
+        second.append(_cells(iskr))
+    return "".join(first), "".join(second)
 
 def show(conn, c):
     st.title("DISPO – Planavimo lentelė su grupėmis")
@@ -43,34 +149,14 @@ def show(conn, c):
     dates = [start_date + timedelta(days=i) for i in range(num_days)]
     st.write(f"Rodyti {num_days} dienų nuo {start_date} iki {end_date}.")
 
-    common_headers = [
-        "Transporto grupė", "Ekspedicijos grupės nr.",
-        "Vilkiko nr.", "Ekspeditorius",
-        "Trans. vadybininkas", "Priekabos nr.",
-        "Vair. sk.", "Savaitinė atstova", "Pastabos"
-    ]
-    day_headers = [
-        "B. d. laikas", "L. d. laikas", "Atvykimo laikas",
-        "Laikas nuo", "Laikas iki", "Vieta",
-        "Atsakingas", "Tušti km", "Krauti km",
-        "Kelių išlaidos", "Frachtas"
-    ]
-
+    # Antraštės eilutės iš anksto sujungtos 'vilkiku_suvestine' lentelėje (palaiko db trigeriai).
+    # Be ekspeditoriaus (LEFT JOIN) – tuščias tekstas, kad filtro reikšmes būtų galima rikiuoti
     trucks_info = c.execute("""
-        SELECT
-            tg.numeris AS trans_grupe,
-            eg.numeris AS eksp_grupe,
-            v.numeris,
-            e.vardas || ' ' || e.pavarde AS ekspeditorius,
-            t.vardas || ' ' || t.pavarde AS vadybininkas,
-            v.priekaba,
-            (SELECT COUNT(*) FROM vairuotojai WHERE priskirtas_vilkikas = v.numeris) AS vair_sk,
-            42 AS savaitine_atstova
-        FROM vilkikai v
-        LEFT JOIN darbuotojai t ON v.vadybininkas = t.vardas
-        LEFT JOIN grupes tg ON t.grupe = tg.pavadinimas
-        LEFT JOIN darbuotojai e ON v.vairuotojai LIKE '%' || e.vardas || '%'
-        LEFT JOIN grupes eg ON e.grupe = eg.pavadinimas
+        SELECT trans_grupe, eksp_grupe, numeris, COALESCE(ekspeditorius, '') AS ekspeditorius,
+               vadybininkas, priekaba, vair_sk,
+               42 AS savaitine_atstova
+        FROM vilkiku_suvestine
+        ORDER BY vilkiko_id, vadybininko_id, trans_grupes_id, ekspeditoriaus_id, eksp_grupes_id
     """).fetchall()
 
     all_eksp = sorted({t[3] for t in trucks_info})
@@ -98,61 +184,41 @@ def show(conn, c):
     </style>
     """, unsafe_allow_html=True)
 
-    def get_rnd(truck: str, day: str) -> random.Random:
-        seed = int(hashlib.md5(f"{truck}-{day}".encode()).hexdigest(), 16)
-        return random.Random(seed)
-
-    total_common = len(common_headers)
-    total_day_cols = len(dates) * len(day_headers)
-    total_all_cols = 1 + total_common + total_day_cols
-
-    html = '<div class="table-container"><table>\n'
-    html += "<tr>" + "".join(f"<th>{col_letter(i)}</th>" for i in range(1, total_all_cols + 1)) + "</tr>\n"
-    html += "<tr><th></th><th colspan=\"{}\"></th>".format(total_common)
-    for d in dates:
-        wd = lt_weekdays[d.weekday()]
-        html += f'<th colspan="{len(day_headers)}">{d:%Y-%m-%d} {wd}</th>'
-    html += "</tr>\n"
-
-    html += "<tr><th>#</th>" + "".join(f"<th>{h}</th>" for h in common_headers)
-    for _ in dates:
-        for hh in day_headers:
-            html += f"<th>{hh}</th>"
-    html += "</tr>\n"
-
-    row_num = 1
-    for row in trucks_info:
-        if row[3] not in sel_eksp:
-            continue
-        html += f"<tr><td>{row_num}</td>"
-        for val in row:
-            html += f'<td rowspan="2">{val}</td>'
-        html += "<td></td>"
-        for d in dates:
-            key = d.strftime("%Y-%m-%d")
-            rnd = get_rnd(row[2], key)
-            atv = f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}"
-            city = rnd.choice(["Vilnius", "Kaunas", "Berlin"])
-            html += ("<td></td><td></td>"
-                     f"<td>{atv}</td><td></td><td></td>"
-                     f"<td>{city}</td>" + "<td></td>" * 5)
-        html += "</tr>\n"
-
-        html += f"<tr><td>{row_num + 1}</td>" + "<td></td>" * total_common
-        for d in dates:
-            key = d.strftime("%Y-%m-%d")
-            rnd = get_rnd(row[2], key)
-            t1 = f"{rnd.randint(7, 9):02d}:00"
-            kms = rnd.randint(20, 120)
-            costs = kms * 5
-            fr = round(rnd.uniform(800, 1200), 2)
-            dest = rnd.choice(["Riga", "Poznan"])
-            html += ("<td>9</td><td>6</td>"
-                     f"<td>{t1}</td><td>{t1}</td><td>16:00</td>"
-                     f"<td>{dest}</td><td></td>"
-                     f"<td>{kms}</td><td>{costs}</td><td></td><td>{fr}</td>")
-        html += "</tr>\n"
-        row_num += 2
-
-    html += "</table></div>"
+    visible = [tuple(row) for row in trucks_info if row[3] in sel_eksp]
+
+    def lentele():
+        total_common = len(COMMON_HEADERS)
+        total_day_cols = len(dates) * len(DAY_HEADERS)
+        total_all_cols = 1 + total_common + total_day_cols
+
+        # HTML renkamas į sąrašą ir sujungiamas vieną kartą; vilkikų eilutės imamos iš render_truck podėlio
+        parts = ['<div class="table-container"><table>\n']
+        parts.append("<tr>" + "".join(f"<th>{col_letter(i)}</th>" for i in range(1, total_all_cols + 1)) + "</tr>\n")
+        parts.append("<tr><th></th><th colspan=\"{}\"></th>".format(total_common))
+        parts.extend(
+            f'<th colspan="{len(DAY_HEADERS)}">{d:%Y-%m-%d} {lt_weekdays[d.weekday()]}</th>' for d in dates
+        )
+        parts.append("</tr>\n")
+
+        day_header_html = "".join(f"<th>{hh}</th>" for hh in DAY_HEADERS)
+        parts.append("<tr><th>#</th>" + "".join(f"<th>{h}</th>" for h in COMMON_HEADERS) + day_header_html * len(dates) + "</tr>\n")
+
+        data = load_day_data(conn, sorted({row[2] for row in visible}), start_date, end_date)
+        date_strs = [d.isoformat() for d in dates]
+
+        row_num = 1
+        for row in visible:
+            day_data = tuple(
+                (i, data[(row[2], d)]) for i, d in enumerate(date_strs) if (row[2], d) in data
+            )
+            first, second = render_truck(tuple(row), start_date, num_days, day_data)
+            parts.append(f"<tr><td>{row_num}</td>{first}</tr>\n<tr><td>{row_num + 1}</td>{second}</tr>\n")
+            row_num += 2
+
+        parts.append("</table></div>")
+        return "".join(parts)
+
+    # Lentelės HTML bendras visoms sesijoms (cache.view): raktas – intervalas ir matomos antraštės eilutės,
+    # duomenų versija – krovinių ir darbo laikų kartos
+    html = cache.view("dispo", DISPO_LENTELES, (start_date, end_date, tuple(visible)), lentele)
     st.markdown(html, unsafe_allow_html=True)
@@ -0,0 +1,135 @@
+# modules/export.py
+
+import csv
+import io
+from datetime import timedelta
+
+import streamlit as st
+
+from db import database_file, get_pool
+
+CHUNK_SIZE = 1000   # eilučių, nuskaitomų iš kursoriaus vienu kartu
+
+FORMATAI = {
+    "CSV": ("csv", "text/csv"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+def xlsx_available():
+    """
+    XLSX eksportui reikalingas openpyxl (neprivaloma priklausomybė); be jo siūlomas tik CSV.
+    """
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def export_sql(query, order_by=None, date_col=None, date_range=None):
+    """
+    Eksporto užklausa: query kaip subužklausa su neprivalomu datų intervalu (imtinai) ir rūšiavimu.
+    date_range – (nuo, iki) datos; stulpelio reikšmės lyginamos kaip ISO tekstas, todėl
+    tinka ir „YYYY-MM-DD“, ir „YYYY-MM-DD HH:MM“ formatai.
+    Grąžina (SQL tekstas, parametrai).
+    """
+    where, params = "", []
+    if date_col and date_range:
+        nuo, iki = date_range
+        where = f' WHERE "{date_col}" >= ? AND "{date_col}" < ?'
+        params = [nuo.isoformat(), (iki + timedelta(days=1)).isoformat()]
+    order = f" ORDER BY {order_by}" if order_by else ""
+    return f"SELECT * FROM ({query}){where}{order}", params
+
+def _chunks(conn, sql, params):
+    """
+    Grąžina (stulpeliai, eilučių paketų generatorius): eilutės skaitomos po CHUNK_SIZE,
+    todėl atmintyje vienu metu laikomas tik vienas paketas.
+    """
+    cur = conn.execute(sql, params)
+    columns = [d[0] for d in cur.description]
+
+    def paketai():
+        while True:
+            rows = cur.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+
+    return columns, paketai()
+
+def write_csv(conn, sql, params, out):
+    """
+    Įrašo užklausos rezultatą į dvejetainį srautą out kaip CSV (UTF-8, skirtukas ';', NULL → tuščia).
+    Reikšmės rašomos taip, kaip grąžina SQLite: sveikieji skaičiai stulpeliuose su NULL lieka
+    sveikaisiais („5“), o ne „5.0“, kaip rašė ankstesnis pandas to_csv() eksportas.
+    """
+    columns, paketai = _chunks(conn, sql, params)
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text, delimiter=";", lineterminator="\n")
+    writer.writerow(columns)
+    for rows in paketai:
+        writer.writerows(rows)
+    text.flush()
+    text.detach()
+
+def write_xlsx(conn, sql, params, out, sheet="Duomenys"):
+    """
+    Įrašo užklausos rezultatą į dvejetainį srautą out kaip XLSX.
+    Naudojamas openpyxl write_only režimas: eilutės iškart rašomos į failą, o ne laikomos darbaknygėje.
+    """
+    from openpyxl import Workbook
+
+    columns, paketai = _chunks(conn, sql, params)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet)
+    ws.append(columns)
+    for rows in paketai:
+        for row in rows:
+            ws.append(row)
+    wb.save(out)
+
+def export_bytes(db_file, sql, params, fmt):
+    """
+    Sugeneruoja eksporto failą per DB failo db_file skaitymo prisijungimą iš bendro telkinio
+    (kviečiama Streamlit atsisiuntimo gijoje, ne puslapio scenarijuje).
+    """
+    out = io.BytesIO()
+    with get_pool(db_file).reader() as rconn:
+        if fmt == "XLSX":
+            write_xlsx(rconn, sql, params, out)
+        else:
+            write_csv(rconn, sql, params, out)
+    out.seek(0)
+    return out
+
+def show_export(conn, key, query, file_name, order_by=None, date_col=None, date_label=None,
+                label="💾 Eksportuoti"):
+    """
+    Eksporto valdikliai po sąrašu: formatas (CSV/XLSX), neprivalomas datų intervalas pagal date_col
+    ir atsisiuntimo mygtukas. Failas generuojamas tik paspaudus mygtuką (Streamlit „deferred“
+    atsisiuntimas), eilutės skaitomos iš kursoriaus paketais – atvaizdavimo metu duomenys neskaitomi.
+
+    conn – sesijos prisijungimas (eksportas skaitomas iš tos pačios DB per telkinį);
+    key – valdiklių raktų priešdėlis; query – eksportuojama SELECT užklausa;
+    file_name – failo vardas be plėtinio.
+    """
+    formatai = list(FORMATAI) if xlsx_available() else ["CSV"]
+    cols = st.columns([1, 2, 1]) if date_col else st.columns([1, 1])
+    fmt = cols[0].radio("Eksporto formatas", formatai, horizontal=True, key=f"{key}_export_fmt")
+    date_range = None
+    if date_col:
+        intervalas = cols[1].date_input(date_label or date_col, value=(), key=f"{key}_export_datos")
+        if len(intervalas) == 2:
+            date_range = intervalas
+    sql, params = export_sql(query, order_by, date_col, date_range)
+    db_file = database_file(conn)
+    pletinys, mime = FORMATAI[fmt]
+    cols[-1].markdown("&nbsp;")
+    cols[-1].download_button(
+        f"{label} ({fmt})",
+        data=lambda: export_bytes(db_file, sql, params, fmt),
+        file_name=f"{file_name}.{pletinys}",
+        mime=mime,
+        key=f"{key}_export",
+        use_container_width=True,
+    )
@@ -0,0 +1,122 @@
+# modules/grid.py
+
+import streamlit as st
+import pandas as pd
+
+import cache
+
+PAGE_SIZE = 50
+
+def filter_sql(conn, columns, values, match, fts=None):
+    """
+    Paverčia filtrų laukų reikšmes parametrizuota WHERE dalimi.
+    Kiekvienas netuščias filtras → unicode_lower(CAST(stulpelis AS TEXT)) LIKE ? su mažosiomis
+    raidėmis paverstu filtru (match = "prefix" – reikšmė turi prasidėti filtru, "contains" – turi
+    jį turėti bet kurioje vietoje). Didžiosios/mažosios raidės nesvarbios ir lietuviškoms raidėms:
+    vien LIKE jas skiria („Žukauskas“ nerastų pagal „žuk“). unicode_lower() registruoja db._open().
+
+    fts – (FTS lentelė, {rodomas stulpelis: FTS stulpelis}). Jei FTS lentelė yra, o filtras
+    ne trumpesnis nei 3 simboliai (trigram), eilutės atrenkamos per FTS indeksą:
+    "contains" atveju to pakanka, "prefix" atveju LIKE dar patikrina, kad reikšmė prasideda filtru.
+    Grąžina (WHERE tekstas, parametrai).
+    """
+    fts_table, fts_cols = fts or (None, {})
+    if fts_table and any(v and len(v) >= 3 and col in fts_cols for col, v in zip(columns, values)):
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+        ).fetchone():
+            fts_table = None
+
+    where, params = [], []
+    for col, val in zip(columns, values):
+        if not val:
+            continue
+        if fts_table and col in fts_cols and len(val) >= 3:
+            where.append(f"id IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)")
+            params.append(f'{fts_cols[col]} : "{val.replace(chr(34), chr(34) * 2)}"')
+            if match != "prefix":
+                continue
+        like = val.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where.append(f'unicode_lower(CAST("{col}" AS TEXT)) LIKE ? ESCAPE \'\\\'')
+        params.append(f"{like}%" if match == "prefix" else f"%{like}%")
+    return (" WHERE " + " AND ".join(where)) if where else "", params
+
+def show_grid(conn, key, query, params=(), order_by="id", id_col="id", match="contains",
+              filter_prefix="f_", labels=None, page_size=PAGE_SIZE, fts=None, tables=None):
+    """
+    Bendras sąrašo rodinys: filtrai virš lentelės, puslapiavimas SQL pusėje (LIMIT/OFFSET)
+    ir viena st.dataframe lentelė su vienos eilutės pasirinkimu redagavimui.
+
+    query – SELECT užklausa, kurios stulpelių pavadinimai yra rodomi stulpeliai;
+    filtrai ir rūšiavimas taikomi jai kaip subužklausai, todėl išvestiniai stulpeliai
+    (pvz., būsena) filtruojami taip pat kaip ir paprasti.
+    labels – {stulpelis: antraštė} lentelės antraštėms (filtrų placeholder'iai lieka stulpelių vardai).
+    fts – FTS paieškos lentelė ir stulpelių atitikmenys (žr. filter_sql); query turi turėti stulpelį "id".
+    tables – lentelės, iš kurių skaičiuojama query; jei nurodytos, įrašų skaičius ir puslapis imami
+    iš bendro podėlio (cache.view), todėl tas pats puslapis visoms sesijoms skaičiuojamas vieną kartą.
+
+    Grąžina pasirinktos eilutės id_col reikšmę arba None. Nuskaitoma tik vienas puslapis,
+    todėl atvaizdavimo kaina priklauso nuo puslapio dydžio, o ne nuo lentelės dydžio.
+    """
+    # Stulpelių pavadinimai be duomenų nuskaitymo
+    columns = [d[0] for d in conn.execute(f"SELECT * FROM ({query}) LIMIT 0", params).description]
+
+    # 1) Filtrų laukai (placeholder'iai – stulpelių pavadinimai)
+    filter_cols = st.columns(len(columns))
+    values = [
+        filter_cols[i].text_input(label=col, placeholder=col, key=f"{filter_prefix}{col}",
+                                  label_visibility="collapsed")
+        for i, col in enumerate(columns)
+    ]
+    where, where_params = filter_sql(conn, columns, values, match, fts)
+    all_params = list(params) + where_params
+
+    # 2) Puslapis: pasikeitus filtrams grįžtama į pirmą puslapį
+    page_key = f"{key}_page"
+    if st.session_state.get(f"{key}_filters") != values:
+        st.session_state[f"{key}_filters"] = values
+        st.session_state[page_key] = 0
+
+    def gauti(raktas, compute):
+        if tables is None:
+            return compute()
+        return cache.view(f"grid:{key}", tables, (query, where, tuple(all_params)) + raktas, compute)
+
+    total = gauti(("count",), lambda: conn.execute(
+        f"SELECT COUNT(*) FROM ({query}){where}", all_params
+    ).fetchone()[0])
+    pages = max((total + page_size - 1) // page_size, 1)
+    page = min(st.session_state.get(page_key, 0), pages - 1)
+
+    df = gauti(("page", order_by, page, page_size), lambda: pd.read_sql_query(
+        f"SELECT * FROM ({query}){where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+        conn, params=all_params + [page_size, page * page_size]
+    ).fillna(""))
+
+    # 3) Lentelė su vienos eilutės pasirinkimu. Raktas keičiamas po kiekvieno pasirinkimo,
+    #    kad grįžus į sąrašą ankstesnis pasirinkimas nebeliktų aktyvus.
+    table_key = f"{key}_table_{st.session_state.get(f'{key}_table_n', 0)}"
+    event = st.dataframe(
+        df.rename(columns=labels or {}),
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=table_key,
+    )
+
+    # 4) Puslapių naršymas
+    def go(delta):
+        st.session_state[page_key] = min(max(page + delta, 0), pages - 1)
+
+    nav_prev, nav_info, nav_next = st.columns([1, 6, 1])
+    nav_prev.button("◀", key=f"{key}_prev", on_click=go, args=(-1,), disabled=page == 0)
+    nav_info.caption(f"Puslapis {page + 1} / {pages} · įrašų: {total}")
+    nav_next.button("▶", key=f"{key}_next", on_click=go, args=(1,), disabled=page >= pages - 1)
+
+    rows = event.selection.rows if event is not None else []
+    if rows:
+        st.session_state[f"{key}_table_n"] = st.session_state.get(f"{key}_table_n", 0) + 1
+        val = df[id_col].iloc[rows[0]]
+        return val.item() if hasattr(val, "item") else val
+    return None
@@ -3,32 +3,17 @@
 import streamlit as st
 import pandas as pd
 
+import cache
+
 def show(conn, c):
     st.title("DISPO – Grupės")
 
-    # 1) Užtikrinti, kad egzistuotų lentelė „grupes“
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS grupes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            numeris TEXT UNIQUE,
-            pavadinimas TEXT,
-            aprasymas TEXT
-        )
-    """)
-    # 2) Užtikrinti, kad egzistuotų lentelė „grupiu_regionai“
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS grupiu_regionai (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            grupe_id INTEGER NOT NULL,
-            regiono_kodas TEXT NOT NULL,
-            FOREIGN KEY (grupe_id) REFERENCES grupes(id)
-        )
-    """)
-    conn.commit()
+    # 1–2) Lentelės „grupes“ ir „grupiu_regionai“ sukuriamos vieną kartą per db.migrate()
 
     # 3) Automatiškai sukurti numatytąsias grupes (EKSP1–EKSP5, TR1–TR5), jei jų dar nėra
     default_eksp = [f"EKSP{i}" for i in range(1, 6)]
     default_tr   = [f"TR{i}"   for i in range(1, 6)]
+    sukurta = False
     for kod in default_eksp + default_tr:
         c.execute("SELECT 1 FROM grupes WHERE numeris = ?", (kod,))
         if not c.fetchone():
@@ -36,7 +21,10 @@ def show(conn, c):
                 "INSERT INTO grupes (numeris, pavadinimas, aprasymas) VALUES (?, ?, ?)",
                 (kod, kod, "")
             )
+            sukurta = True
     conn.commit()
+    if sukurta:
+        cache.bump("grupes")
 
     # 4) Mygtukas formos rodymui/uždarymui
     if "show_add_form" not in st.session_state:
@@ -69,6 +57,7 @@ def show(conn, c):
                             (kodas, pavadinimas.strip(), aprasymas.strip())
                         )
                         conn.commit()
+                        cache.bump("grupes")
                         st.success(f"✅ Grupė „{kodas}“ įrašyta.")
                         st.session_state["show_add_form"] = False
                     except Exception as e:
@@ -1,30 +1,21 @@
 import streamlit as st
 import pandas as pd
 
+import cache
+from modules.grid import show_grid
+
+# Client list query (limit balance comes from the credit ledger view 'klientu_limitai')
+SARASO_UZKLAUSA = """
+    SELECT cl.id, cl.pavadinimas, cl.salis, cl.regionas, cl.miestas, l.likes_limitas AS limito_likutis
+    FROM klientai AS cl
+    JOIN klientu_limitai AS l ON l.id = cl.id
+"""
+
+# Filters on these columns search the 'klientai_fts' index (see db.FTS_LENTELES)
+FTS_FILTRAI = ("klientai_fts", {col: col for col in ["pavadinimas", "salis", "regionas", "miestas"]})
+
 def show(conn, c):
-    # 1. Ensure required columns exist
-    expected = {
-        'vat_numeris':          'TEXT',
-        'kontaktinis_asmuo':    'TEXT',
-        'kontaktinis_el_pastas':'TEXT',
-        'kontaktinis_tel':      'TEXT',
-        'salis':                'TEXT',
-        'regionas':             'TEXT',
-        'miestas':              'TEXT',
-        'adresas':              'TEXT',
-        'saskaitos_asmuo':      'TEXT',
-        'saskaitos_el_pastas':  'TEXT',
-        'saskaitos_tel':        'TEXT',
-        'coface_limitas':       'REAL',
-        'musu_limitas':         'REAL',
-        'likes_limitas':        'REAL',
-    }
-    c.execute("PRAGMA table_info(klientai)")
-    existing = {r[1] for r in c.fetchall()}
-    for col, typ in expected.items():
-        if col not in existing:
-            c.execute(f"ALTER TABLE klientai ADD COLUMN {col} {typ}")
-    conn.commit()
+    # 1. Required columns are ensured once by db.migrate() on connect
 
     # Callbacks
     def clear_selection():
@@ -45,44 +36,17 @@ def show(conn, c):
     if 'selected_client' not in st.session_state:
         st.session_state.selected_client = None
 
-    # 4. List view (no headers above or below filters; placeholders inside filter inputs)
+    # 4. List view (placeholders inside filter inputs)
     if st.session_state.selected_client is None:
-        # Load data
-        df = pd.read_sql(
-            "SELECT id, pavadinimas, salis, regionas, miestas, likes_limitas AS limito_likutis FROM klientai",
-            conn
-        )
-        if df.empty:
+        if not c.execute("SELECT 1 FROM klientai LIMIT 1").fetchone():
             st.info("ℹ️ Nėra klientų.")
             return
 
-        # Replace NaN with empty strings for display
-        df = df.fillna('')
-
-        # Filters with placeholders (no header labels above or below)
-        filter_cols = st.columns(len(df.columns) + 1)
-        for i, col in enumerate(df.columns):
-            filter_cols[i].text_input(label="", placeholder=col, key=f"f_{col}")
-        filter_cols[-1].write("")
-
-        # Apply filters
-        df_filt = df.copy()
-        for col in df.columns:
-            val = st.session_state.get(f"f_{col}", "")
-            if val:
-                df_filt = df_filt[df_filt[col].astype(str).str.contains(val, case=False, na=False)]
-
-        # Data rows with edit button (no header row)
-        for _, row in df_filt.iterrows():
-            row_cols = st.columns(len(df_filt.columns) + 1)
-            for i, col in enumerate(df_filt.columns):
-                row_cols[i].write(row[col])
-            row_cols[-1].button(
-                "✏️",
-                key=f"edit_{row['id']}",
-                on_click=start_edit,
-                args=(row['id'],)
-            )
+        # Filters with placeholders and one selectable row per client (paged in SQL, see modules/grid.py)
+        selected = show_grid(conn, "klientai", SARASO_UZKLAUSA, fts=FTS_FILTRAI)
+        if selected is not None:
+            start_edit(selected)
+            st.rerun()
         return
 
     # 5. Detail / new form
@@ -184,6 +148,13 @@ def show(conn, c):
             key="coface_limitas"
         )
 
+        # Unpaid fracht sum for a VAT – O(1) lookup in the ledger kept by triggers
+        def unpaid_for_vat(vat):
+            r = c.execute(
+                "SELECT neapmoketa FROM klientu_skolos WHERE vat_numeris = ?", (vat,)
+            ).fetchone()
+            return r[0] if r else 0.0
+
         # Compute "Mūsų limitas" and "Limito likutis" (read-only display)
         def compute_limits(vat, coface):
             try:
@@ -191,22 +162,7 @@ def show(conn, c):
             except:
                 return "", ""
             musu = coface_val / 3.0
-            # If kroviniai table does not exist yet, unpaid_sum = 0
-            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='kroviniai'")
-            if not c.fetchone():
-                unpaid_sum = 0.0
-            else:
-                try:
-                    r = c.execute("""
-                        SELECT SUM(k.frachtas) 
-                        FROM kroviniai AS k
-                        JOIN klientai AS cl ON k.klientas = cl.pavadinimas
-                        WHERE cl.vat_numeris = ? 
-                          AND k.saskaitos_busena != 'Apmokėta'
-                    """, (vat,)).fetchone()
-                    unpaid_sum = r[0] if r and r[0] is not None else 0.0
-                except:
-                    unpaid_sum = 0.0
+            unpaid_sum = unpaid_for_vat(vat)
             liks = musu - unpaid_sum
             if liks < 0:
                 liks = 0.0
@@ -239,12 +195,6 @@ def show(conn, c):
             st.error("❌ Netinkamas COFACE limitas. Įveskite skaičių.")
             return
 
-        # Compute Mūsų limitas ir limito likutis for this VAT
-        musu_limitas_calc, liks_calc = compute_limits(
-            st.session_state["vat_numeris"], 
-            st.session_state["coface_limitas"]
-        )
-
         vals = {
             'pavadinimas':         st.session_state["pavadinimas"],
             'vat_numeris':         st.session_state["vat_numeris"],
@@ -258,9 +208,7 @@ def show(conn, c):
             'saskaitos_asmuo':     st.session_state["saskaitos_asmuo"],
             'saskaitos_el_pastas': st.session_state["saskaitos_el_pastas"],
             'saskaitos_tel':       st.session_state["saskaitos_tel"],
-            'coface_limitas':      coface_val,
-            'musu_limitas':        musu_limitas_calc,
-            'likes_limitas':       liks_calc
+            'coface_limitas':      coface_val
         }
 
         try:
@@ -272,40 +220,18 @@ def show(conn, c):
                 vals_list = list(vals.values()) + [sel]
                 sc = ", ".join(f"{k}=?" for k in vals.keys())
                 c.execute(f"UPDATE klientai SET {sc} WHERE id=?", tuple(vals_list))
-            conn.commit()
-
-            # 8. After saving or updating, update all clients with same VAT:
-            vat = st.session_state["vat_numeris"]
-            # Recompute unpaid fracht sum for this VAT
-            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='kroviniai'")
-            if not c.fetchone():
-                unpaid_total = 0.0
-            else:
-                try:
-                    r2 = c.execute("""
-                        SELECT SUM(k.frachtas)
-                        FROM kroviniai AS k
-                        JOIN klientai AS cl ON k.klientas = cl.pavadinimas
-                        WHERE cl.vat_numeris = ?
-                          AND k.saskaitos_busena != 'Apmokėta'
-                    """, (vat,)).fetchone()
-                    unpaid_total = r2[0] if r2 and r2[0] is not None else 0.0
-                except:
-                    unpaid_total = 0.0
-            new_musu = coface_val / 3.0
-            new_liks = new_musu - unpaid_total
-            if new_liks < 0:
-                new_liks = 0.0
 
-            # Update all rows where vat_numeris = vat
-            c.execute("""
-                UPDATE klientai
-                SET coface_limitas = ?, musu_limitas = ?, likes_limitas = ?
-                WHERE vat_numeris = ?
-            """, (coface_val, new_musu, new_liks, vat))
+            # 8. COFACE limit is shared by all clients with the same VAT – set it in the same transaction.
+            #    Limits and balance are not stored: they are derived from the ledger (view 'klientu_limitai')
+            c.execute(
+                "UPDATE klientai SET coface_limitas = ? WHERE vat_numeris = ? AND coface_limitas IS NOT ?",
+                (coface_val, vals['vat_numeris'], coface_val)
+            )
             conn.commit()
+            cache.bump("klientai")
 
-            st.success("✅ Duomenys įrašyti ir limitai atnaujinti visiems su tuo pačiu VAT numeriu.")
+            st.success("✅ Duomenys įrašyti, COFACE limitas atnaujintas visiems su tuo pačiu VAT numeriu.")
             clear_selection()
         except Exception as e:
+            conn.rollback()
             st.error(f"❌ Klaida: {e}")
@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 from datetime import date, time, timedelta
 
+import cache
+from modules.export import show_export
+from modules.grid import show_grid
+
 EU_COUNTRIES = [
     ("", ""), ("Lietuva", "LT"), ("Baltarusija", "BY"), ("Latvija", "LV"), ("Lenkija", "PL"), ("Vokietija", "DE"),
     ("Prancūzija", "FR"), ("Ispanija", "ES"), ("Italija", "IT"), ("Olandija", "NL"), ("Belgija", "BE"),
@@ -30,108 +34,77 @@ HEADER_LABELS = {
     "saskaitos_busena": "Sąskaitos būsena"
 }
 
-FIELD_ORDER = [
-    "id", "busena", "pakrovimo_data", "iskrovimo_data",
-    "pakrovimo_vieta", "iskrovimo_vieta",
-    "klientas", "vilkikas", "priekaba", "ekspedicijos_vadybininkas",
-    "transporto_vadybininkas", "atsakingas_vadybininkas",
-    "uzsakymo_numeris", "kilometrai", "frachtas",
-    "saskaitos_busena"
-]
-
-def get_busena(c, krovinys):
-    if not krovinys.get("vilkikas"):
-        return "Nesuplanuotas"
-    if krovinys.get("vilkikas") == "":
-        return "Nesuplanuotas"
-    busena = "Suplanuotas"
-    r = c.execute("""
-        SELECT pakrovimo_statusas, iskrovimo_statusas
-        FROM vilkiku_darbo_laikai
-        WHERE vilkiko_numeris = ? AND data = ?
-        ORDER BY id DESC LIMIT 1
-    """, (krovinys['vilkikas'], krovinys['pakrovimo_data'])).fetchone()
-    if not r:
-        return busena
-    pk_status, ik_status = r
-    if ik_status == "Iškrauta":
-        return "Iškrauta"
-    if ik_status == "Atvyko":
-        return "Atvyko į iškrovimą"
-    if ik_status == "Kita" and pk_status != "Pakrauta":
-        return "Kita (iškrovimas)"
-    if pk_status == "Pakrauta":
-        return "Pakrauta"
-    if pk_status == "Atvyko":
-        return "Atvyko į pakrovimą"
-    if pk_status == "Kita":
-        return "Kita (pakrovimas)"
-    return busena
-
-def get_vieta(salis, regionas):
-    if not salis:
-        return ""
-    return f"{salis}{regionas or ''}"
+# Krovinių sąrašo užklausa: visi rodomi stulpeliai (stulpelių tvarka – lentelės tvarka), įskaitant
+# būseną pagal (vilkikas, pakrovimo data) 'vilkiku_darbo_laikai' įrašo pakrovimo/iškrovimo statusus,
+# skaičiuojami SQL pusėje, todėl filtravimas ir puslapiavimas vyksta duomenų bazėje.
+SARASO_UZKLAUSA = """
+    SELECT
+        k.id,
+        CASE
+            WHEN k.vilkikas IS NULL OR k.vilkikas = '' THEN 'Nesuplanuotas'
+            WHEN d.iskrovimo_statusas = 'Iškrauta' THEN 'Iškrauta'
+            WHEN d.iskrovimo_statusas = 'Atvyko' THEN 'Atvyko į iškrovimą'
+            WHEN d.iskrovimo_statusas = 'Kita' AND d.pakrovimo_statusas IS NOT 'Pakrauta' THEN 'Kita (iškrovimas)'
+            WHEN d.pakrovimo_statusas = 'Pakrauta' THEN 'Pakrauta'
+            WHEN d.pakrovimo_statusas = 'Atvyko' THEN 'Atvyko į pakrovimą'
+            WHEN d.pakrovimo_statusas = 'Kita' THEN 'Kita (pakrovimas)'
+            ELSE 'Suplanuotas'
+        END AS busena,
+        k.pakrovimo_data,
+        k.iskrovimo_data,
+        CASE WHEN COALESCE(k.pakrovimo_salis, '') = '' THEN ''
+             ELSE k.pakrovimo_salis || COALESCE(k.pakrovimo_regionas, '') END AS pakrovimo_vieta,
+        CASE WHEN COALESCE(k.iskrovimo_salis, '') = '' THEN ''
+             ELSE k.iskrovimo_salis || COALESCE(k.iskrovimo_regionas, '') END AS iskrovimo_vieta,
+        k.klientas,
+        k.vilkikas,
+        k.priekaba,
+        k.ekspedicijos_vadybininkas,
+        v.vadybininkas AS transporto_vadybininkas,
+        v.vadybininkas AS atsakingas_vadybininkas,
+        k.uzsakymo_numeris,
+        k.kilometrai,
+        k.frachtas,
+        k.saskaitos_busena
+    FROM kroviniai AS k
+    LEFT JOIN vilkikai AS v
+      ON v.id = (SELECT MAX(id) FROM vilkikai WHERE numeris = k.vilkikas)
+    LEFT JOIN vilkiku_darbo_laikai AS d
+      ON d.vilkiko_numeris = k.vilkikas AND d.data = k.pakrovimo_data
+"""
+
+# Lentelės, iš kurių skaičiuojamas sąrašas (bendro podėlio raktas, žr. cache.view)
+SARASO_LENTELES = ("kroviniai", "vilkikai", "vilkiku_darbo_laikai")
+
+# Sąrašo stulpeliai, kurių filtrai ieško per FTS indeksą 'kroviniai_fts' (žr. db.FTS_LENTELES)
+FTS_FILTRAI = ("kroviniai_fts", {
+    col: col for col in ["klientas", "uzsakymo_numeris", "vilkikas", "priekaba", "ekspedicijos_vadybininkas"]
+})
 
 def show(conn, c):
     st.title("Užsakymų valdymas")
     add_clicked = st.button("➕ Pridėti naują krovinį", use_container_width=True)
 
-    # Įsitikinti, kad visi stulpeliai egzistuoja lentelėje 'kroviniai'
-    expected = {
-        'klientas': 'TEXT',
-        'uzsakymo_numeris': 'TEXT',
-        'pakrovimo_salis': 'TEXT',
-        'pakrovimo_regionas': 'TEXT',
-        'pakrovimo_miestas': 'TEXT',
-        'pakrovimo_adresas': 'TEXT',
-        'pakrovimo_data': 'TEXT',
-        'pakrovimo_laikas_nuo': 'TEXT',
-        'pakrovimo_laikas_iki': 'TEXT',
-        'iskrovimo_salis': 'TEXT',
-        'iskrovimo_regionas': 'TEXT',
-        'iskrovimo_miestas': 'TEXT',
-        'iskrovimo_adresas': 'TEXT',
-        'iskrovimo_data': 'TEXT',
-        'iskrovimo_laikas_nuo': 'TEXT',
-        'iskrovimo_laikas_iki': 'TEXT',
-        'vilkikas': 'TEXT',
-        'priekaba': 'TEXT',
-        'atsakingas_vadybininkas': 'TEXT',
-        'ekspedicijos_vadybininkas': 'TEXT',
-        'transporto_vadybininkas': 'TEXT',
-        'kilometrai': 'INTEGER',
-        'frachtas': 'REAL',
-        'svoris': 'INTEGER',
-        'paleciu_skaicius': 'INTEGER',
-        'saskaitos_busena': 'TEXT',
-        'busena': 'TEXT'
-    }
-    c.execute("PRAGMA table_info(kroviniai)")
-    existing = {r[1] for r in c.fetchall()}
-    for col, typ in expected.items():
-        if col not in existing:
-            c.execute(f"ALTER TABLE kroviniai ADD COLUMN {col} {typ}")
-    conn.commit()
-
-    # Paruošti dropdown'us ir žemėlapius
-    klientai = [r[0] for r in c.execute("SELECT pavadinimas FROM klientai").fetchall()]
+    # Stulpeliai lentelėje 'kroviniai' užtikrinami vieną kartą per db.migrate()
+
+    # Paruošti dropdown'us ir žemėlapius (žinyninės lentelės imamos iš bendro podėlio)
+    klientai = cache.column(conn, "klientai", "SELECT pavadinimas FROM klientai")
     if len(klientai) == 0:
         st.warning("Nėra nė vieno kliento! Pridėkite klientą modulyje **Klientai** ir grįžkite čia.")
         return
 
-    vilkikai = [r[0] for r in c.execute("SELECT numeris FROM vilkikai").fetchall()]
+    vilkikai = cache.column(conn, "vilkikai", "SELECT numeris FROM vilkikai")
     eksped_vadybininkai = [
         f"{r[0]} {r[1]}"
-        for r in c.execute("SELECT vardas, pavarde FROM darbuotojai WHERE pareigybe = ?", ("Ekspedicijos vadybininkas",)).fetchall()
+        for r in cache.rows(conn, "darbuotojai", "SELECT vardas, pavarde FROM darbuotojai WHERE pareigybe = ?", ("Ekspedicijos vadybininkas",))
     ]
     eksped_dropdown = [""] + eksped_vadybininkai
-    vilkikai_df = pd.read_sql_query("SELECT numeris, vadybininkas FROM vilkikai", conn)
-    vilk_vad_map = {r['numeris']: r['vadybininkas'] for _, r in vilkikai_df.iterrows()}
+    vilk_vad_map = dict(cache.rows(conn, "vilkikai", "SELECT numeris, vadybininkas FROM vilkikai"))
 
-    # Klientų limitų žemėlapis
-    df_klientai = pd.read_sql_query("SELECT pavadinimas, likes_limitas FROM klientai", conn)
-    klientu_limitai = {row['pavadinimas']: row['likes_limitas'] for _, row in df_klientai.iterrows()}
+    # Klientų limitų žemėlapis (limito likutis skaičiuojamas iš skolų žurnalo, žr. rodinį 'klientu_limitai')
+    klientu_limitai = dict(cache.rows(
+        conn, ("klientai", "klientu_skolos"), "SELECT pavadinimas, likes_limitas FROM klientu_limitai"
+    ))
 
     if 'selected_cargo' not in st.session_state:
         st.session_state['selected_cargo'] = None
@@ -149,62 +122,23 @@ def show(conn, c):
 
     sel = st.session_state['selected_cargo']
 
-    # 4. Krovinio sąrašas
+    # 4. Krovinio sąrašas (puslapiais, žr. modules/grid.py)
     if sel is None:
-        df = pd.read_sql_query("SELECT * FROM kroviniai", conn)
-        if df.empty:
+        if not c.execute("SELECT 1 FROM kroviniai LIMIT 1").fetchone():
             st.info("Kol kas nėra krovinių.")
         else:
-            # Sukurti papildomas stulpelius
-            df["pakrovimo_vieta"] = df.apply(lambda r: get_vieta(r.get('pakrovimo_salis', ''), r.get('pakrovimo_regionas', '')), axis=1)
-            df["iskrovimo_vieta"] = df.apply(lambda r: get_vieta(r.get('iskrovimo_salis', ''), r.get('iskrovimo_regionas', '')), axis=1)
-            df["transporto_vadybininkas"] = df["vilkikas"].map(vilk_vad_map).fillna("")
-            df["atsakingas_vadybininkas"] = df["vilkikas"].map(vilk_vad_map).fillna("")
-            busenos = []
-            for _, row in df.iterrows():
-                busenos.append(get_busena(c, row))
-            df["busena"] = busenos
-
-            df_disp = df[FIELD_ORDER].fillna("")
-
-            # Filtravimas
-            filter_cols = st.columns(len(df_disp.columns) + 1)
-            for i, col in enumerate(df_disp.columns):
-                filter_cols[i].text_input(
-                    " ",
-                    key=f"f_{col}",
-                    label_visibility="collapsed"
-                )
-            filter_cols[-1].write("")
-
-            df_f = df_disp.copy()
-            for col in df_disp.columns:
-                v = st.session_state.get(f"f_{col}", "")
-                if v:
-                    df_f = df_f[df_f[col].astype(str).str.contains(v, case=False, na=False)]
-
-            hdr = st.columns(len(df_disp.columns) + 1)
-            for i, col in enumerate(df_disp.columns):
-                label = HEADER_LABELS.get(col, col.replace("_", "<br>")[:14])
-                hdr[i].markdown(f"<b>{label}</b>", unsafe_allow_html=True)
-            hdr[-1].markdown("<b>Veiksmai</b>", unsafe_allow_html=True)
-
-            for _, row in df_f.iterrows():
-                row_cols = st.columns(len(df_disp.columns) + 1)
-                for i, col in enumerate(df_disp.columns):
-                    row_cols[i].write(row[col])
-                row_cols[-1].button(
-                    "✏️",
-                    key=f"edit_{row['id']}",
-                    on_click=edit_cargo,
-                    args=(row['id'],)
-                )
-
-            st.download_button(
-                "💾 Eksportuoti kaip CSV",
-                data=df_disp.to_csv(index=False, sep=';').encode('utf-8'),
-                file_name="kroviniai.csv",
-                mime="text/csv"
+            pasirinktas = show_grid(
+                conn, "kroviniai", SARASO_UZKLAUSA,
+                labels=HEADER_LABELS, fts=FTS_FILTRAI, tables=SARASO_LENTELES,
+            )
+            if pasirinktas is not None:
+                edit_cargo(pasirinktas)
+                st.rerun()
+
+            # Eksportas generuojamas tik paspaudus mygtuką (žr. modules/export.py)
+            show_export(
+                conn, "kroviniai", SARASO_UZKLAUSA, "kroviniai", order_by="id",
+                date_col="pakrovimo_data", date_label="Pakrovimo datos",
             )
         return
 
@@ -402,21 +336,12 @@ def show(conn, c):
                 return
             vat_of_client, coface_of_client = vat_row
 
-            # Apskaičiuoti mūsų limitą ir einamąją neapmokėtą sumą
+            # Apskaičiuoti mūsų limitą; einamoji neapmokėta suma imama iš skolų žurnalo
             musu_limitas = coface_of_client / 3.0
-            unpaid_sum = 0.0
-            try:
-                r = c.execute("""
-                    SELECT SUM(k.frachtas)
-                    FROM kroviniai AS k
-                    JOIN klientai AS cl ON k.klientas = cl.pavadinimas
-                    WHERE cl.vat_numeris = ?
-                      AND k.saskaitos_busena != 'Apmokėta'
-                """, (vat_of_client,)).fetchone()
-                if r and r[0] is not None:
-                    unpaid_sum = r[0]
-            except:
-                unpaid_sum = 0.0
+            r = c.execute(
+                "SELECT neapmoketa FROM klientu_skolos WHERE vat_numeris = ?", (vat_of_client,)
+            ).fetchone()
+            unpaid_sum = r[0] if r else 0.0
 
             current_limit = musu_limitas - unpaid_sum
             if current_limit < 0:
@@ -466,33 +391,8 @@ def show(conn, c):
                     q = f"UPDATE kroviniai SET {set_str} WHERE id=?"
                     c.execute(q, tuple(vals.values()) + (sel,))
                 conn.commit()
-
-                # Atnaujinti klientų limitus
-                unpaid_total = 0.0
-                try:
-                    r2 = c.execute("""
-                        SELECT SUM(k.frachtas)
-                        FROM kroviniai AS k
-                        JOIN klientai AS cl ON k.klientas = cl.pavadinimas
-                        WHERE cl.vat_numeris = ?
-                          AND k.saskaitos_busena != 'Apmokėta'
-                    """, (vat_of_client,)).fetchone()
-                    if r2 and r2[0] is not None:
-                        unpaid_total = r2[0]
-                except:
-                    unpaid_total = 0.0
-
-                new_musu = coface_of_client / 3.0
-                new_liks = new_musu - unpaid_total
-                if new_liks < 0:
-                    new_liks = 0.0
-
-                c.execute("""
-                    UPDATE klientai
-                    SET musu_limitas = ?, likes_limitas = ?
-                    WHERE vat_numeris = ?
-                """, (new_musu, new_liks, vat_of_client))
-                conn.commit()
+                # Klientų skolų žurnalą atnaujina trigeriai – klientų eilučių perrašyti nebereikia
+                cache.bump("klientu_skolos", "kroviniai")
 
                 st.success("✅ Krovinys išsaugotas ir limitai atnaujinti.")
                 clear_sel()
@@ -1,11 +1,11 @@
 import streamlit as st
 
+import cache
+
 def show(conn, c):
     st.title("DISPO – Nustatymai (Dropdown reikšmių valdymas)")
 
-    kategorijos = [row[0] for row in c.execute(
-        "SELECT DISTINCT kategorija FROM lookup"
-    ).fetchall()]
+    kategorijos = cache.column(conn, "lookup", "SELECT DISTINCT kategorija FROM lookup")
 
     col1, col2 = st.columns(2)
     esama = col1.selectbox("Esama kategorija", [""] + kategorijos)
@@ -18,9 +18,9 @@ def show(conn, c):
     if pasirinkta_kategorija:
         st.subheader(f"Kategorija: **{pasirinkta_kategorija}**")
 
-        reiksmes = [r[0] for r in c.execute(
-            "SELECT reiksme FROM lookup WHERE kategorija = ?", (pasirinkta_kategorija,)
-        ).fetchall()]
+        reiksmes = cache.column(
+            conn, "lookup", "SELECT reiksme FROM lookup WHERE kategorija = ?", (pasirinkta_kategorija,)
+        )
 
         st.write(reiksmes or "_(Nėra reikšmių šioje kategorijoje)_")
 
@@ -33,6 +33,7 @@ def show(conn, c):
                         (pasirinkta_kategorija, nauja_reiksme)
                     )
                     conn.commit()
+                    cache.bump("lookup")
                     st.success(f"✅ Reikšmė „{nauja_reiksme}“ pridėta.")
                 except Exception:
                     st.warning("⚠️ Toks įrašas jau egzistuoja.")
@@ -45,6 +46,7 @@ def show(conn, c):
                     (pasirinkta_kategorija, istr_reiksme)
                 )
                 conn.commit()
+                cache.bump("lookup")
                 st.success(f"✅ Reikšmė „{istr_reiksme}“ ištrinta.")
     else:
         st.info("👉 Pasirink esamą arba sukurk naują kategoriją.")
@@ -4,68 +4,23 @@ import streamlit as st
 import pandas as pd
 import datetime
 
-def show(conn, c):
-    """
-    Pagrindinė planavimo modulio funkcija.
-    Leidžia pasirinkti ekspedicijos grupę, rodo vilkikų grafiką pagal krovinio ir darbo laikų lenteles.
-    Visa logika vyksta Streamlit lange.
-    """
-    st.title("DISPO – Planavimas")
-
-    # ==============================
-    # 0) Patikriname, ar lentelėje "kroviniai" yra reikiami stulpeliai.
-    #    Jei jų nėra, pridedame per ALTER TABLE.
-    # ==============================
-    existing_cols = {r[1] for r in c.execute("PRAGMA table_info(kroviniai)").fetchall()}
-    needed_cols = {
-        'pakrovimo_salis':    'TEXT',
-        'pakrovimo_regionas': 'TEXT',
-        'iskrovimo_salis':    'TEXT',
-        'iskrovimo_regionas': 'TEXT'
-    }
-    for col, coltype in needed_cols.items():
-        if col not in existing_cols:
-            c.execute(f"ALTER TABLE kroviniai ADD COLUMN {col} {coltype}")
-    conn.commit()
-
-    # ==============================
-    # 1) CSS stilius lentelės atvaizdavimui su horizontaliniu skrolu
-    # ==============================
-    st.markdown("""
-    <style>
-      .scroll-container {
-        overflow-x: auto;
-      }
-      table {
-        border-collapse: collapse;
-        width: 100%;
-        white-space: nowrap;
-      }
-      th, td {
-        border: 1px solid #ddd;
-        padding: 4px;
-        vertical-align: top;
-        text-align: center;
-      }
-    </style>
-    """, unsafe_allow_html=True)
+import cache
+from db import database_file, get_pool
 
-    # ==============================
-    # 2) Užkrauname visas ekspedicijos grupes (id, numeris, pavadinimas)
-    # ==============================
-    c.execute("SELECT id, numeris, pavadinimas FROM grupes ORDER BY numeris")
-    grupes = c.fetchall()  # [(id, numeris, pavadinimas), ...]
+# Lentelės, iš kurių sudaroma planavimo lentelė (bendro podėlio raktas, žr. cache.view)
+PLANO_LENTELES = ("kroviniai", "vilkiku_darbo_laikai", "vilkikai")
 
-    group_options = ["Visi"] + [f"{numeris} – {pavadinimas}" for _, numeris, pavadinimas in grupes]
-    selected = st.selectbox("Pasirinkti ekspedicijos grupę", group_options)
-
-    # ==============================
-    # 3) Apskaičiuojame datų intervalą: nuo vakar iki dviejų savaičių į priekį
-    # ==============================
-    today = datetime.date.today()
-    start_date = today - datetime.timedelta(days=1)
-    end_date = today + datetime.timedelta(days=14)
+def _sujungti(langeliai):
+    """Vienos dienos kelių iškrovimų langeliai → "IT10 ... / DE20 ..." (tušti praleidžiami)."""
+    return " / ".join(v for v in langeliai if v)
 
+def build_plan(conn, start_date, end_date):
+    """
+    Sudaro planavimo pivot lentelę (vilkikai × iškrovimo datos) intervalui [start_date; end_date].
+    Darbo laikų įrašai paimami viena užklausa visam intervalui ir sujungiami su kroviniais
+    pagal (vilkikas, pakrovimo data), o langelių reikšmės formuojamos vektoriškai.
+    Grąžina None, jei intervale nėra iškrovimų.
+    """
     date_list = [
         start_date + datetime.timedelta(days=i)
         for i in range((end_date - start_date).days + 1)
@@ -75,17 +30,14 @@ def show(conn, c):
     # ==============================
     # 4) Paimame visų vilkikų informaciją: numeris, priekaba, vadybininkas
     # ==============================
-    c.execute("SELECT numeris, priekaba, vadybininkas FROM vilkikai ORDER BY numeris")
-    vilkikai_rows = c.fetchall()
+    vilkikai_rows = cache.rows(conn, "vilkikai", "SELECT numeris, priekaba, vadybininkas FROM vilkikai ORDER BY numeris")
     priekaba_map = {row[0]: (row[1] or "") for row in vilkikai_rows}
     vadybininkas_map = {row[0]: (row[2] or "") for row in vilkikai_rows}
 
     # ==============================
     # 5) Iš lentelės "kroviniai" paimame įrašus su iškrovimo data šiame intervale
     # ==============================
-    start_str = start_date.isoformat()
-    end_str = end_date.isoformat()
-    query = f"""
+    query = """
         SELECT
             vilkikas AS vilkikas,
             iskrovimo_salis AS salis,
@@ -93,23 +45,23 @@ def show(conn, c):
             date(iskrovimo_data) AS data,
             date(pakrovimo_data)   AS pak_data
         FROM kroviniai
-        WHERE date(iskrovimo_data) BETWEEN '{start_str}' AND '{end_str}'
+        WHERE date(iskrovimo_data) BETWEEN ? AND ?
           AND iskrovimo_data IS NOT NULL
         ORDER BY vilkikas, date(iskrovimo_data)
     """
-    df = pd.read_sql_query(query, conn)
+    df = pd.read_sql_query(query, conn, params=(start_date.isoformat(), end_date.isoformat()))
 
     if df.empty:
-        st.info("Šiame laikotarpyje nėra planuojamų iškrovimų.")
-        return
+        return None
 
     # ==============================
     # 6) Konvertuojame „salis“ ir „regionas“ į tekstą, sujungiame į „vietos_kodas“
     # ==============================
     df["salis"] = df["salis"].fillna("").astype(str)
     df["regionas"] = df["regionas"].fillna("").astype(str)
+    pak_datos = pd.to_datetime(df["pak_data"])
     df["data"] = pd.to_datetime(df["data"]).dt.date.astype(str)
-    df["pak_data"] = pd.to_datetime(df["pak_data"]).dt.date.astype(str)
+    df["pak_data"] = pak_datos.dt.date.astype(str)
     df["vietos_kodas"] = df["salis"] + df["regionas"]  # pvz. "IT10"
 
     # ==============================
@@ -118,112 +70,71 @@ def show(conn, c):
     # (čia galima papildyti pagal tavo poreikį)
 
     # ==============================
-    # 8) Sukuriame papildomą DataFrame, kad būtų galima padaryti pivot lentelę
-    # ==============================
-    df_last = df.copy()
+    # 8) Iš "vilkiku_darbo_laikai" viena užklausa paimame įrašus (po vieną porai)
+    #    visoms pakrovimo datoms ir prijungiame prie krovinių pagal (vilkikas, pak_data).
+    #    Reikšmės paverčiamos tekstu SQL pusėje (NULL → "").
+    # ==============================
+    darbo_cols = ["vilkikas", "pak_data", "ikr_laikas", "bdl", "ldl", "sa"]
+    trucks = df["vilkikas"].dropna().unique().tolist()
+    if trucks and pak_datos.notna().any():
+        placeholders = ", ".join("?" for _ in trucks)
+        darbo = pd.read_sql_query(f"""
+            SELECT vilkiko_numeris AS vilkikas,
+                   data AS pak_data,
+                   COALESCE(CAST(iskrovimo_laikas AS TEXT), '') AS ikr_laikas,
+                   COALESCE(CAST(darbo_laikas AS TEXT), '')     AS bdl,
+                   COALESCE(CAST(likes_laikas AS TEXT), '')     AS ldl,
+                   COALESCE(CAST(sa AS TEXT), '')               AS sa
+            FROM vilkiku_darbo_laikai
+            WHERE vilkiko_numeris IN ({placeholders})
+              AND data BETWEEN ? AND ?
+        """, conn, params=trucks + [pak_datos.min().date().isoformat(), pak_datos.max().date().isoformat()])
+    else:
+        darbo = pd.DataFrame(columns=darbo_cols)
+
+    df_last = df.merge(darbo, on=["vilkikas", "pak_data"], how="left")
+    df_last[darbo_cols[2:]] = df_last[darbo_cols[2:]].fillna("")
 
     # ==============================
-    # 9) Iš "vilkiku_darbo_laikai" paimame papildomus laukus pagal pakrovimo datą
+    # 9) Formuojame langelio reikšmę: "vieta iškr.laikas BDL LDL" (trūkstamos reikšmės → "--")
     # ==============================
-    papildomi_map = {}
-    for _, row in df_last.iterrows():
-        v = row["vilkikas"]
-        pak_d = row["pak_data"]
-        rc = c.execute(
-            """
-            SELECT iskrovimo_laikas, darbo_laikas, likes_laikas
-            FROM vilkiku_darbo_laikai
-            WHERE vilkiko_numeris = ? AND data = ?
-            ORDER BY id DESC LIMIT 1
-            """,
-            (v, pak_d)
-        ).fetchone()
-
-        if rc:
-            ikr_laikas, bdl, ldl = rc
-        else:
-            ikr_laikas, bdl, ldl = None, None, None
-
-        if ikr_laikas is None or (isinstance(ikr_laikas, float) and pd.isna(ikr_laikas)):
-            ikr_laikas = ""
-        else:
-            ikr_laikas = str(ikr_laikas)
-
-        if bdl is None or (isinstance(bdl, float) and pd.isna(bdl)):
-            bdl = ""
-        else:
-            bdl = str(bdl)
-
-        if ldl is None or (isinstance(ldl, float) and pd.isna(ldl)):
-            ldl = ""
-        else:
-            ldl = str(ldl)
-
-        papildomi_map[(v, row["data"])] = {
-            "ikr_laikas": ikr_laikas,
-            "bdl":         bdl,
-            "ldl":         ldl
-        }
-
-    # ==============================
-    # 10) Funkcija formuoti langelio reikšmę
-    # ==============================
-    def make_cell(vilk, iskr_data, vieta):
-        if not vieta:
-            return ""
-        info = papildomi_map.get((vilk, iskr_data), {})
-        parts = [vieta]
-        ikr = info.get("ikr_laikas", "")
-        parts.append(ikr if ikr else "--")
-        bdl_val = info.get("bdl", "")
-        parts.append(bdl_val if bdl_val else "--")
-        ldl_val = info.get("ldl", "")
-        parts.append(ldl_val if ldl_val else "--")
-        return " ".join(parts)
-
-    df_last["cell_val"] = df_last.apply(
-        lambda r: make_cell(r["vilkikas"], r["data"], r["vietos_kodas"]),
-        axis=1
+    def or_dash(col):
+        return df_last[col].where(df_last[col] != "", "--")
+
+    cell_val = (
+        df_last["vietos_kodas"] + " " + or_dash("ikr_laikas") + " " + or_dash("bdl") + " " + or_dash("ldl")
     )
+    df_last["cell_val"] = cell_val.where(df_last["vietos_kodas"] != "", "")
 
     # ==============================
-    # 11) Sukuriame pivot lentelę
+    # 10) Sukuriame pivot lentelę. Vilkikas tą pačią dieną gali turėti kelis iškrovimus,
+    #     todėl tos pačios dienos langeliai sujungiami per " / " (iškrovimo datos tvarka)
     # ==============================
-    pivot_df = df_last.pivot(
+    pivot_df = df_last.pivot_table(
         index="vilkikas",
         columns="data",
-        values="cell_val"
+        values="cell_val",
+        aggfunc=_sujungti
     )
 
     # ==============================
-    # 12) Užtikriname, kad stulpeliai atitiktų visas datas intervale
+    # 11) Užtikriname, kad stulpeliai atitiktų visas datas intervale
     # ==============================
     pivot_df = pivot_df.reindex(columns=date_strs, fill_value="")
 
     # ==============================
-    # 13) Filtruojame eilutes: tik vilkikai, turintys įrašą
+    # 12) Filtruojame eilutes: tik vilkikai, turintys įrašą
     # ==============================
     pivot_df = pivot_df.reindex(index=df_last["vilkikas"].unique(), fill_value="")
 
     # ==============================
-    # 14) Paimame SA iš "vilkiku_darbo_laikai"
+    # 13) SA imamas iš pirmojo vilkiko krovinio (pagal iškrovimo datą) darbo laikų įrašo
     # ==============================
-    sa_map = {}
-    for v in pivot_df.index:
-        pak_d = df_last.loc[df_last["vilkikas"] == v, "pak_data"].values[0]
-        row = c.execute(
-            """
-            SELECT sa
-            FROM vilkiku_darbo_laikai
-            WHERE vilkiko_numeris = ? AND data = ?
-            ORDER BY id DESC LIMIT 1
-            """,
-            (v, pak_d)
-        ).fetchone()
-        sa_map[v] = row[0] if row and row[0] is not None else ""
+    pirmieji = df_last.drop_duplicates("vilkikas")
+    sa_map = dict(zip(pirmieji["vilkikas"], pirmieji["sa"]))
 
     # ==============================
-    # 15) Sukuriame indekso pavadinimą (Vilkikas/Priekaba Vadybininkas SA)
+    # 14) Sukuriame indekso pavadinimą (Vilkikas/Priekaba Vadybininkas SA)
     # ==============================
     combined_index = []
     for v in pivot_df.index:
@@ -243,11 +154,74 @@ def show(conn, c):
     pivot_df.index.name = "Vilkikas/Priekaba Vadybininkas SA"
 
     # ==============================
-    # 16) Užpildome visus likusius NaN/None kaip tuščias eilutes
+    # 15) Užpildome visus likusius NaN/None kaip tuščias eilutes
+    # ==============================
+    return pivot_df.fillna("")
+
+def show(conn, c):
+    """
+    Pagrindinė planavimo modulio funkcija.
+    Leidžia pasirinkti ekspedicijos grupę, rodo vilkikų grafiką pagal krovinio ir darbo laikų lenteles.
+    Visa logika vyksta Streamlit lange.
+    """
+    st.title("DISPO – Planavimas")
+
+    # ==============================
+    # 1) CSS stilius lentelės atvaizdavimui su horizontaliniu skrolu
     # ==============================
-    pivot_df = pivot_df.fillna("")
+    st.markdown("""
+    <style>
+      .scroll-container {
+        overflow-x: auto;
+      }
+      table {
+        border-collapse: collapse;
+        width: 100%;
+        white-space: nowrap;
+      }
+      th, td {
+        border: 1px solid #ddd;
+        padding: 4px;
+        vertical-align: top;
+        text-align: center;
+      }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # ==============================
+    # 2) Užkrauname visas ekspedicijos grupes (id, numeris, pavadinimas)
+    # ==============================
+    grupes = cache.rows(conn, "grupes", "SELECT id, numeris, pavadinimas FROM grupes ORDER BY numeris")  # [(id, numeris, pavadinimas), ...]
+
+    group_options = ["Visi"] + [f"{numeris} – {pavadinimas}" for _, numeris, pavadinimas in grupes]
+    selected = st.selectbox("Pasirinkti ekspedicijos grupę", group_options)
+
+    # ==============================
+    # 3) Apskaičiuojame datų intervalą: nuo vakar iki dviejų savaičių į priekį
+    # ==============================
+    today = datetime.date.today()
+    start_date = today - datetime.timedelta(days=1)
+    end_date = today + datetime.timedelta(days=14)
+
+
+    # ==============================
+    # 4–15) Sudarome planavimo lentelę (skaitoma per atskirą telkinio prisijungimą,
+    #       kad neužimtų sesijos prisijungimo, kol kiti įrašinėja). Lentelė bendra visoms
+    #       sesijoms (cache.view): tam pačiam intervalui ji skaičiuojama vieną kartą,
+    #       kol nepasikeičia krovinių, darbo laikų ar vilkikų duomenys
+    # ==============================
+    db_file = database_file(conn)
+
+    def skaiciuoti():
+        with get_pool(db_file).reader() as rconn:
+            return build_plan(rconn, start_date, end_date)
+
+    pivot_df = cache.view("planavimas", PLANO_LENTELES, (start_date, end_date), skaiciuoti)
+    if pivot_df is None:
+        st.info("Šiame laikotarpyje nėra planuojamų iškrovimų.")
+        return
 
     # ==============================
-    # 17) Atvaizduojame su st.dataframe, kad būtų interaktyvus ir galima rūšiuoti paspaudus ant datos
+    # 16) Atvaizduojame su st.dataframe, kad būtų interaktyvus ir galima rūšiuoti paspaudus ant datos
     # ==============================
     st.dataframe(pivot_df, use_container_width=True)
@@ -2,7 +2,6 @@
 modulis: priekabos.py
 
 Pagrindinė funkcija `show` suteikia Streamlit aplinkoje:
-- Priekabų lentelės struktūros užtikrinimą (ALTER TABLE prireikus).
 - Priekabų peržiūrą, filtravimą, naujų įrašų kūrimą ir esamų redagavimą.
 - Ryšį su vilkikai moduliu (priskirtų vilkikų atvaizdavimas).
 - CSV eksporto galimybę.
@@ -12,19 +11,68 @@ import streamlit as st
 import pandas as pd
 from datetime import date
 
+import cache
+from modules.export import show_export
+from modules.grid import show_grid
+
+# Priekabų sąrašo užklausa: priskirtas vilkikas paimamas toje pačioje užklausoje,
+# todėl filtravimas ir puslapiavimas vyksta duomenų bazėje
+SARASO_UZKLAUSA = """
+    SELECT
+        p.id,
+        p.numeris,
+        p.priekabu_tipas,
+        p.marke AS "Brand",
+        p.pagaminimo_metai AS "First registration date",
+        p.tech_apziura,
+        p.draudimas AS "Insurance expiry date",
+        COALESCE((SELECT v.numeris FROM vilkikai AS v WHERE v.priekaba = p.numeris LIMIT 1), '') AS "Assigned truck"
+    FROM priekabos AS p
+"""
+
+def uzimtos_priekabos(conn):
+    """
+    Priekabų užimtumas {priekabos numeris: vilkiko numeris} viena sugrupuota užklausa.
+    Jei priekaba įrašyta keliems vilkikams, grąžinamas pirmasis (mažiausias id).
+    Rezultatas laikomas bendrame podėlyje ir atnaujinamas po cache.bump("vilkikai").
+    """
+    return {
+        priekaba: vilkikas
+        for priekaba, vilkikas, _ in cache.rows(
+            conn, "vilkikai",
+            """SELECT priekaba, numeris, MIN(id) FROM vilkikai
+               WHERE COALESCE(priekaba, '') != '' GROUP BY priekaba"""
+        )
+    }
+
+def sukeisti_priekabas(c, vilkikas, priekaba):
+    """
+    Priskiria priekabą vilkikui. Jei ji buvo kito vilkiko, tas vilkikas gauna
+    šio vilkiko ankstesnę priekabą (sukeitimas). Tuščia priekaba tik atkabina esamą.
+    Neįsipareigoja (commit) – kviečiantysis įrašo pakeitimus vienoje transakcijoje
+    kartu su kitais vilkiko pakeitimais.
+    """
+    cur = c.execute("SELECT priekaba FROM vilkikai WHERE numeris = ?", (vilkikas,)).fetchone()
+    cur_priekaba = cur[0] if cur and cur[0] else ""
+    if priekaba:
+        c.execute(
+            "UPDATE vilkikai SET priekaba = ? WHERE priekaba = ? AND numeris != ?",
+            (cur_priekaba, priekaba, vilkikas)
+        )
+    c.execute("UPDATE vilkikai SET priekaba = ? WHERE numeris = ?", (priekaba or "", vilkikas))
+
 def show(conn, c):
     """
     Rodo priekabų valdymo modulį Streamlit lange.
 
     Funkcijos eiga:
-    1) Užtikrinami visi reikalingi stulpeliai lentelėje `priekabos`.
-    2) Ruošiami duomenys dropdown formoms (vilkikų sąrašas).
-    3) Nustatoma Streamlit sesijos būsena.
-    4) Pagal būseną rodomas:
+    1) Lentelės `priekabos` struktūra jau užtikrinta per db.migrate().
+    2) Nustatoma Streamlit sesijos būsena.
+    3) Pagal būseną rodomas:
        a) Redagavimo forma (kai pasirenkama egzistuojanti priekaba),
        b) Įvedimo forma (kai paspaustas "Pridėti naują"),
        c) Lentelės rodinys su filtravimo ir CSV eksporto galimybėmis.
-    5) Duomenų įrašai arba atnaujinimai saugomi DB per `conn` ir `c`.
+    4) Duomenų įrašai arba atnaujinimai saugomi DB per `conn` ir `c`.
 
     Args:
         conn (sqlite3.Connection): Atidarytas SQLite prisijungimas.
@@ -32,25 +80,9 @@ def show(conn, c):
     """
     st.title("Trailer management")
 
-    # 1) Užtikriname, kad lentelėje 'priekabos' egzistuotų visi reikiami stulpeliai
-    existing = [r[1] for r in c.execute("PRAGMA table_info(priekabos)").fetchall()]
-    extras = {
-        'priekabu_tipas': 'TEXT',
-        'numeris': 'TEXT',
-        'marke': 'TEXT',
-        'pagaminimo_metai': 'TEXT',
-        'tech_apziura': 'TEXT',
-        'draudimas': 'TEXT'
-    }
-    for col, typ in extras.items():
-        if col not in existing:
-            c.execute(f"ALTER TABLE priekabos ADD COLUMN {col} {typ}")
-    conn.commit()
-
-    # 2) Paruošiame duomenis dropdown meniu: vilkikų sąrašą
-    vilkikai_list = [r[0] for r in c.execute("SELECT numeris FROM vilkikai").fetchall()]
+    # 1) Lentelės 'priekabos' stulpeliai užtikrinami vieną kartą per db.migrate()
 
-    # 3) Inicializuojame sesijos būseną redagavimui/pridėjimui
+    # 2) Inicializuojame sesijos būseną redagavimui/pridėjimui
     if 'selected_priek' not in st.session_state:
         st.session_state.selected_priek = None
 
@@ -70,12 +102,12 @@ def show(conn, c):
         """Pasirenkama esama priekaba redagavimui pagal ID."""
         st.session_state.selected_priek = id
 
-    # 4) "Add trailer" button
+    # 3) "Add trailer" button
     st.button("➕ Add trailer", on_click=new, use_container_width=True)
 
     sel = st.session_state.selected_priek
 
-    # 5) Redagavimo rodinys (kai pasirenkama egzistuojanti priekaba)
+    # 4) Redagavimo rodinys (kai pasirenkama egzistuojanti priekaba)
     if sel not in (None, 0):
         df_sel = pd.read_sql_query(
             "SELECT * FROM priekabos WHERE id = ?", conn, params=(sel,)
@@ -112,10 +144,7 @@ def show(conn, c):
             )
 
             # 5.3) Priskirtas vilkikas (tik skaitomas, negalima keisti čia)
-            assigned_vilk = c.execute(
-                "SELECT numeris FROM vilkikai WHERE priekaba = ?", (row['numeris'],)
-            ).fetchone()
-            pv = assigned_vilk[0] if assigned_vilk else ""
+            pv = uzimtos_priekabos(conn).get(row['numeris'], "")
             st.text_input("Assigned truck", value=pv, disabled=True)
 
             # Veiksmai mygtukais
@@ -138,13 +167,14 @@ def show(conn, c):
                     )
                 )
                 conn.commit()
+                cache.bump("priekabos")
                 st.success("✅ Changes saved.")
                 clear_sel()
             except Exception as e:
                 st.error(f"❌ Error: {e}")
         return
 
-    # 6) Naujos priekabos įvedimo forma
+    # 5) Naujos priekabos įvedimo forma
     if sel == 0:
         with st.form("new_form", clear_on_submit=True):
             priekabu_tipas_opts = ["", "Curtain", "Box trailer", "Reefer", "Cistern"]
@@ -177,69 +207,26 @@ def show(conn, c):
                         )
                     )
                     conn.commit()
+                    cache.bump("priekabos")
                     st.success("✅ Trailer saved.")
                     clear_sel()
                 except Exception as e:
                     st.error(f"❌ Error: {e}")
         return
 
-    # 7) Priekabų sąrašas lentelės pavidalu su filtravimo ir CSV eksporto galimybe
-    df = pd.read_sql_query("SELECT * FROM priekabos", conn)
-    if df.empty:
+    # 6) Priekabų sąrašas lentelės pavidalu (puslapiais, žr. modules/grid.py) su filtravimu ir CSV eksportu
+    if not c.execute("SELECT 1 FROM priekabos LIMIT 1").fetchone():
         st.info("ℹ️ No trailers.")
         return
 
-    # 7.1) None → tuščias string
-    df = df.fillna('')
-    df_disp = df.copy()
-    df_disp.rename(
-        columns={
-            'marke': 'Brand',
-            'pagaminimo_metai': 'First registration date',
-            'draudimas': 'Insurance expiry date'
-        },
-        inplace=True
-    )
-
-    # 7.2) Pridedame stulpelį "Priskirtas vilkikas"
-    assigned_list = []
-    for _, row in df.iterrows():
-        prn = row['numeris']
-        assigned_vilk = c.execute(
-            "SELECT numeris FROM vilkikai WHERE priekaba = ?", (prn,)
-        ).fetchone()
-        assigned_list.append(assigned_vilk[0] if assigned_vilk else "")
-    df_disp['Assigned truck'] = assigned_list
-
-    # 7.3) Filtravimo placeholder'ai (be headerių)
-    filter_cols = st.columns(len(df_disp.columns) + 1)
-    for i, col in enumerate(df_disp.columns):
-        filter_cols[i].text_input(label="", placeholder=col, key=f"f_{col}")
-    filter_cols[-1].write("")
-
-    df_filt = df_disp.copy()
-    for col in df_disp.columns:
-        val = st.session_state.get(f"f_{col}", "")
-        if val:
-            df_filt = df_filt[df_filt[col].astype(str).str.lower().str.startswith(val.lower())]
-
-    # 7.4) Display rows with edit buttons
-    for _, row in df_filt.iterrows():
-        row_cols = st.columns(len(df_filt.columns) + 1)
-        for i, col in enumerate(df_filt.columns):
-            row_cols[i].write(row[col])
-        row_cols[-1].button(
-            "✏️",
-            key=f"edit_{row['id']}",
-            on_click=edit,
-            args=(row['id'],)
-        )
+    # 7.1) Filtravimo placeholder'ai (prefix matching) ir lentelė su eilutės pasirinkimu redagavimui
+    pasirinkta = show_grid(conn, "priekabos", SARASO_UZKLAUSA, match="prefix")
+    if pasirinkta is not None:
+        edit(pasirinkta)
+        st.rerun()
 
-    # 7.5) CSV export
-    csv = df.to_csv(index=False, sep=';').encode('utf-8')
-    st.download_button(
-        label="💾 Download CSV",
-        data=csv,
-        file_name="priekabos.csv",
-        mime="text/csv"
+    # 7.2) CSV/XLSX export – failas generuojamas tik paspaudus mygtuką (žr. modules/export.py)
+    show_export(
+        conn, "priekabos", "SELECT * FROM priekabos", "priekabos", order_by="id",
+        date_col="tech_apziura", date_label="Tech. apžiūra", label="💾 Download",
     )
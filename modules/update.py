@@ -4,47 +4,51 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, date
 
+import cache
+
 # ==============================
-# 0) CSS tam, kad visi headeriai ir reikšmės nebūtų lūžinami,
+# 0) CSS (render_styles) tam, kad visi headeriai ir reikšmės nebūtų lūžinami,
 #    o visa eilutė būtų viena horizontali linija su skrolu,
 #    vilkiko numeriams +2 font-size padidinimas
 # ==============================
-st.markdown("""
-    <style>
-      /* Apgaubti visą atvaizduojamą turinį scroll-container div'u,
-         kurio viduje galima slinkti horizontaliai */
-      .scroll-container {
-        overflow-x: auto;
-      }
-      /* Visa vidinė eilutė neturi lūžti */
-      .scroll-container * {
-        white-space: nowrap !important;
-      }
-      /* Bendras smulkus fontas */
-      th, td, .stTextInput>div>div>input, .stDateInput>div>div>input {
-        font-size: 12px !important;
-      }
-      .tiny {
-        font-size: 10px;
-        color: #888;
-      }
-      .block-container {
-        padding-top: 0.5rem !important;
-      }
-      /* Paslėpti selectbox rodykles */
-      div[role="option"] svg,
-      div[role="combobox"] svg,
-      span[data-baseweb="select"] svg {
-        display: none !important;
-      }
-      /* Praplečiame ir paryškiname vilkiko numerio langelį, padidiname fontą +2 */
-      .vilk-cell {
-        background-color: #f0f8ff;
-        font-weight: bold;
-        font-size: 14px !important;
-      }
-    </style>
-""", unsafe_allow_html=True)
+def render_styles():
+    """Puslapio stiliai; kviečiami iš main.py prieš show(), o ne importuojant modulį."""
+    st.markdown("""
+        <style>
+          /* Apgaubti visą atvaizduojamą turinį scroll-container div'u,
+             kurio viduje galima slinkti horizontaliai */
+          .scroll-container {
+            overflow-x: auto;
+          }
+          /* Visa vidinė eilutė neturi lūžti */
+          .scroll-container * {
+            white-space: nowrap !important;
+          }
+          /* Bendras smulkus fontas */
+          th, td, .stTextInput>div>div>input, .stDateInput>div>div>input {
+            font-size: 12px !important;
+          }
+          .tiny {
+            font-size: 10px;
+            color: #888;
+          }
+          .block-container {
+            padding-top: 0.5rem !important;
+          }
+          /* Paslėpti selectbox rodykles */
+          div[role="option"] svg,
+          div[role="combobox"] svg,
+          span[data-baseweb="select"] svg {
+            display: none !important;
+          }
+          /* Praplečiame ir paryškiname vilkiko numerio langelį, padidiname fontą +2 */
+          .vilk-cell {
+            background-color: #f0f8ff;
+            font-weight: bold;
+            font-size: 14px !important;
+          }
+        </style>
+    """, unsafe_allow_html=True)
 
 def format_time_str(input_str):
     digits = "".join(filter(str.isdigit, str(input_str)))
@@ -78,45 +82,82 @@ def relative_time(created_str):
     minutes = (total_seconds % 3600) // 60
     return f"{hours:02d}:{minutes:02d}"
 
+# 'vilkiku_darbo_laikai' įrašas (vilkikas, pakrovimo data) porai: naujas įterpiamas, esamas atnaujinamas
+# (UNIQUE (vilkiko_numeris, data), žr. db._migracija_9; kiekvieną versiją trigeris įrašo į žurnalą)
+ISSAUGOTI_SQL = """
+    INSERT INTO vilkiku_darbo_laikai
+    (vilkiko_numeris, data, sa, darbo_laikas, likes_laikas, created_at,
+     pakrovimo_statusas, pakrovimo_laikas, pakrovimo_data,
+     iskrovimo_statusas, iskrovimo_laikas, iskrovimo_data, komentaras,
+     ats_transporto_vadybininkas, ats_ekspedicijos_vadybininkas,
+     trans_grupe, eksp_grupe)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (vilkiko_numeris, data) DO UPDATE SET
+        sa=excluded.sa, darbo_laikas=excluded.darbo_laikas, likes_laikas=excluded.likes_laikas,
+        created_at=excluded.created_at,
+        pakrovimo_statusas=excluded.pakrovimo_statusas, pakrovimo_laikas=excluded.pakrovimo_laikas,
+        pakrovimo_data=excluded.pakrovimo_data,
+        iskrovimo_statusas=excluded.iskrovimo_statusas, iskrovimo_laikas=excluded.iskrovimo_laikas,
+        iskrovimo_data=excluded.iskrovimo_data,
+        komentaras=excluded.komentaras,
+        ats_transporto_vadybininkas=excluded.ats_transporto_vadybininkas,
+        ats_ekspedicijos_vadybininkas=excluded.ats_ekspedicijos_vadybininkas,
+        trans_grupe=excluded.trans_grupe, eksp_grupe=excluded.eksp_grupe
+"""
+
+def palyginimui(laukai):
+    """
+    Redaguojamų laukų reikšmės palyginimui su įkeltomis: laikai suvienodinami per format_time_str,
+    kad įvestas „0830“ nebūtų laikomas pakeitimu, kai įkeltas rodomas kaip „08:30“.
+    """
+    sa, bdl, ldl, pk_status, pk_laikas, pk_data, ikr_status, ikr_laikas, ikr_data, komentaras = laukai
+    return (sa, bdl, ldl, pk_status, format_time_str(pk_laikas), pk_data,
+            ikr_status, format_time_str(ikr_laikas), ikr_data, komentaras)
+
+def issaugoti(conn, c, eilutes):
+    """
+    Įrašo eilutes viena transakcija, vienu executemany (INSERT ... ON CONFLICT DO UPDATE).
+    eilutes – [(vilkikas, pakrovimo data, laukai, transporto vadyb., ekspedicijos vadyb.)],
+    laukai – 10 redaguojamų reikšmių ta pačia tvarka kaip palyginimui().
+    """
+    now_str = datetime.now().isoformat()
+    reiksmes = []
+    for vilkikas, data, laukai, trans_vad, eksp_vad in eilutes:
+        sa, bdl, ldl, pk_status, pk_laikas, pk_data, ikr_status, ikr_laikas, ikr_data, komentaras = laukai
+        reiksmes.append((
+            vilkikas, data, sa, bdl, ldl, now_str,
+            pk_status, pk_laikas, pk_data.isoformat(),
+            ikr_status, ikr_laikas, ikr_data.isoformat(),
+            komentaras, trans_vad, eksp_vad,
+            "", "",
+        ))
+    try:
+        c.executemany(ISSAUGOTI_SQL, reiksmes)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    cache.bump("vilkiku_darbo_laikai")
+
 def show(conn, c):
     st.title("Padėties atnaujinimai")
 
     # ==============================
-    # 1) Užtikriname, kad lentelėje "vilkiku_darbo_laikai" būtų visi stulpeliai
+    # 1) Lentelės "vilkiku_darbo_laikai" stulpeliai užtikrinami vieną kartą per db.migrate()
     # ==============================
-    existing = [r[1] for r in c.execute("PRAGMA table_info(vilkiku_darbo_laikai)").fetchall()]
-    extra_cols = [
-        ("pakrovimo_statusas",     "TEXT"),
-        ("pakrovimo_laikas",       "TEXT"),
-        ("pakrovimo_data",         "TEXT"),
-        ("iskrovimo_statusas",     "TEXT"),
-        ("iskrovimo_laikas",       "TEXT"),
-        ("iskrovimo_data",         "TEXT"),
-        ("komentaras",             "TEXT"),
-        ("sa",                     "TEXT"),
-        ("created_at",             "TEXT"),
-        ("ats_transporto_vadybininkas", "TEXT"),
-        ("ats_ekspedicijos_vadybininkas","TEXT"),
-        ("trans_grupe",            "TEXT"),
-        ("eksp_grupe",             "TEXT"),
-    ]
-    for col, coltype in extra_cols:
-        if col not in existing:
-            c.execute(f"ALTER TABLE vilkiku_darbo_laikai ADD COLUMN {col} {coltype}")
-    conn.commit()
 
     # ==============================
     # 2) Filtras: Transporto vadybininkas ir Transporto grupė (vienoje eilutėje)
     # ==============================
     # Gauname visus unikalius vadybininkus (pilną vardą, kuris įrašytas vilkikai.vadybininkas)
-    vadybininkai = [
-        r[0] for r in c.execute(
-            "SELECT DISTINCT vadybininkas FROM vilkikai WHERE vadybininkas IS NOT NULL AND vadybininkas != ''"
-        ).fetchall()
-    ]
+    # (žinyninės lentelės imamos iš bendro podėlio, žr. cache.py)
+    vadybininkai = cache.column(
+        conn, "vilkikai",
+        "SELECT DISTINCT vadybininkas FROM vilkikai WHERE vadybininkas IS NOT NULL AND vadybininkas != ''"
+    )
 
     # Gauname grupių sąrašą pagal 'numeris' (ne pavadinimą!), nes darbuotojų lentelėje grupe = numeris
-    grupe_list = [r[0] for r in c.execute("SELECT numeris FROM grupes").fetchall()]
+    grupe_list = cache.column(conn, "grupes", "SELECT numeris FROM grupes")
 
     col1, col2 = st.columns(2)
     vadyb         = col1.selectbox("Transporto vadybininkas", [""] + vadybininkai, index=0)
@@ -125,20 +166,22 @@ def show(conn, c):
     # ==============================
     # 3) Pasirenkame vilkikus pagal filtrus
     # ==============================
-    # Pataisyta JOIN užklausa, kad surastų darbuotoją pagal pilną vardą ("vardas pavardė")
-    vilkikai_info = c.execute("""
-        SELECT v.numeris, d.grupe
+    # Pataisyta JOIN užklausa, kad surastų darbuotoją pagal pilną vardą ("vardas pavardė").
+    # Vadybininkas paimamas toje pačioje užklausoje, kad nereikėtų atskiros užklausos kiekvienam vilkikui.
+    vilkikai_info = cache.rows(conn, ("vilkikai", "darbuotojai"), """
+        SELECT v.numeris, v.vadybininkas, d.grupe
         FROM vilkikai v
         LEFT JOIN darbuotojai d
           ON v.vadybininkas = (d.vardas || ' ' || d.pavarde)
-    """).fetchall()
+    """)
+
+    # Vilkikas → transporto vadybininkas (naudojamas filtrui ir išsaugojimui)
+    vilk_vad_map = {numeris: vad for numeris, vad, _ in vilkikai_info}
 
     vilkikai = []
-    for numeris, gr in vilkikai_info:
+    for numeris, vad, gr in vilkikai_info:
         # Filtruojame pagal vadybininką, jei pasirinktas
-        if vadyb and c.execute(
-            "SELECT vadybininkas FROM vilkikai WHERE numeris = ?", (numeris,)
-        ).fetchone()[0] != vadyb:
+        if vadyb and vad != vadyb:
             continue
         # Filtruojame pagal grupę (darbuotojų lentelėje saugomas 'grupe' = grupės numeris)
         if grupe_filtras and (gr or "") != grupe_filtras:
@@ -150,43 +193,41 @@ def show(conn, c):
         return
 
     # ==============================
-    # 4) Paimame kroviniai iš lentelės "kroviniai"
+    # 4) Paimame kroviniai iš lentelės "kroviniai" kartu su
+    #    "vilkiku_darbo_laikai" įrašu (vienas kiekvienai (vilkikas, pakrovimo data) porai)
     # ==============================
     today = date.today()
     placeholders = ", ".join("?" for _ in vilkikai)
     query = f"""
         SELECT
-            id, klientas, uzsakymo_numeris,
-            pakrovimo_data, iskrovimo_data,
-            vilkikas, priekaba,
-            pakrovimo_laikas_nuo, pakrovimo_laikas_iki,
-            iskrovimo_laikas_nuo, iskrovimo_laikas_iki,
-            pakrovimo_salis, pakrovimo_regionas,
-            iskrovimo_salis, iskrovimo_regionas,
-            kilometrai, ekspedicijos_vadybininkas
-        FROM kroviniai
-        WHERE vilkikas IN ({placeholders}) AND pakrovimo_data >= ?
-        ORDER BY vilkikas ASC, pakrovimo_data ASC
+            k.id, k.klientas, k.uzsakymo_numeris,
+            k.pakrovimo_data, k.iskrovimo_data,
+            k.vilkikas, k.priekaba,
+            k.pakrovimo_laikas_nuo, k.pakrovimo_laikas_iki,
+            k.iskrovimo_laikas_nuo, k.iskrovimo_laikas_iki,
+            k.pakrovimo_salis, k.pakrovimo_regionas,
+            k.iskrovimo_salis, k.iskrovimo_regionas,
+            k.kilometrai, k.ekspedicijos_vadybininkas,
+            d.sa, d.darbo_laikas, d.likes_laikas, d.created_at,
+            d.pakrovimo_statusas, d.pakrovimo_laikas, d.pakrovimo_data,
+            d.iskrovimo_statusas, d.iskrovimo_laikas, d.iskrovimo_data,
+            d.komentaras, d.ats_transporto_vadybininkas, d.ats_ekspedicijos_vadybininkas,
+            d.trans_grupe, d.eksp_grupe,
+            d.id
+        FROM kroviniai k
+        LEFT JOIN vilkiku_darbo_laikai d
+          ON d.vilkiko_numeris = k.vilkikas
+         AND d.data = k.pakrovimo_data
+        WHERE k.vilkikas IN ({placeholders}) AND k.pakrovimo_data >= ?
+        ORDER BY k.vilkikas ASC, k.pakrovimo_data ASC
     """
     params = list(vilkikai) + [str(today)]
     kroviniai = c.execute(query, params).fetchall()
 
     # ==============================
-    # 5) Žemėlapiai transporto ir ekspedicijos grupėms
+    # 5) Transporto ir ekspedicijos grupės (trans_grupe, eksp_grupe) nebenaudojamos,
+    #    todėl atskiros jų užklausos nebevykdomos
     # ==============================
-    # Pataisyta JOIN sąlyga: darbuotojų vardas+vardas su vilkikai.vadybininkas
-    vilk_grupes = dict(c.execute("""
-        SELECT v.numeris, d.grupe
-        FROM vilkikai v
-        LEFT JOIN darbuotojai d
-          ON v.vadybininkas = (d.vardas || ' ' || d.pavarde)
-    """).fetchall())
-    eksp_grupes = dict(c.execute("""
-        SELECT k.id, d.grupe
-        FROM kroviniai k
-        LEFT JOIN darbuotojai d
-          ON k.ekspedicijos_vadybininkas = (d.vardas || ' ' || d.pavarde)
-    """).fetchall())
 
     # ==============================
     # 6) Stulpelių proporcijos (vienetai proporcingi)
@@ -239,7 +280,13 @@ def show(conn, c):
 
     # ==============================
     # 7) Rodyti antraštę su tooltips ir scroll
+    #    (virš jos – „Išsaugoti visus“ mygtukas, užpildomas po eilučių, žr. 10)
     # ==============================
+    veiksmai = st.container()
+    # Pranešimas apie ankstesniame perkrovime atliktą išsaugojimą (žr. 8.25 ir 10)
+    pranesimas = st.session_state.pop("update_pranesimas", None)
+    if pranesimas:
+        veiksmai.success(pranesimas)
     st.markdown("<div class='scroll-container'>", unsafe_allow_html=True)
     cols = st.columns(col_widths)
     for i, (abbr, full) in enumerate(headers):
@@ -247,18 +294,13 @@ def show(conn, c):
 
     # ==============================
     # 8) Rodyti kiekvieną krovinį – vienoje eilutėje
+    #    (eilutės, kurių valdiklių reikšmės skiriasi nuo įkeltų, kaupiamos į pakeistos)
     # ==============================
-    for k in kroviniai:
-        darbo = c.execute("""
-            SELECT sa, darbo_laikas, likes_laikas, created_at,
-                   pakrovimo_statusas, pakrovimo_laikas, pakrovimo_data,
-                   iskrovimo_statusas, iskrovimo_laikas, iskrovimo_data,
-                   komentaras, ats_transporto_vadybininkas, ats_ekspedicijos_vadybininkas,
-                   trans_grupe, eksp_grupe
-            FROM vilkiku_darbo_laikai
-            WHERE vilkiko_numeris = ? AND data = ?
-            ORDER BY id DESC LIMIT 1
-        """, (k[5], k[3])).fetchone()
+    pakeistos = []
+    for row in kroviniai:
+        k = row[:17]
+        darbo_id = row[32]
+        darbo = row[17:32] if darbo_id is not None else None
 
         if darbo and darbo[7] == "Iškrauta":
             try:
@@ -385,56 +427,40 @@ def show(conn, c):
             "", value=komentaras, key=f"komentaras_{k[0]}", label_visibility="collapsed"
         )
 
-        # 8.24) Išsaugojimo (Save) logika
+        # 8.24) Pakeitimų sekimas: įkeltos (rodytos) reikšmės lyginamos su dabartinėmis
+        pradines = (
+            str(sa), str(bdl), str(ldl), pk_status_options[default_pk_status_idx], formatted_pk, default_pk_date,
+            ikr_status_options[default_ikr_status_idx], formatted_ikr, default_ikr_date, komentaras,
+        )
+        laukai = (
+            sa_in, bdl_in, ldl_in, pk_status_in, pk_laikas_in, pk_data_in,
+            ikr_status_in, ikr_laikas_in, ikr_data_in, komentaras_in,
+        )
+        eilute = (k[5], k[3], laukai, vilk_vad_map.get(k[5]), eksp_vad)
+
+        # 8.25) Išsaugojimo (Save) logika – viena eilutė (įrašoma ir nepakeista). Po įrašymo
+        #       puslapis perkraunamas, kad eilutės ir pakeitimų skaičius būtų nupiešti iš naujų duomenų
         if save:
-            jau_irasas = c.execute("""
-                SELECT id FROM vilkiku_darbo_laikai WHERE vilkiko_numeris = ? AND data = ?
-            """, (k[5], k[3])).fetchone()
-            now_str = datetime.now().isoformat()
-            formatted_pk_date = pk_data_in.isoformat()
-            formatted_ikr_date = ikr_data_in.isoformat()
-
-            if jau_irasas:
-                c.execute("""
-                    UPDATE vilkiku_darbo_laikai
-                    SET sa=?, darbo_laikas=?, likes_laikas=?, created_at=?,
-                        pakrovimo_statusas=?, pakrovimo_laikas=?, pakrovimo_data=?,
-                        iskrovimo_statusas=?, iskrovimo_laikas=?, iskrovimo_data=?,
-                        komentaras=?, ats_transporto_vadybininkas=?, ats_ekspedicijos_vadybininkas=?,
-                        trans_grupe=?, eksp_grupe=?
-                    WHERE id=?
-                """, (
-                    sa_in, bdl_in, ldl_in, now_str,
-                    pk_status_in, pk_laikas_in, formatted_pk_date,
-                    ikr_status_in, ikr_laikas_in, formatted_ikr_date,
-                    komentaras_in,
-                    c.execute("SELECT vadybininkas FROM vilkikai WHERE numeris = ?", (k[5],)).fetchone()[0],
-                    eksp_vad,
-                    "", "",
-                    jau_irasas[0]
-                ))
-            else:
-                c.execute("""
-                    INSERT INTO vilkiku_darbo_laikai
-                    (vilkiko_numeris, data, sa, darbo_laikas, likes_laikas, created_at,
-                     pakrovimo_statusas, pakrovimo_laikas, pakrovimo_data,
-                     iskrovimo_statusas, iskrovimo_laikas, iskrovimo_data, komentaras,
-                     ats_transporto_vadybininkas, ats_ekspedicijos_vadybininkas,
-                     trans_grupe, eksp_grupe)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    k[5], k[3], sa_in, bdl_in, ldl_in, now_str,
-                    pk_status_in, pk_laikas_in, formatted_pk_date,
-                    ikr_status_in, ikr_laikas_in, formatted_ikr_date,
-                    komentaras_in,
-                    c.execute("SELECT vadybininkas FROM vilkikai WHERE numeris = ?", (k[5],)).fetchone()[0],
-                    eksp_vad,
-                    "", ""
-                ))
-            conn.commit()
-            st.success("✅ Išsaugota!")
+            issaugoti(conn, c, [eilute])
+            st.session_state["update_pranesimas"] = "✅ Išsaugota!"
+            st.rerun()
+        elif palyginimui(laukai) != palyginimui(pradines):
+            pakeistos.append(eilute)
 
     # ==============================
     # 9) Uždarome scroll-container div
     # ==============================
     st.markdown("</div>", unsafe_allow_html=True)
+
+    # ==============================
+    # 10) „Išsaugoti visus“: visos pakeistos eilutės įrašomos viena transakcija,
+    #     todėl N eilučių redagavimas kainuoja vieną perkrovimą, o ne N
+    # ==============================
+    with veiksmai:
+        if st.button(f"💾 Išsaugoti pakeitimus ({len(pakeistos)})", key="save_all", use_container_width=True):
+            if pakeistos:
+                issaugoti(conn, c, pakeistos)
+                st.session_state["update_pranesimas"] = f"✅ Išsaugota eilučių: {len(pakeistos)}."
+                st.rerun()
+            else:
+                st.info("Pakeitimų nėra.")
@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 from datetime import date
 
+import cache
+from modules.export import show_export
+from modules.grid import show_grid
+
 TAUTYBES = [
     ("", ""),
     ("Lietuva", "LT"),
@@ -13,29 +17,33 @@ TAUTYBES = [
     ("Lenkija", "PL"),
 ]
 
+# Vairuotojų sąrašo užklausa. Priskirtas vilkikas randamas pagal vardą ir pavardę
+# priskyrimų lentelėje 'vilkiku_vairuotojai' (unikalus indeksas); jei priskirtas –
+# rodoma kadencijos pabaiga, jei ne – atostogų pabaiga (trūkstant datos – „trūksta datos“).
+SARASO_UZKLAUSA = """
+    SELECT
+        id,
+        vardas AS "Vardas",
+        pavarde AS "Pavardė",
+        gimimo_metai AS "Gimimo data",
+        tautybe AS "Tautybė",
+        CASE WHEN vilkikas IS NULL THEN ''
+             ELSE COALESCE(NULLIF(kadencijos_pabaiga, ''), 'trūksta datos') END AS "Kadencijos pabaiga",
+        CASE WHEN vilkikas IS NOT NULL THEN ''
+             ELSE COALESCE(NULLIF(atostogu_pabaiga, ''), 'trūksta datos') END AS "Atostogų pabaiga",
+        COALESCE(vilkikas, '') AS "Priskirtas vilkikas"
+    FROM (
+        SELECT d.*,
+               (SELECT vv.vilkiko_numeris FROM vilkiku_vairuotojai AS vv
+                WHERE vv.vairuotojas = COALESCE(d.vardas, '') || ' ' || COALESCE(d.pavarde, '')) AS vilkikas
+        FROM vairuotojai AS d
+    )
+"""
+
 def show(conn, c):
-    # 1) Užtikrinkime, kad lentelėje 'vairuotojai' egzistuotų visi reikalingi stulpeliai
-    existing = [r[1] for r in c.execute("PRAGMA table_info(vairuotojai)").fetchall()]
-    extras = {
-        "vardas": "TEXT",
-        "pavarde": "TEXT",
-        "gimimo_metai": "TEXT",
-        "tautybe": "TEXT",
-        "kadencijos_pabaiga": "TEXT",
-        "atostogu_pabaiga": "TEXT",
-    }
-    for col, typ in extras.items():
-        if col not in existing:
-            c.execute(f"ALTER TABLE vairuotojai ADD COLUMN {col} {typ}")
-    conn.commit()
+    # 1) Lentelės 'vairuotojai' stulpeliai užtikrinami vieną kartą per db.migrate()
 
-    # 2) Surenkame priskyrimus iš 'vilkikai' modulio:
-    #    sudarome žodyną driver_to_vilk, kad vardas+pavardė → vilkiko numeris
-    driver_to_vilk = {}
-    for numeris, drv_str in c.execute("SELECT numeris, vairuotojai FROM vilkikai").fetchall():
-        if drv_str:
-            for name in drv_str.split(", "):
-                driver_to_vilk[name] = numeris
+    # 2) Priskyrimai tikrinami tik redaguojamam vairuotojui – viena užklausa per 'vilkiku_vairuotojai' indeksą
 
     # 3) Inicijuojame sesijos būseną
     if "selected_vair" not in st.session_state:
@@ -64,7 +72,9 @@ def show(conn, c):
 
         row = df_sel.iloc[0]
         full_name = f"{row['vardas']} {row['pavarde']}"
-        is_assigned = full_name in driver_to_vilk
+        is_assigned = c.execute(
+            "SELECT 1 FROM vilkiku_vairuotojai WHERE vairuotojas = ?", (full_name,)
+        ).fetchone() is not None
 
         with st.form("edit_form", clear_on_submit=False):
             # --- Pagrindiniai laukai ---
@@ -179,6 +189,7 @@ def show(conn, c):
                         )
                     )
                     conn.commit()
+                    cache.bump("vairuotojai")
                     st.success("✅ Pakeitimai išsaugoti.")
                     clear_sel()
                 except Exception as e:
@@ -237,100 +248,26 @@ def show(conn, c):
                         )
                     )
                     conn.commit()
+                    cache.bump("vairuotojai")
                     st.success("✅ Vairuotojas įrašytas.")
                     clear_sel()
                 except Exception as e:
                     st.error(f"❌ Klaida: {e}")
         return
 
-    # 6) Vairuotojų sąrašas
-    df = pd.read_sql_query("SELECT * FROM vairuotojai", conn)
-    if df.empty:
+    # 6) Vairuotojų sąrašas (puslapiais, žr. modules/grid.py)
+    if not c.execute("SELECT 1 FROM vairuotojai LIMIT 1").fetchone():
         st.info("ℹ️ Nėra vairuotojų.")
         return
 
     # 6.1) Mygtukas „➕ Pridėti vairuotoją“ per visą plotį, prieš filtrus
     st.button("➕ Pridėti vairuotoją", on_click=new_vair, use_container_width=True)
 
-    # 6.2) Paruošiame duomenis rodymui: lieka 'id', pildome None → ''
-    df = df.fillna("")
-    df_disp = df[[
-        "id", "vardas", "pavarde", "gimimo_metai", "tautybe",
-        "kadencijos_pabaiga", "atostogu_pabaiga"
-    ]].copy()
-    df_disp.rename(
-        columns={
-            "vardas": "Vardas",
-            "pavarde": "Pavardė",
-            "gimimo_metai": "Gimimo data",
-            "tautybe": "Tautybė",
-            "kadencijos_pabaiga": "Kadencijos pabaiga",
-            "atostogu_pabaiga": "Atostogų pabaiga"
-        },
-        inplace=True,
-    )
-
-    # 6.3) Atnaujiname „Kadencijos pabaiga“ ir „Atostogų pabaiga“ rodinius pagal priskyrimą
-    kad_vals = []
-    atost_vals = []
-    for _, row in df.iterrows():
-        name = f"{row['vardas']} {row['pavarde']}"
-        assigned_vilk = driver_to_vilk.get(name)
-        if assigned_vilk:
-            # Priskirtas → rodyti kadencijos pabaigą arba „trūksta datos“
-            kad_date = row.get("kadencijos_pabaiga", "")
-            kad_vals.append(kad_date if kad_date else "trūksta datos")
-            atost_vals.append("")  # atostogų pabaiga visada tuščia, kai priskirtas
-        else:
-            # Nepriskirtas → rodyti atostogų pabaigą arba „trūksta datos“
-            atost_date = row.get("atostogu_pabaiga", "")
-            atost_vals.append(atost_date if atost_date else "trūksta datos")
-            kad_vals.append("")  # kadencijos pabaiga visada tuščia, kai nepriskirtas
-
-    df_disp["Kadencijos pabaiga"] = kad_vals
-    df_disp["Atostogų pabaiga"] = atost_vals
-
-    # 6.4) Pridedame stulpelį „Priskirtas vilkikas“
-    assigned = []
-    for _, row in df.iterrows():
-        name = f"{row['vardas']} {row['pavarde']}"
-        assigned.append(driver_to_vilk.get(name, ""))
-    df_disp["Priskirtas vilkikas"] = assigned
+    # 6.2) Filtravimo laukai (prefix matching) ir lentelė su eilutės pasirinkimu redagavimui
+    pasirinktas = show_grid(conn, "vairuotojai", SARASO_UZKLAUSA, match="prefix")
+    if pasirinktas is not None:
+        edit_vair(pasirinktas)
+        st.rerun()
 
-    # 6.5) FILTRAVIMO LAUKAI be antraščių virš jų (tik placeholder)
-    filter_cols = st.columns(len(df_disp.columns) + 1)
-    for i, col in enumerate(df_disp.columns):
-        filter_cols[i].text_input(label="", placeholder=col, key=f"f_{col}")
-    filter_cols[-1].write("")  # papildomas tuščias stulpelis filtrui
-
-    df_filt = df_disp.copy()
-    for col in df_disp.columns:
-        val = st.session_state.get(f"f_{col}", "")
-        if val:
-            # Naudojame prefix matching (startswith) vietoje substring:
-            df_filt = df_filt[
-                df_filt[col].astype(str).str.lower().str.startswith(val.lower())
-            ]
-
-    # 6.6) **PAŠALINTA: header blokas po filtrų**, kad nebūtų dubliuojama.
-
-    # 6.7) Lentelės eilutės su redagavimo mygtuku
-    for _, row in df_filt.iterrows():
-        row_cols = st.columns(len(df_filt.columns) + 1)
-        for i, col in enumerate(df_filt.columns):
-            row_cols[i].write(row[col])
-        row_cols[-1].button(
-            "✏️",
-            key=f"edit_{row['id']}",
-            on_click=edit_vair,
-            args=(row["id"],),
-        )
-
-    # 6.8) Eksportas į CSV
-    csv = df.to_csv(index=False, sep=";").encode("utf-8")
-    st.download_button(
-        label="💾 Eksportuoti kaip CSV",
-        data=csv,
-        file_name="vairuotojai.csv",
-        mime="text/csv",
-    )
+    # 6.3) Eksportas į CSV/XLSX – failas generuojamas tik paspaudus mygtuką (žr. modules/export.py)
+    show_export(conn, "vairuotojai", "SELECT * FROM vairuotojai", "vairuotojai", order_by="id")
@@ -2,37 +2,68 @@ import streamlit as st
 import pandas as pd
 from datetime import date
 
+import cache
+from modules.export import show_export
+from modules.grid import show_grid
+from modules.priekabos import uzimtos_priekabos, sukeisti_priekabas
+
+# Trucks list: display columns are built in SQL (drivers from the 'vilkiku_vairuotojai'
+# assignment table, days left until inspection/insurance), so filters and paging run in the database
+SARASO_UZKLAUSA = """
+    SELECT
+        id,
+        numeris,
+        draudimas,
+        pagaminimo_metai AS "Pirmos registracijos data",
+        marke AS "Modelis",
+        tech_apziura,
+        vadybininkas AS "Transporto vadybininkas",
+        priekaba,
+        COALESCE((SELECT vairuotojas FROM vilkiku_vairuotojai
+                  WHERE vilkiko_numeris = vilkikai.numeris AND eile = 1), '') AS "Vairuotojas 1",
+        COALESCE((SELECT group_concat(vairuotojas, ', ') FROM vilkiku_vairuotojai
+                  WHERE vilkiko_numeris = vilkikai.numeris AND eile > 1), '') AS "Vairuotojas 2",
+        CASE WHEN COALESCE(tech_apziura, '') = '' THEN ''
+             ELSE CAST(ROUND(julianday(tech_apziura) - julianday(date('now', 'localtime'))) AS INTEGER)
+        END AS "Liko iki tech apžiūros",
+        CASE WHEN COALESCE(draudimas, '') = '' THEN ''
+             ELSE CAST(ROUND(julianday(draudimas) - julianday(date('now', 'localtime'))) AS INTEGER)
+        END AS "Liko iki draudimo"
+    FROM vilkikai
+"""
+
+# Filters on these columns first narrow rows through the 'vilkikai_fts' index (see db.FTS_LENTELES);
+# both driver columns are searched in the "vairuotojai" text kept in sync with the assignment table
+FTS_FILTRAI = ("vilkikai_fts", {
+    "numeris": "numeris",
+    "Modelis": "marke",
+    "Transporto vadybininkas": "vadybininkas",
+    "priekaba": "priekaba",
+    "Vairuotojas 1": "vairuotojai",
+    "Vairuotojas 2": "vairuotojai",
+})
+
 def show(conn, c):
-    # 1) Ensure needed columns exist
-    existing_cols = [r[1] for r in c.execute("PRAGMA table_info(vilkikai)").fetchall()]
-    extras = {
-        "draudimas": "TEXT",
-        "pagaminimo_metai": "INTEGER",
-        "marke": "TEXT",
-        "tech_apziura": "TEXT",
-        "vadybininkas": "TEXT",
-        "vairuotojai": "TEXT",
-        "priekaba": "TEXT"
-    }
-    for col, col_type in extras.items():
-        if col not in existing_cols:
-            c.execute(f"ALTER TABLE vilkikai ADD COLUMN {col} {col_type}")
-    conn.commit()
+    # 1) Table columns are ensured once by db.migrate() on connect
 
-    # 2) Prepare dropdown data
-    priekabu_list = [r[0] for r in c.execute("SELECT numeris FROM priekabos").fetchall()]
-    markiu_list = [r[0] for r in c.execute("SELECT reiksme FROM lookup WHERE kategorija = 'Markė'").fetchall()]
-    vairuotoju_list = [f"{r[1]} {r[2]}" for r in c.execute("SELECT id, vardas, pavarde FROM vairuotojai").fetchall()]
+    # 2) Prepare dropdown data (reference tables come from the shared cache)
+    priekabu_list = cache.column(conn, "priekabos", "SELECT numeris FROM priekabos")
+    markiu_list = cache.column(conn, "lookup", "SELECT reiksme FROM lookup WHERE kategorija = 'Markė'")
+    vairuotoju_list = [f"{r[1]} {r[2]}" for r in cache.rows(conn, "vairuotojai", "SELECT id, vardas, pavarde FROM vairuotojai")]
 
     vadybininku_list = [
         f"{r[0]} {r[1]}"
-        for r in c.execute(
+        for r in cache.rows(
+            conn, "darbuotojai",
             "SELECT vardas, pavarde FROM darbuotojai WHERE pareigybe = ?",
             ("Transporto vadybininkas",)
-        ).fetchall()
+        )
     ]
     vadybininku_dropdown = [""] + vadybininku_list  # first element is empty
 
+    # Trailer → truck map for both trailer dropdowns (one grouped query, shared cache)
+    trailer_truck = uzimtos_priekabos(conn)
+
     # 3) Callbacks for session state
     def clear_selection():
         st.session_state.selected_vilk = None
@@ -58,19 +89,14 @@ def show(conn, c):
         # 6.1) "Bendras priekabų priskirstymas" form
         st.markdown("### 🔄 Bendras priekabų priskirstymas")
         with st.form("priekabu_priskirt_forma", clear_on_submit=True):
-            vilk_list = [""] + [r[0] for r in c.execute("SELECT numeris FROM vilkikai").fetchall()]
+            vilk_list = [""] + cache.column(conn, "vilkikai", "SELECT numeris FROM vilkikai")
             pr_opts = [""]
 
             # Build trailer options:
             for num in priekabu_list:
-                assigned_row = c.execute(
-                    "SELECT numeris FROM vilkikai WHERE priekaba = ?", (num,)
-                ).fetchone()
-
                 # If assigned but to a different truck, mark red with that truck's number
-                if assigned_row and assigned_row[0] != "":
-                    assigned_truck = assigned_row[0]
-                    pr_opts.append(f"🔴 {num} ({assigned_truck})")
+                if trailer_truck.get(num):
+                    pr_opts.append(f"🔴 {num} ({trailer_truck[num]})")
                 else:
                     # Either unassigned or assigned to this truck—treat as free (green)
                     pr_opts.append(f"🟢 {num} (laisva)")
@@ -87,103 +113,40 @@ def show(conn, c):
                 if len(parts) > 1:
                     prn = parts[1].split()[0]
 
-            # 6.1.b) Current trailer of selected truck
-            cur = c.execute(
-                "SELECT priekaba FROM vilkikai WHERE numeris = ?", (sel_vilk,)
-            ).fetchone()
-            cur_trailer = cur[0] if cur and cur[0] else ""
-
-            # 6.1.c) Check if prn is on another truck
-            other = c.execute(
-                "SELECT numeris FROM vilkikai WHERE priekaba = ?", (prn,)
-            ).fetchone()
-
-            # 6.1.d) If yes, swap: that other truck gets cur_trailer
-            if other and other[0] != sel_vilk:
-                other_truck = other[0]
-                c.execute(
-                    "UPDATE vilkikai SET priekaba = ? WHERE numeris = ?",
-                    (cur_trailer or "", other_truck)
-                )
-
-            # 6.1.e) Assign prn (or empty) to sel_vilk
-            c.execute(
-                "UPDATE vilkikai SET priekaba = ? WHERE numeris = ?",
-                (prn or "", sel_vilk)
-            )
-            conn.commit()
-            st.success("✅ Priekabos paskirstymas sėkmingai atnaujintas.")
-            clear_selection()
+            # 6.1.b) Assign prn (or empty) to sel_vilk; a truck already holding prn
+            #        gets sel_vilk's current trailer – both updates in one transaction
+            try:
+                sukeisti_priekabas(c, sel_vilk, prn)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                st.error(f"❌ Klaida saugant: {e}")
+            else:
+                cache.bump("vilkikai")
+                st.success("✅ Priekabos paskirstymas sėkmingai atnaujintas.")
+                clear_selection()
 
         # 6.2) "Add new truck" button
         st.button("➕ Pridėti naują vilkiką", on_click=new_vilk, use_container_width=True)
 
-        # 6.3) Display list of trucks (ordered by tech_apziura)
-        df = pd.read_sql_query("SELECT * FROM vilkikai ORDER BY tech_apziura ASC", conn)
-        if df.empty:
+        # 6.3) Display list of trucks (ordered by tech_apziura), paged in SQL via modules/grid.py
+        if not c.execute("SELECT 1 FROM vilkikai LIMIT 1").fetchone():
             st.info("🔍 Kol kas nėra vilkikų.")
             return
 
-        # 6.4) Prepare DataFrame for display
-        df = df.fillna('')
-        df_disp = df.copy()
-        df_disp.rename(columns={
-            'marke': 'Modelis',
-            'pagaminimo_metai': 'Pirmos registracijos data',
-            'vadybininkas': 'Transporto vadybininkas'
-        }, inplace=True)
-
-        # Split drivers
-        drivers = df_disp.get('vairuotojai', pd.Series(dtype=str)).fillna('')
-        drivers_df = drivers.str.split(', ', n=1, expand=True)
-        if drivers_df.shape[1] < 2:
-            drivers_df[1] = ''
-        drivers_df = drivers_df.fillna('')
-        df_disp['Vairuotojas 1'] = drivers_df[0]
-        df_disp['Vairuotojas 2'] = drivers_df[1]
-        df_disp.drop(columns=['vairuotojai'], inplace=True)
-
-        # Days until inspection and insurance
-        df_disp['Liko iki tech apžiūros'] = df_disp['tech_apziura'].apply(
-            lambda x: (date.fromisoformat(x) - date.today()).days if x else ''
+        # 6.4) Filters (prefix matching) and one selectable row per truck
+        pasirinktas = show_grid(
+            conn, "vilkikai", SARASO_UZKLAUSA,
+            order_by="tech_apziura, id", id_col="numeris", match="prefix", fts=FTS_FILTRAI,
         )
-        df_disp['Liko iki draudimo'] = df_disp['draudimas'].apply(
-            lambda x: (date.fromisoformat(x) - date.today()).days if x else ''
-        )
-
-        # 6.5) Filters (prefix matching)
-        filter_cols = st.columns(len(df_disp.columns) + 1)
-        for i, col in enumerate(df_disp.columns):
-            filter_cols[i].text_input(label="", placeholder=col, key=f"f_{col}")
-        filter_cols[-1].write("")
-
-        df_filt = df_disp.copy()
-        for col in df_disp.columns:
-            val = st.session_state.get(f"f_{col}", "")
-            if val:
-                df_filt = df_filt[
-                    df_filt[col].astype(str).str.lower().str.startswith(val.lower())
-                ]
-
-        # 6.6) Rows with edit buttons
-        for _, row in df_filt.iterrows():
-            row_cols = st.columns(len(df_filt.columns) + 1)
-            for i, col in enumerate(df_filt.columns):
-                row_cols[i].write(row[col])
-            row_cols[-1].button(
-                "✏️",
-                key=f"edit_{row['numeris']}",
-                on_click=edit_vilk,
-                args=(row['numeris'],)
-            )
-
-        # 6.7) CSV export
-        csv = df.to_csv(index=False, sep=';').encode('utf-8')
-        st.download_button(
-            label="💾 Eksportuoti kaip CSV",
-            data=csv,
-            file_name="vilkikai.csv",
-            mime="text/csv"
+        if pasirinktas is not None:
+            edit_vilk(pasirinktas)
+            st.rerun()
+
+        # 6.5) CSV/XLSX export, generated only on click (see modules/export.py)
+        show_export(
+            conn, "vilkikai", "SELECT * FROM vilkikai", "vilkikai", order_by="tech_apziura ASC",
+            date_col="tech_apziura", date_label="Tech. apžiūra",
         )
         return
 
@@ -199,22 +162,17 @@ def show(conn, c):
             return
         vilk = df_v.iloc[0].to_dict()
 
-    # Build assigned-driver set (excluding current if editing)
-    assigned_set = set()
-    for row in c.execute("SELECT numeris, vairuotojai FROM vilkikai").fetchall():
-        numeris_row, drv_str = row
-        if drv_str:
-            for drv in drv_str.split(', '):
-                if not (not is_new and numeris_row == sel and drv):
-                    assigned_set.add(drv)
-
-    # Build assigned-trailer set (excluding current if editing)
-    assigned_trailers = set()
-    for row in c.execute("SELECT numeris, priekaba FROM vilkikai").fetchall():
-        numeris_row, pr_str = row
-        if pr_str:
-            if not (not is_new and numeris_row == sel and pr_str):
-                assigned_trailers.add(pr_str)
+    # Drivers assigned to other trucks (dropdown markers) and this truck's drivers in order
+    assigned_set = {
+        r[0] for r in c.execute(
+            "SELECT vairuotojas FROM vilkiku_vairuotojai WHERE vilkiko_numeris != ?", (sel,)
+        ).fetchall()
+    }
+    own_drivers = [] if is_new else [
+        r[0] for r in c.execute(
+            "SELECT vairuotojas FROM vilkiku_vairuotojai WHERE vilkiko_numeris = ? ORDER BY eile", (sel,)
+        ).fetchall()
+    ]
 
     with st.form("vilkiku_forma", clear_on_submit=False):
         col1, col2 = st.columns(2)
@@ -266,8 +224,8 @@ def show(conn, c):
 
         v1_idx = 0
         v2_idx = 0
-        if not is_new and vilk['vairuotojai']:
-            parts = vilk['vairuotojai'].split(', ')
+        if own_drivers:
+            parts = own_drivers
             if parts:
                 for idx, opt in enumerate(v1_opts):
                     if opt.endswith(parts[0]):
@@ -285,11 +243,9 @@ def show(conn, c):
         # 7.4) Trailer dropdown with status icons
         pr_opts = [""]
         for num in priekabu_list:
-            if num in assigned_trailers:
-                assigned_truck = c.execute(
-                    "SELECT numeris FROM vilkikai WHERE priekaba = ?", (num,)
-                ).fetchone()[0]
-                pr_opts.append(f"🔴 {num} ({assigned_truck})")
+            # Trailers on other trucks are red; this truck's own trailer counts as free
+            if trailer_truck.get(num) and trailer_truck[num] != sel:
+                pr_opts.append(f"🔴 {num} ({trailer_truck[num]})")
             else:
                 pr_opts.append(f"🟢 {num} (laisva)")
 
@@ -315,10 +271,16 @@ def show(conn, c):
         drv1_name = extract_name(v1)
         drv2_name = extract_name(v2)
 
-        # 8.1) Prevent assigning a driver already in use
-        if drv1_name and drv1_name in assigned_set:
+        # 8.1) Prevent assigning a driver already in use (one indexed probe per driver)
+        def assigned_elsewhere(name):
+            return name and c.execute(
+                "SELECT 1 FROM vilkiku_vairuotojai WHERE vairuotojas = ? AND vilkiko_numeris != ?",
+                (name, sel)
+            ).fetchone() is not None
+
+        if assigned_elsewhere(drv1_name):
             st.warning(f"⚠️ Vairuotojas {drv1_name} jau priskirtas kitam vilkikui.")
-        elif drv2_name and drv2_name in assigned_set:
+        elif assigned_elsewhere(drv2_name):
             st.warning(f"⚠️ Vairuotojas {drv2_name} jau priskirtas kitam vilkikui.")
         # 8.2) Prevent selecting same driver twice
         elif drv1_name and drv2_name and drv1_name == drv2_name:
@@ -331,40 +293,18 @@ def show(conn, c):
             if sel_pr and (sel_pr.startswith("🟢") or sel_pr.startswith("🔴")):
                 trailer = sel_pr.split(" ", 1)[1].split()[0]
 
-            # 8.4) Current trailer of this truck
-            cur = c.execute(
-                "SELECT priekaba FROM vilkikai WHERE numeris = ?", (sel,)
-            ).fetchone()
-            cur_trailer = cur[0] if cur and cur[0] else ""
-
-            # 8.5) Check if trailer is on another truck
-            other = c.execute(
-                "SELECT numeris FROM vilkikai WHERE priekaba = ?", (trailer,)
-            ).fetchone()
-
-            if other and other[0] != sel:
-                other_truck = other[0]
-                # Swap: give other_truck the current truck's trailer
-                c.execute(
-                    "UPDATE vilkikai SET priekaba = ? WHERE numeris = ?",
-                    (cur_trailer or "", other_truck)
-                )
-
-            # 8.6) Assign trailer to this truck
-            c.execute(
-                "UPDATE vilkikai SET priekaba = ? WHERE numeris = ?",
-                (trailer or "", sel)
-            )
-
-            # 8.7) Build drivers text
-            vairuotoju_text = ", ".join(filter(None, [drv1_name, drv2_name])) or ''
+            # 8.4) Drivers in order; "vilkikai.vairuotojai" text is rewritten by db triggers
+            drivers = list(filter(None, [drv1_name, drv2_name]))
+            truck = numeris if is_new else sel
             try:
+                # 8.5) Trailer swap, truck row and driver assignments are saved in one transaction
+                sukeisti_priekabas(c, truck, trailer)
                 if is_new:
                     c.execute(
                         """INSERT INTO vilkikai 
                            (numeris, marke, pagaminimo_metai, tech_apziura, draudimas, 
                             vadybininkas, vairuotojai, priekaba)
-                           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                           VALUES (?, ?, ?, ?, ?, ?, '', ?)""",
                         (
                             numeris,
                             modelis or '',
@@ -372,7 +312,6 @@ def show(conn, c):
                             tech_date.isoformat() if tech_date else '',
                             draud_date.isoformat() if draud_date else '',
                             vadyb or '',
-                            vairuotoju_text,
                             trailer
                         )
                     )
@@ -380,7 +319,7 @@ def show(conn, c):
                     c.execute(
                         """UPDATE vilkikai 
                            SET marke=?, pagaminimo_metai=?, tech_apziura=?, draudimas=?, 
-                               vadybininkas=?, vairuotojai=?, priekaba=? 
+                               vadybininkas=?, priekaba=? 
                            WHERE numeris=?""",
                         (
                             modelis or '',
@@ -388,12 +327,17 @@ def show(conn, c):
                             tech_date.isoformat() if tech_date else '',
                             draud_date.isoformat() if draud_date else '',
                             vadyb or '',
-                            vairuotoju_text,
                             trailer,
                             sel
                         )
                     )
+                c.execute("DELETE FROM vilkiku_vairuotojai WHERE vilkiko_numeris = ?", (truck,))
+                c.executemany(
+                    "INSERT INTO vilkiku_vairuotojai (vilkiko_numeris, vairuotojas, eile) VALUES (?, ?, ?)",
+                    [(truck, name, eile) for eile, name in enumerate(drivers, start=1)]
+                )
                 conn.commit()
+                cache.bump("vilkikai")
                 st.success("✅ Vilkikas išsaugotas sėkmingai.")
                 if tech_date:
                     st.info(f"🔧 Dienų iki tech. apžiūros liko: {(tech_date - date.today()).days}")
@@ -401,5 +345,6 @@ def show(conn, c):
                     st.info(f"🛡️ Dienų iki draudimo pabaigos liko: {(draud_date - date.today()).days}")
                 clear_selection()
             except Exception as e:
+                conn.rollback()
                 st.error(f"❌ Klaida saugant: {e}")
     # 9) End of show()
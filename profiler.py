@@ -0,0 +1,214 @@
+import cProfile
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Modulio show() profiliavimas derinimui.
+# Įjungiama aplinkos kintamuoju DISPO_PROFILE=1: main.py pasirinkto modulio show() vykdo per
+# profile(modulis), kuris paleidžia cProfile ir atvaizdavimo laiką išskaido į fazes:
+#   sql     – sqlite3 kursoriaus metodai (execute, fetch...) ir sqlstats.py,
+#   pandas  – pandas/numpy kodas (read_sql_query, DataFrame operacijos),
+#   widgets – Streamlit valdiklių ir lentelių išvedimas (streamlit, protobuf, pyarrow),
+#   python  – visa kita (modulių kodas, pvz. HTML eilučių formavimas, ciklai per iterrows).
+# Kiekvienam moduliui laikoma paskutinių atvaizdavimų istorija; folded() grąžina
+# „folded stacks“ tekstą (flamegraph.pl, speedscope), sudarytą iš cProfile kvietimų grafo.
+
+ENV = "DISPO_PROFILE"
+ISTORIJOS_DYDIS = 20     # atvaizdavimų vienam moduliui
+TOP_FUNKCIJU = 15
+MIN_US = 100             # trumpesnės nei 0,1 ms šakos į folded eksportą netraukiamos
+MAX_GYLIS = 64
+
+FAZES = ("sql", "pandas", "widgets", "python")
+
+# Fazė pagal failo kelią (katalogų pavadinimai) arba vardą; builtin funkcijos – pagal pavadinimą
+_FAZIU_KELIAI = [
+    ("sql", ("sqlite3",), ("sqlstats.py",)),
+    ("pandas", ("pandas", "numpy"), ()),
+    ("widgets", ("streamlit", "protobuf", "pyarrow"), ()),
+]
+
+_lock = threading.Lock()
+_istorija = defaultdict(lambda: deque(maxlen=ISTORIJOS_DYDIS))   # modulis → atvaizdavimai (naujausias gale)
+
+def enabled():
+    return os.environ.get(ENV) == "1"
+
+def _faze(func):
+    """
+    Funkcijos (cProfile rakto: failas, eilutė, vardas) fazė; None – builtin funkcija,
+    kurios fazę lemia ją iškvietusi funkcija.
+    """
+    failas, _, vardas = func
+    if failas == "~":
+        return "sql" if "sqlite3." in vardas else None
+    dalys = failas.replace("\\", "/").split("/")
+    for faze, katalogai, failai in _FAZIU_KELIAI:
+        if dalys[-1] in failai or any(k in dalys[:-1] for k in katalogai):
+            return faze
+    return "python"
+
+def _zyme(func):
+    """Funkcijos pavadinimas folded eksportui ir lentelėms, pvz. "dispo.py:97(render_truck)"."""
+    failas, eilute, vardas = func
+    if failas == "~":
+        return vardas.replace(";", ",")
+    return f"{os.path.basename(failas)}:{eilute}({vardas})".replace(";", ",")
+
+def _fazes(stats):
+    """
+    Savojo laiko (tottime) suma kiekvienai fazei, ms. Builtin funkcijų laikas paskirstomas
+    iškvietusioms funkcijoms proporcingai jų kvietimų laikui.
+    """
+    fazes = dict.fromkeys(FAZES, 0.0)
+    for func, (_, _, tt, _, callers) in stats.items():
+        faze = _faze(func)
+        if faze is not None:
+            fazes[faze] += tt * 1000
+            continue
+        viso = sum(e[2] for e in callers.values())
+        if not viso:
+            fazes["python"] += tt * 1000
+            continue
+        for caller, e in callers.items():
+            fazes[_faze(caller) or "python"] += tt * 1000 * e[2] / viso
+    return {k: round(v, 2) for k, v in fazes.items()}
+
+def _folded(stats):
+    """
+    Kvietimų grafas → {"a;b;c": mikrosekundės}. Funkcijos, pasiekiamos keliais keliais,
+    laikas dalijamas pagal kiekvieno kvietėjo dalį (kaip flameprof); rekursija nutraukiama.
+    """
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, e in callers.items():
+            callees[caller].append((func, e[3]))
+
+    rezultatas = defaultdict(float)
+
+    def eiti(func, laikas, kelias, gylis):
+        _, _, tt, ct, _ = stats[func]
+        mastelis = laikas / ct if ct else 0.0
+        kelias = f"{kelias};{_zyme(func)}" if kelias else _zyme(func)
+        vaikai = 0.0
+        if gylis < MAX_GYLIS:
+            for vaikas, ct_e in callees.get(func, ()):
+                t = ct_e * mastelis
+                if vaikas == func or t * 1e6 < MIN_US:
+                    continue
+                eiti(vaikas, t, kelias, gylis + 1)
+                vaikai += t
+        savas = max(laikas - vaikai, 0.0)
+        if savas * 1e6 >= 1:
+            rezultatas[kelias] += savas * 1e6
+
+    # Šaknys – funkcijos be kvietėjų (pats show() ir profilio įjungimo/išjungimo likučiai)
+    for func, (_, _, _, ct, callers) in stats.items():
+        if not callers and ct * 1e6 >= MIN_US and "_lsprof" not in func[2]:
+            eiti(func, ct, "", 0)
+    return {k: round(v) for k, v in rezultatas.items()}
+
+class Profile:
+    """
+    Vieno modulio atvaizdavimo profilis.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.wall_ms = 0.0
+        self.phases = dict.fromkeys(FAZES, 0.0)
+        self.top = []        # [{"ms", "cum_ms", "calls", "phase", "function"}], pagal savąjį laiką
+        self.stacks = {}     # folded eksportas: "a;b;c" → µs
+
+    def _apdoroti(self, profiler):
+        profiler.create_stats()
+        stats = profiler.stats
+        self.phases = _fazes(stats)
+        self.stacks = _folded(stats)
+        self.top = [
+            {
+                "ms": round(tt * 1000, 2),
+                "cum_ms": round(ct * 1000, 2),
+                "calls": nc,
+                "phase": _faze(func) or "builtin",
+                "function": _zyme(func),
+            }
+            for func, (_, nc, tt, ct, _) in sorted(stats.items(), key=lambda kv: -kv[1][2])[:TOP_FUNKCIJU]
+        ]
+
+    def as_dict(self):
+        return {
+            "module": self.module,
+            "started": self.started,
+            "wall_ms": round(self.wall_ms, 2),
+            "phases": self.phases,
+            "top": self.top,
+        }
+
+@contextmanager
+def profile(module):
+    """
+    Profiliuoja bloką (modulio show()) ir įrašo rezultatą į modulio istoriją.
+    Kai profiliavimas neįjungtas, grąžina None ir nieko nematuoja.
+    """
+    if not enabled():
+        yield None
+        return
+    p = Profile(module)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield p
+    finally:
+        profiler.disable()
+        p.wall_ms = (time.perf_counter() - start) * 1000
+        p._apdoroti(profiler)
+        with _lock:
+            _istorija[module].append(p)
+
+def history(module):
+    """
+    Modulio atvaizdavimų profiliai (naujausias gale).
+    """
+    with _lock:
+        return list(_istorija.get(module, ()))
+
+def folded(module):
+    """
+    Visų modulio istorijoje esančių atvaizdavimų „folded stacks“ tekstas
+    (eilutė „funkcija;funkcija;... mikrosekundės“), tinkamas flamegraph.pl ir speedscope.
+    """
+    suma = defaultdict(float)
+    for p in history(module):
+        for kelias, us in p.stacks.items():
+            suma[kelias] += us
+    return "".join(f"{kelias} {round(us)}\n" for kelias, us in sorted(suma.items()))
+
+def show_sidebar(p):
+    """
+    Derinimo skydelis šoninėje juostoje: paskutinio atvaizdavimo fazės ir brangiausios funkcijos,
+    modulio istorija ir folded eksporto atsisiuntimas.
+    """
+    import streamlit as st
+
+    d = p.as_dict()
+    with st.sidebar:
+        st.markdown(f"### ⏱️ Profilis: {d['module']}")
+        st.caption(f"Viso: {d['wall_ms']:.1f} ms · " + " · ".join(f"{k}: {v:.1f} ms" for k, v in d["phases"].items()))
+        st.markdown("**Brangiausios funkcijos (savasis laikas)**")
+        st.dataframe(d["top"], hide_index=True)
+        istorija = [{"started": h.started, "wall_ms": round(h.wall_ms, 2), **h.phases} for h in history(p.module)]
+        st.markdown(f"**Istorija ({len(istorija)})**")
+        st.dataframe(istorija[::-1], hide_index=True)
+        st.download_button(
+            "🔥 Flame graph (folded)",
+            folded(p.module),
+            file_name=f"profile_{p.module}.folded",
+            mime="text/plain",
+            key="profiler_folded",
+        )
@@ -0,0 +1,227 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Užklausų skaičiavimas ir trukmės matavimas derinimui.
+# Įjungiama aplinkos kintamuoju DISPO_SQL_STATS=1 (prieš paleidžiant programą): tada db._open()
+# atidaro prisijungimus su StatsConnection, kurio kursoriai kiekvieną užklausą užregistruoja
+# einamajame atvaizdavime (render). main.py kiekvieno modulio show() vykdo per render(modulis),
+# todėl statistika priskiriama moduliui; baigti atvaizdavimai laikomi istorijoje ir gali būti
+# įrašyti į žurnalo failą (JSON eilutėmis).
+
+ENV = "DISPO_SQL_STATS"
+LOG_FILE = "sql_stats.log"
+LETCIAUSIU = 10      # kiek lėčiausių užklausų saugoti vienam atvaizdavimui
+ISTORIJOS_DYDIS = 200
+
+_lock = threading.Lock()
+_vietinis = threading.local()                 # einamasis gijos atvaizdavimas
+_istorija = deque(maxlen=ISTORIJOS_DYDIS)      # baigti atvaizdavimai (naujausias gale)
+
+def enabled():
+    return os.environ.get(ENV) == "1"
+
+def _sql_forma(sql):
+    """
+    Užklausos tekstas grupavimui: suspausti tarpai, IN (?, ?, ...) sąrašai → (?×N).
+    """
+    sql = " ".join(sql.split())
+    return re.sub(r"\(\?(?:, \?)+\)", lambda m: f"(?×{m.group(0).count('?')})", sql)
+
+def _parametru_forma(params):
+    """
+    Parametrų „forma“ be reikšmių: tipai, pasikartojantys suspaudžiami (pvz. "str×120, int").
+    """
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    dalys = []
+    for p in params or ():
+        tipas = type(p).__name__
+        if dalys and dalys[-1][0] == tipas:
+            dalys[-1][1] += 1
+        else:
+            dalys.append([tipas, 1])
+    return ", ".join(t if n == 1 else f"{t}×{n}" for t, n in dalys)
+
+class Render:
+    """
+    Vieno modulio atvaizdavimo SQL statistika.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.rows = 0
+        self.wall_ms = 0.0
+        self.statements = {}   # užklausos forma → {"count", "ms", "rows"}
+        self.slowest = []      # [{"ms", "sql", "params", "rows"}], didžiausia trukmė pirma
+
+    def record(self, sql, params, ms):
+        forma = _sql_forma(sql)
+        self.queries += 1
+        self.sql_ms += ms
+        st = self.statements.setdefault(forma, {"count": 0, "ms": 0.0, "rows": 0})
+        st["count"] += 1
+        st["ms"] += ms
+        irasas = {"ms": ms, "sql": forma, "params": _parametru_forma(params), "rows": 0, "_st": st}
+        self.slowest.append(irasas)
+        self.slowest.sort(key=lambda r: -r["ms"])
+        del self.slowest[LETCIAUSIU:]
+        return irasas
+
+    def add_rows(self, irasas, n, ms):
+        self.rows += n
+        self.sql_ms += ms
+        irasas["rows"] += n
+        irasas["ms"] += ms
+        irasas["_st"]["rows"] += n
+        irasas["_st"]["ms"] += ms
+
+    def as_dict(self):
+        return {
+            "module": self.module,
+            "started": self.started,
+            "wall_ms": round(self.wall_ms, 2),
+            "queries": self.queries,
+            "sql_ms": round(self.sql_ms, 2),
+            "rows": self.rows,
+            "slowest": [
+                {k: (round(v, 2) if k == "ms" else v) for k, v in r.items() if k != "_st"}
+                for r in sorted(self.slowest, key=lambda r: -r["ms"])
+            ],
+            # Dažniausiai kartojamos užklausos – N+1 požymis
+            "repeated": [
+                {"sql": sql, "count": s["count"], "ms": round(s["ms"], 2), "rows": s["rows"]}
+                for sql, s in sorted(self.statements.items(), key=lambda kv: -kv[1]["count"])[:LETCIAUSIU]
+                if s["count"] > 1
+            ],
+        }
+
+def _current():
+    return getattr(_vietinis, "render", None)
+
+class StatsCursor(sqlite3.Cursor):
+    """
+    Kursorius, registruojantis execute/executemany trukmę ir nuskaitytas eilutes einamajame atvaizdavime.
+    Be aktyvaus render() veikia kaip įprastas kursorius.
+    """
+    _irasas = None
+
+    def _vykdyti(self, method, sql, params, forma):
+        render = _current()
+        if render is None:
+            self._irasas = None
+            return method(sql, params)
+        start = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            self._irasas = render.record(sql, forma, (time.perf_counter() - start) * 1000)
+
+    def execute(self, sql, params=()):
+        return self._vykdyti(super().execute, sql, params, params)
+
+    def executemany(self, sql, seq_of_params):
+        # Registruojama kaip viena užklausa; parametrų forma – pirmosios eilutės
+        seq_of_params = list(seq_of_params)
+        return self._vykdyti(super().executemany, sql, seq_of_params, seq_of_params[0] if seq_of_params else ())
+
+    def _skaityti(self, method, *args):
+        render = _current()
+        if render is None or self._irasas is None:
+            return method(*args)
+        start = time.perf_counter()
+        result = method(*args)
+        n = (0 if result is None else 1) if method.__name__ == "fetchone" else len(result)
+        render.add_rows(self._irasas, n, (time.perf_counter() - start) * 1000)
+        return result
+
+    def fetchone(self):
+        return self._skaityti(super().fetchone)
+
+    def fetchall(self):
+        return self._skaityti(super().fetchall)
+
+    def fetchmany(self, *args):
+        return self._skaityti(super().fetchmany, *args)
+
+    def __next__(self):
+        row = self._skaityti(super().fetchone)
+        if row is None:
+            raise StopIteration
+        return row
+
+class StatsConnection(sqlite3.Connection):
+    """
+    Prisijungimas, kurio visi kursoriai (taip pat conn.execute ir pandas.read_sql_query) yra StatsCursor.
+    """
+
+    def cursor(self, factory=StatsCursor):
+        return super().cursor(factory)
+
+@contextmanager
+def render(module):
+    """
+    Visos šioje gijoje bloko metu įvykdytos užklausos priskiriamos moduliui 'module'.
+    Baigus – atvaizdavimas įrašomas į istoriją ir grąžinamas per yield'intą objektą.
+    """
+    r = Render(module)
+    ankstesnis, _vietinis.render = _current(), r
+    start = time.perf_counter()
+    try:
+        yield r
+    finally:
+        r.wall_ms = (time.perf_counter() - start) * 1000
+        _vietinis.render = ankstesnis
+        with _lock:
+            _istorija.append(r.as_dict())
+
+def history(module=None):
+    """
+    Baigti atvaizdavimai (naujausias gale); module – tik to modulio.
+    """
+    with _lock:
+        return [r for r in _istorija if module is None or r["module"] == module]
+
+def dump(path=LOG_FILE):
+    """
+    Prideda istoriją į žurnalo failą (po vieną JSON eilutę atvaizdavimui) ir ją išvalo.
+    Grąžina įrašytų atvaizdavimų skaičių.
+    """
+    with _lock:
+        irasai = list(_istorija)
+        _istorija.clear()
+    with open(path, "a", encoding="utf-8") as f:
+        for r in irasai:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return len(irasai)
+
+def show_sidebar(r):
+    """
+    Derinimo skydelis šoninėje juostoje: paskutinio atvaizdavimo užklausų skaičius, SQL laikas,
+    lėčiausios ir dažniausiai kartojamos užklausos, žurnalo įrašymo mygtukas.
+    """
+    import streamlit as st
+
+    d = r.as_dict()
+    with st.sidebar:
+        st.markdown(f"### 🐞 SQL: {d['module']}")
+        st.caption(f"Užklausų: {d['queries']} · SQL: {d['sql_ms']:.1f} ms · eilučių: {d['rows']} · "
+                   f"viso: {d['wall_ms']:.1f} ms")
+        if d["slowest"]:
+            st.markdown("**Lėčiausios užklausos**")
+            st.dataframe(d["slowest"], hide_index=True)
+        if d["repeated"]:
+            st.markdown("**Kartojamos užklausos**")
+            st.dataframe(d["repeated"], hide_index=True)
+        if st.button("💾 Įrašyti SQL žurnalą", key="sqlstats_dump"):
+            n = dump()
+            st.success(f"Į {LOG_FILE} įrašyta atvaizdavimų: {n}.")
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache  # noqa: E402
+import db  # noqa: E402
+
+
+@pytest.fixture
+def db_conn(tmp_path):
+    """Nauja (sukurta ir migruota) duomenų bazė laikiname kataloge; podėlis išvalomas."""
+    cache.clear()
+    conn, c = db.connect(str(tmp_path / "test.db"))
+    yield conn, c
+    conn.close()
+    cache.clear()
+
+
+@pytest.fixture
+def db_at_version(tmp_path, monkeypatch):
+    """
+    Duomenų bazė, migruota tik iki nurodytos versijos (migracijoms su duomenimis tikrinti).
+    Grąžina (conn, c); likusias migracijas pritaiko db.migrate(conn, c).
+    """
+    prisijungimai = []
+
+    def sukurti(version):
+        cache.clear()
+        conn = db._open(str(tmp_path / f"v{version}.db"))
+        c = conn.cursor()
+        db.create_tables(c)
+        conn.commit()
+        with monkeypatch.context() as m:
+            m.setattr(db, "MIGRACIJOS", db.MIGRACIJOS[:version])
+            db.migrate(conn, c)
+        prisijungimai.append(conn)
+        return conn, c
+
+    yield sukurti
+    for conn in prisijungimai:
+        conn.close()
+    cache.clear()
@@ -0,0 +1,44 @@
+import cache
+import db
+
+
+def test_kito_prisijungimo_irasas_pasendina_podeli(db_conn):
+    conn, c = db_conn
+    c.execute("INSERT INTO lookup (kategorija, reiksme) VALUES ('salis', 'LT')")
+    conn.commit()
+    cache.sync(db.get_versions(conn))
+
+    uzklausa = "SELECT reiksme FROM lookup WHERE kategorija = 'salis' ORDER BY reiksme"
+    skaiciuota = []
+    def rodinys():
+        skaiciuota.append(1)
+        return tuple(r[0] for r in conn.execute(uzklausa))
+
+    assert cache.column(conn, "lookup", uzklausa) == ["LT"]
+    assert cache.view("salys", ("lookup",), None, rodinys) == ("LT",)
+    assert cache.rows(conn, "klientai", "SELECT COUNT(*) FROM klientai") == [(0,)]
+    pries = db.get_versions(conn)
+
+    # 1) Įrašo kitas prisijungimas (kaip kitas procesas) – programa apie tai nežino
+    kitas, kc = db.connect(db.database_file(conn))
+    try:
+        kc.execute("INSERT INTO lookup (kategorija, reiksme) VALUES ('salis', 'PL')")
+        kitas.commit()
+    finally:
+        kitas.close()
+
+    # 2) Versija padidėja tik pakeistai lentelei
+    po = db.get_versions(conn)
+    assert set(po) == set(db.VERSIJUOJAMOS_LENTELES)
+    assert po["lookup"] > pries["lookup"]
+    assert {t: v for t, v in po.items() if t != "lookup"} == {t: v for t, v in pries.items() if t != "lookup"}
+
+    # 3) sync() pasendina tik ją: eilutės ir rodinys perskaičiuojami, kitų lentelių įrašai lieka
+    assert cache.sync(po) == ["lookup"]
+    assert cache.column(conn, "lookup", uzklausa) == ["LT", "PL"]
+    assert cache.view("salys", ("lookup",), None, rodinys) == ("LT", "PL")
+    assert len(skaiciuota) == 2
+    klientai = cache.stats()["klientai"]
+    assert cache.rows(conn, "klientai", "SELECT COUNT(*) FROM klientai") == [(0,)]
+    assert cache.stats()["klientai"]["hits"] == klientai["hits"] + 1
+    assert cache.sync(db.get_versions(conn)) == []
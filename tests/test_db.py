@@ -0,0 +1,14 @@
+import db
+
+
+def test_telkinys_skaito_sesijos_duomenu_baze(db_conn, tmp_path, monkeypatch):
+    conn, c = db_conn
+    c.execute("INSERT INTO lookup (kategorija, reiksme) VALUES ('salis', 'LT')")
+    conn.commit()
+    # Darbinis katalogas neturi įtakos: telkinys atidaro sesijos prisijungimo failą
+    monkeypatch.chdir(tmp_path.parent)
+
+    with db.get_pool(db.database_file(conn)).reader() as rconn:
+        assert rconn.execute("SELECT reiksme FROM lookup").fetchall() == [("LT",)]
+    assert db.get_pool(db.database_file(conn)) is db.get_pool(str(tmp_path / "test.db"))
+    assert not (tmp_path.parent / db.DB_FILE).exists()
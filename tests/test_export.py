@@ -0,0 +1,39 @@
+import datetime
+import io
+import sqlite3
+import sys
+
+from modules.export import export_sql, write_csv, xlsx_available
+
+
+def _conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER, km INTEGER, pavadinimas TEXT, data TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", [
+        (1, 5, "Ąžuolas; UAB", "2026-03-01"),
+        (2, None, None, "2026-03-02 10:00"),
+        (3, 7, "x", "2026-03-03"),
+    ])
+    return conn
+
+
+def test_csv_null_sveikieji_skaiciai():
+    out = io.BytesIO()
+    write_csv(_conn(), "SELECT * FROM t ORDER BY id", [], out)
+    assert out.getvalue().decode("utf-8").splitlines() == [
+        "id;km;pavadinimas;data",
+        '1;5;"Ąžuolas; UAB";2026-03-01',
+        "2;;;2026-03-02 10:00",
+        "3;7;x;2026-03-03",
+    ]
+
+
+def test_datu_intervalas_imtinai():
+    sql, params = export_sql("SELECT * FROM t", "id", "data",
+                             (datetime.date(2026, 3, 2), datetime.date(2026, 3, 2)))
+    assert [r[0] for r in _conn().execute(sql, params)] == [2]
+
+
+def test_xlsx_be_openpyxl(monkeypatch):
+    monkeypatch.setitem(sys.modules, "openpyxl", None)
+    assert xlsx_available() is False
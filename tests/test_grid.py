@@ -0,0 +1,34 @@
+from modules.grid import filter_sql
+from modules.klientai import FTS_FILTRAI, SARASO_UZKLAUSA as KLIENTU_UZKLAUSA
+from modules.vairuotojai import SARASO_UZKLAUSA as VAIRUOTOJU_UZKLAUSA
+
+
+def _rasti(conn, query, filtrai, match, fts=None, stulpelis=None):
+    columns = [d[0] for d in conn.execute(f"SELECT * FROM ({query}) LIMIT 0").description]
+    values = [filtrai.get(col, "") for col in columns]
+    where, params = filter_sql(conn, columns, values, match, fts)
+    return sorted(r[0] for r in conn.execute(f"SELECT {stulpelis} FROM ({query}){where}", params))
+
+
+def test_prefiksas_lietuviskos_raides(db_conn):
+    conn, c = db_conn
+    c.executemany("INSERT INTO vairuotojai (vardas, pavarde) VALUES (?, ?)",
+                  [("Jonas", "Žukauskas"), ("Petras", "Žemaitis"), ("Ona", "Šimkutė"), ("Rokas", "Zukas")])
+    conn.commit()
+
+    assert _rasti(conn, VAIRUOTOJU_UZKLAUSA, {"Pavardė": "žuk"}, "prefix", stulpelis='"Pavardė"') == ["Žukauskas"]
+    assert _rasti(conn, VAIRUOTOJU_UZKLAUSA, {"Pavardė": "ŠIM"}, "prefix", stulpelis='"Pavardė"') == ["Šimkutė"]
+    assert _rasti(conn, VAIRUOTOJU_UZKLAUSA, {"Pavardė": "Ž"}, "prefix", stulpelis='"Pavardė"') == [
+        "Žemaitis", "Žukauskas"]
+
+
+def test_turi_lietuviskos_raides_su_fts(db_conn):
+    conn, c = db_conn
+    c.executemany(
+        "INSERT INTO klientai (vardas, pavarde, pavadinimas, miestas) VALUES ('', '', ?, ?)",
+        [("Alfa", "Klaipėda"), ("Beta", "Šiauliai"), ("Gama", "Kaunas")],
+    )
+    conn.commit()
+
+    for filtras, tikimasi in (("KLAIPĖDA", ["Alfa"]), ("šiau", ["Beta"]), ("ĖD", ["Alfa"]), ("š", ["Beta"])):
+        assert _rasti(conn, KLIENTU_UZKLAUSA, {"miestas": filtras}, "contains", FTS_FILTRAI, "pavadinimas") == tikimasi
@@ -0,0 +1,36 @@
+import time
+from datetime import date, datetime, timedelta
+
+import db
+
+
+def _irasyti(conn, c, sa):
+    c.execute(
+        """INSERT INTO vilkiku_darbo_laikai (vilkiko_numeris, data, sa, created_at)
+           VALUES ('AAA111', '2026-03-10', ?, '2026-01-01T08:00:00')
+           ON CONFLICT (vilkiko_numeris, data) DO UPDATE SET sa = excluded.sa""",
+        (sa,),
+    )
+    conn.commit()
+
+
+def test_busena_tarp_irasymo_ir_atnaujinimo(db_conn):
+    conn, c = db_conn
+    _irasyti(conn, c, "10")
+    time.sleep(0.05)
+    tarp = datetime.now()
+    time.sleep(0.05)
+    _irasyti(conn, c, "20")
+
+    # created_at (pirmojo įrašymo laikas) nelemia įvykių laiko
+    assert [r["sa"] for r in db.truck_state_as_of(conn, c, "AAA111", tarp)] == ["10"]
+    assert [r["sa"] for r in db.truck_state_as_of(conn, c, "AAA111", datetime.now())] == ["20"]
+    # Intervalo pabaiga neįtraukiama – imama su atsarga, kad įvykis nepatektų į tą pačią milisekundę
+    assert [r["sa"] for r in db.changes_between(conn, c, tarp, datetime.now() + timedelta(seconds=1), "AAA111")] == ["20"]
+
+
+def test_laiko_formatai():
+    assert db._laikas("2026-03-01T12:00") == "2026-03-01 12:00:00.000"
+    assert db._laikas("2026-03-01 12:00:05") == "2026-03-01 12:00:05.000"
+    assert db._laikas(date(2026, 3, 1)) == "2026-03-01 00:00:00.000"
+    assert db._laikas(datetime(2026, 3, 1, 12, 0, 0, 250000)) == "2026-03-01 12:00:00.250"
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+import db
+
+
+def _vilkikas(c, numeris, vairuotojai):
+    c.execute(
+        "INSERT INTO vilkikai (marke, modelis, valstybinis_nr, numeris, vairuotojai) VALUES ('Volvo', 'FH', ?, ?, ?)",
+        (numeris, numeris, vairuotojai),
+    )
+
+
+def test_migracija_8_vairuotojas_keliuose_vilkikuose(db_at_version):
+    conn, c = db_at_version(7)
+    _vilkikas(c, "AAA1", "Jonas J, Petras P")
+    _vilkikas(c, "BBB2", "Jonas J")
+    conn.commit()
+
+    db.migrate(conn, c)
+
+    priskyrimai = c.execute(
+        "SELECT vilkiko_numeris, vairuotojas, eile FROM vilkiku_vairuotojai ORDER BY vilkiko_numeris, eile"
+    ).fetchall()
+    assert priskyrimai == [("AAA1", "Petras P", 1), ("BBB2", "Jonas J", 1)]
+    assert db.dropped_driver_assignments(conn, c) == [("AAA1", "Jonas J", "BBB2")]
+    assert dict(c.execute("SELECT numeris, vairuotojai FROM vilkikai").fetchall()) == {
+        "AAA1": "Petras P", "BBB2": "Jonas J"}
+
+
+def test_migracija_14_eiles_be_tarpu(db_at_version):
+    conn, c = db_at_version(13)
+    _vilkikas(c, "AAA1", "")
+    c.execute("INSERT INTO vilkiku_vairuotojai (vilkiko_numeris, vairuotojas, eile) VALUES ('AAA1', 'Petras P', 2)")
+    conn.commit()
+
+    db.migrate(conn, c)
+
+    assert c.execute("SELECT vairuotojas, eile FROM vilkiku_vairuotojai").fetchall() == [("Petras P", 1)]
+
+
+def test_migracija_9_pasikartojantys_darbo_laikai(db_at_version):
+    conn, c = db_at_version(8)
+    c.executemany(
+        "INSERT INTO vilkiku_darbo_laikai (vilkiko_numeris, data, sa, created_at) VALUES (?, ?, ?, ?)",
+        [
+            ("AAA1", "2026-03-10", "1", "2026-03-09T08:00:00"),
+            ("AAA1", "2026-03-10", "2", "2026-03-09T09:00:00"),
+            ("BBB2", "2026-03-10", "5", "2026-03-09T08:30:00"),
+            ("AAA1", "2026-03-10", "3", "2026-03-09T10:00:00"),
+        ],
+    )
+    conn.commit()
+    ids = {sa: i for i, sa in c.execute("SELECT id, sa FROM vilkiku_darbo_laikai").fetchall()}
+
+    db.migrate(conn, c)
+
+    # Lieka vėliausias (didžiausias id) kiekvienos (vilkikas, data) poros įrašas
+    assert c.execute(
+        "SELECT id, vilkiko_numeris, sa FROM vilkiku_darbo_laikai ORDER BY vilkiko_numeris"
+    ).fetchall() == [(ids["3"], "AAA1", "3"), (ids["5"], "BBB2", "5")]
+    # Senesnės versijos – žurnale (su pradiniu id), po jų – dabartinės (migracija 10)
+    assert c.execute(
+        "SELECT darbo_laiko_id, vilkiko_numeris, sa FROM vilkiku_darbo_laiku_istorija ORDER BY id"
+    ).fetchall() == [
+        (ids["1"], "AAA1", "1"), (ids["2"], "AAA1", "2"),
+        (ids["5"], "BBB2", "5"), (ids["3"], "AAA1", "3"),
+    ]
+    assert [r["sa"] for r in db.truck_state_as_of(conn, c, "AAA1", "2026-03-09T09:30")] == ["2"]
+    # Unikalus raktas – antras tos pačios poros įrašas nebeįmanomas
+    with pytest.raises(sqlite3.IntegrityError):
+        c.execute("INSERT INTO vilkiku_darbo_laikai (vilkiko_numeris, data) VALUES ('AAA1', '2026-03-10')")
@@ -0,0 +1,27 @@
+import datetime
+
+from modules.planavimas import build_plan
+
+DIENA = datetime.date(2026, 3, 10)
+
+
+def _krovinys(c, vilkikas, salis, regionas):
+    c.execute(
+        """INSERT INTO kroviniai (aprasymas, vilkikas, iskrovimo_salis, iskrovimo_regionas,
+                                  pakrovimo_data, iskrovimo_data)
+           VALUES ('', ?, ?, ?, ?, ?)""",
+        (vilkikas, salis, regionas, (DIENA - datetime.timedelta(days=1)).isoformat(), DIENA.isoformat()),
+    )
+
+
+def test_du_iskrovimai_ta_pacia_diena(db_conn):
+    conn, c = db_conn
+    _krovinys(c, "AAA111", "IT", "10")
+    _krovinys(c, "AAA111", "DE", "20")
+    conn.commit()
+
+    plan = build_plan(conn, DIENA, DIENA + datetime.timedelta(days=1))
+
+    assert list(plan.index) == ["AAA111"]
+    assert plan.loc["AAA111", DIENA.isoformat()] == "IT10 -- -- -- / DE20 -- -- --"
+    assert plan.loc["AAA111", (DIENA + datetime.timedelta(days=1)).isoformat()] == ""
@@ -0,0 +1,21 @@
+def _vair_sk(c, numeris):
+    return c.execute("SELECT vair_sk FROM vilkiku_suvestine WHERE numeris = ?", (numeris,)).fetchone()[0]
+
+
+def test_vairuotojo_priskyrimas_atnaujina_suvestine(db_conn):
+    conn, c = db_conn
+    c.execute(
+        "INSERT INTO vilkikai (marke, modelis, valstybinis_nr, numeris) VALUES ('Volvo', 'FH', 'AAA111', 'AAA111')"
+    )
+    conn.commit()
+    assert _vair_sk(c, "AAA111") == 0
+
+    c.execute(
+        "INSERT INTO vilkiku_vairuotojai (vilkiko_numeris, vairuotojas, eile) VALUES ('AAA111', 'Jonas Jonaitis', 1)"
+    )
+    conn.commit()
+    assert _vair_sk(c, "AAA111") == 1
+
+    c.execute("DELETE FROM vilkiku_vairuotojai WHERE vairuotojas = 'Jonas Jonaitis'")
+    conn.commit()
+    assert _vair_sk(c, "AAA111") == 0
@@ -0,0 +1,50 @@
+from datetime import date
+
+from modules.update import issaugoti, palyginimui
+
+DATA = date(2026, 3, 10)
+
+
+class _Kursorius:
+    """Kursoriaus apvalkalas, skaičiuojantis executemany kvietimus."""
+
+    def __init__(self, c):
+        self.c = c
+        self.executemany_kvietimai = []
+
+    def executemany(self, sql, reiksmes):
+        reiksmes = list(reiksmes)
+        self.executemany_kvietimai.append(len(reiksmes))
+        return self.c.executemany(sql, reiksmes)
+
+
+def _laukai(sa, pk_laikas="08:30"):
+    return (sa, "9", "4", "Pakrauta", pk_laikas, DATA, "", "", DATA, "")
+
+
+def test_palyginimui_suvienodina_laikus():
+    assert palyginimui(_laukai("1", "0830")) == palyginimui(_laukai("1", "08:30"))
+    assert palyginimui(_laukai("1")) != palyginimui(_laukai("2"))
+
+
+def test_issaugoti_viena_transakcija_upsert_ir_zurnalas(db_conn):
+    conn, c = db_conn
+    kursorius = _Kursorius(c)
+
+    issaugoti(conn, kursorius, [
+        ("AAA111", DATA.isoformat(), _laukai("1"), "Tomas", "Rokas"),
+        ("BBB222", DATA.isoformat(), _laukai("2"), "Tomas", "Rokas"),
+    ])
+    assert kursorius.executemany_kvietimai == [2]
+
+    # Ta pati (vilkikas, data) pora atnaujinama, o ne įterpiama antrą kartą
+    issaugoti(conn, kursorius, [("AAA111", DATA.isoformat(), _laukai("7"), "Tomas", "Rokas")])
+    assert kursorius.executemany_kvietimai == [2, 1]
+    assert c.execute(
+        "SELECT vilkiko_numeris, sa, pakrovimo_laikas FROM vilkiku_darbo_laikai ORDER BY vilkiko_numeris"
+    ).fetchall() == [("AAA111", "7", "08:30"), ("BBB222", "2", "08:30")]
+
+    # Žurnale – kiekviena išsaugota versija
+    assert c.execute(
+        "SELECT vilkiko_numeris, sa, istrinta FROM vilkiku_darbo_laiku_istorija ORDER BY id"
+    ).fetchall() == [("AAA111", "1", 0), ("BBB222", "2", 0), ("AAA111", "7", 0)]